@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+RESYNC = "resync"
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode one event in the text/event-stream wire format"""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+class ApprovalEventBus:
+    """In-process pub/sub of approval queue events, keyed by reviewer.
+
+    Each event gets an id of the form `<epoch>-<seq>`. The epoch changes
+    every process start. The last `history` events are kept so a
+    reconnecting client can replay everything after its Last-Event-ID. When
+    the id falls outside that window (or comes from an earlier epoch), the
+    client gets a `resync` event and should refetch its queue once.
+    Subscribers that stop reading get a `resync` instead of an unbounded
+    backlog.
+
+    Events are published by the API handlers. With `watch(db)`, a Mongo
+    change stream on approval_requests can be the source instead, so every
+    worker sees changes made by the others.
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 100):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self._seq = 0
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+
+    def publish(self, reviewer_id: str, event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._seq += 1
+        message = {"id": f"{self.epoch}-{self._seq}", "seq": self._seq, "reviewer_id": reviewer_id,
+                   "event": event, "data": data}
+        self._history.append(message)
+        self.published += 1
+        for queue in self._subscribers.get(reviewer_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow reader: drop its backlog and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._resync())
+        return message
+
+    def _resync(self) -> Dict[str, Any]:
+        return {"id": f"{self.epoch}-{self._seq}", "event": RESYNC, "data": {}}
+
+    def _replay(self, reviewer_id: str, last_event_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return [self._resync()]
+        seq = int(seq)
+        if seq >= self._seq:
+            return []
+        if not self._history or self._history[0]["seq"] > seq + 1:
+            return [self._resync()]
+        return [m for m in self._history if m["seq"] > seq and m["reviewer_id"] == reviewer_id]
+
+    def subscribe(self, reviewer_id: str, last_event_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], asyncio.Queue]:
+        """Register a listener and return the events it missed plus its queue"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(reviewer_id, set()).add(queue)
+        return self._replay(reviewer_id, last_event_id), queue
+
+    def unsubscribe(self, reviewer_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(reviewer_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[reviewer_id]
+
+    async def stream(self, reviewer_id: str, last_event_id: Optional[str] = None,
+                     heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """Server-sent event stream for one reviewer, with comment heartbeats"""
+        missed, queue = self.subscribe(reviewer_id, last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            for message in missed:
+                yield format_sse(message)
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(message)
+        finally:
+            self.unsubscribe(reviewer_id, queue)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "published": self.published,
+            "history": len(self._history),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "change_stream": self._task is not None and not self._task.done()
+        }
+
+    def start(self, db) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.watch(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def watch(self, db) -> None:
+        """Publish assignments and decisions from a change stream (replica sets only)"""
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        resume_after = None
+        while True:
+            try:
+                async with db.approval_requests.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_after
+                ) as changes:
+                    async for change in changes:
+                        resume_after = change["_id"]
+                        self._publish_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Approval change stream failed: {e}")
+                await asyncio.sleep(5)
+
+    def _publish_change(self, change: Dict[str, Any]) -> None:
+        approval = change.get("fullDocument")
+        if not approval:
+            return
+        if change["operationType"] == "insert":
+            self.publish(approval["reviewer_id"], "assigned", assignment_event(approval))
+        elif approval.get("status") != "Pending":
+            self.publish(approval["reviewer_id"], "decided", decision_event(approval))
+
+def assignment_event(approval: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "approval_id": approval["id"],
+        "project_id": approval["project_id"],
+        "assigned_at": approval.get("assigned_at")
+    }
+
+def decision_event(approval: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "approval_id": approval["id"],
+        "project_id": approval["project_id"],
+        "decision": approval.get("status"),
+        "reviewed_at": approval.get("reviewed_at")
+    }
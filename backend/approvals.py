@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Optional
+from pymongo import ReturnDocument
+from pagination import seek_query
+
+# What a reviewer may see of a project while the review is anonymous
+REDACTED_PROJECT = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "description": 1,
+    "category": 1,
+    "budget": 1,
+    "status": 1,
+    "contractor_name": {"$literal": "[REDACTED]"},
+    "contractor_wallet": {"$literal": "[HIDDEN]"},
+    "submitted_at": 1
+}
+
+def pending_approvals_pipeline(authority_id: str, limit: int, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """One page of a reviewer's pending approvals with the redacted project joined in.
+
+    Pages are ordered by (assigned_at, id) and the project comes from a single
+    $lookup, so a page costs one round trip however long the queue is.
+    """
+    match = seek_query({"reviewer_id": authority_id, "status": "Pending"}, "assigned_at", cursor, descending=False)
+    return [
+        {"$match": match},
+        {"$sort": {"assigned_at": 1, "id": 1}},
+        {"$limit": limit + 1},
+        # let/pipeline form: localField together with pipeline needs MongoDB 5.0
+        {"$lookup": {
+            "from": "projects",
+            "let": {"project_id": "$project_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$id", "$$project_id"]}}},
+                {"$limit": 1},
+                {"$project": REDACTED_PROJECT}
+            ],
+            "as": "project"
+        }},
+        {"$addFields": {"project": {"$arrayElemAt": ["$project", 0]}}},
+        {"$project": {"_id": 0}}
+    ]
+
+class ReviewerScheduler:
+    """Atomic least-loaded reviewer assignment.
+
+    `assign` picks the authority with the fewest active reviews and
+    increments its count in one find_one_and_update. Concurrent submissions
+    therefore cannot all pick the same reviewer. The sort is served by the
+    (active_reviews) and (department, active_reviews) indexes. Reviewers at
+    `capacity` are skipped. A preferred department is tried first, then any
+    reviewer.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+
+    def _filter(self, department: Optional[str]) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if department:
+            query["department"] = department
+        if self.capacity:
+            query["active_reviews"] = {"$lt": self.capacity}
+        return query
+
+    async def assign(self, db, department: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Reserve a review slot and return the reviewer, or None when all are full"""
+        for candidate_department in ([department, None] if department else [None]):
+            reviewer = await db.authorities.find_one_and_update(
+                self._filter(candidate_department),
+                {"$inc": {"active_reviews": 1}},
+                sort=[("active_reviews", 1)],
+                projection={"_id": 0, "id": 1, "department": 1, "active_reviews": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if reviewer:
+                return reviewer
+        return None
+
+    async def release(self, db, reviewer_id: str, reviewed: bool = True) -> None:
+        """Free a review slot once a decision is made (or the assignment is undone)"""
+        await db.authorities.update_one(
+            {"id": reviewer_id, "active_reviews": {"$gt": 0}},
+            {"$inc": {"active_reviews": -1, "total_reviewed": 1 if reviewed else 0}}
+        )
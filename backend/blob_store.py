@@ -0,0 +1,171 @@
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from datetime_codec import utcnow
+
+logger = logging.getLogger(__name__)
+
+class BlobStore:
+    """Content-addressed index of uploaded files, keyed by SHA-256.
+
+    Each `blobs` document records where the bytes live and how many
+    `documents` records point at them (`refcount`). Until the pin queue has
+    pinned it, the bytes are in `local_path`. Afterwards they are at
+    `ipfs_hash`. An upload whose hash is already known only takes a
+    reference. Its local copy is discarded and processing and pinning are
+    skipped. Deleting a document drops its reference. A blob whose count
+    reaches zero gets an `orphaned_at` stamp. A pinned one keeps its pin, so
+    a re-upload within the grace period can still reuse it, and `sweep`
+    unpins and forgets it afterwards. One not pinned yet loses its local
+    copy straight away and is marked failed, so a re-upload supplies a fresh
+    copy and requeues it.
+    """
+
+    async def acquire(self, db, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Take a reference on an existing blob, or return None if it is new"""
+        return await db.blobs.find_one_and_update(
+            {"_id": file_hash},
+            {"$inc": {"refcount": 1}, "$unset": {"orphaned_at": ""}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def register(self, db, file_hash: str, local_path: str, file_name: str, size: int,
+                       metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a newly stored blob with one reference and queue it for pinning.
+
+        `metadata` (e.g. extracted gps_data) is kept for reuse by duplicates.
+        If a concurrent upload of the same bytes registered first, this call
+        just adds a reference to that blob.
+        """
+        now = utcnow()
+        return await db.blobs.find_one_and_update(
+            {"_id": file_hash},
+            {
+                "$inc": {"refcount": 1},
+                "$setOnInsert": {"local_path": local_path, "file_name": file_name, "size": size,
+                                 "ipfs_hash": None, "pin_status": "pending", "attempts": 0,
+                                 "next_attempt_at": now, "created_at": now, **(metadata or {})},
+                "$unset": {"orphaned_at": ""}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def release(self, db, file_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Drop one reference; a blob with no references left is marked orphaned"""
+        if not file_hash:
+            return None
+        blob = await db.blobs.find_one_and_update(
+            {"_id": file_hash, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob and blob["refcount"] == 0:
+            await db.blobs.update_one(
+                {"_id": file_hash, "refcount": 0},
+                {"$set": {"orphaned_at": utcnow()}}
+            )
+            await self._discard_local_copy(db, {"_id": file_hash, "refcount": 0, "pin_status": "pending"})
+        return blob
+
+    async def _discard_local_copy(self, db, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Drop the local copy of an unreferenced blob matching `query`.
+
+        The blob is marked failed before the file goes, so an upload racing
+        with this sees no usable copy and supplies its own.
+        """
+        blob = await db.blobs.find_one_and_update(
+            {**query, "local_path": {"$ne": None}},
+            {"$set": {"pin_status": "failed", "pin_error": "Orphaned before it was pinned"},
+             "$unset": {"local_path": ""}}
+        )
+        if blob:
+            try:
+                os.remove(blob["local_path"])
+            except OSError:
+                pass
+        return blob
+
+    async def sweep(self, db, ipfs, grace_seconds: float) -> Dict[str, int]:
+        """Forget blobs orphaned for longer than `grace_seconds`.
+
+        Local copies are removed and pins released. A blob that is
+        re-referenced mid-sweep is left alone. Without pinning credentials,
+        pinned orphans are kept for a later sweep.
+        """
+        cutoff = utcnow() - timedelta(seconds=grace_seconds)
+        query = {"refcount": 0, "orphaned_at": {"$lt": cutoff}}
+        if not ipfs.configured:
+            query["ipfs_hash"] = None
+        swept = {"removed": 0, "unpinned": 0, "unpin_failed": 0}
+        async for candidate in db.blobs.find(query, {"_id": 1}):
+            owned = {**query, "_id": candidate["_id"]}
+            await self._discard_local_copy(db, owned)
+            blob = await db.blobs.find_one_and_delete(owned)
+            if blob is None:
+                continue
+            swept["removed"] += 1
+            if blob.get("ipfs_hash"):
+                try:
+                    await ipfs.unpin(blob["ipfs_hash"])
+                    swept["unpinned"] += 1
+                except Exception as e:
+                    # The record is gone, so this pin is only logged from here on
+                    swept["unpin_failed"] += 1
+                    logger.error(f"Unpinning orphaned blob {blob['_id']} ({blob['ipfs_hash']}) failed: {e}")
+        return swept
+
+    async def rebuild(self, db) -> Dict[str, int]:
+        """Recompute every blob's refcount from the documents collection"""
+        counted = 0
+        async for group in db.documents.aggregate([
+            {"$match": {"file_hash": {"$ne": None}}},
+            {"$sort": {"uploaded_at": 1}},
+            {"$group": {
+                "_id": "$file_hash",
+                "refcount": {"$sum": 1},
+                "ipfs_hash": {"$first": "$ipfs_hash"},
+                "size": {"$first": "$file_size"},
+                "created_at": {"$first": "$uploaded_at"}
+            }}
+        ]):
+            await db.blobs.update_one(
+                {"_id": group["_id"]},
+                {
+                    "$set": {"refcount": group["refcount"]},
+                    "$setOnInsert": {"ipfs_hash": group["ipfs_hash"], "size": group["size"],
+                                     "pin_status": "pinned" if group["ipfs_hash"] else "failed",
+                                     "created_at": group["created_at"]},
+                    "$unset": {"orphaned_at": ""}
+                },
+                upsert=True
+            )
+            counted += 1
+
+        # Blobs no document points at any more
+        seen = await db.documents.distinct("file_hash")
+        orphaned = await db.blobs.update_many(
+            {"_id": {"$nin": seen}, "refcount": {"$ne": 0}},
+            {"$set": {"refcount": 0, "orphaned_at": utcnow()}}
+        )
+        return {"blobs": counted, "orphaned": orphaned.modified_count}
+
+    async def stats(self, db) -> Dict[str, Any]:
+        rows = await db.blobs.aggregate([
+            {"$group": {
+                "_id": None,
+                "blobs": {"$sum": 1},
+                "references": {"$sum": "$refcount"},
+                "orphaned": {"$sum": {"$cond": [{"$eq": ["$refcount", 0]}, 1, 0]}},
+                "stored_bytes": {"$sum": "$size"},
+                "referenced_bytes": {"$sum": {"$multiply": ["$size", "$refcount"]}}
+            }}
+        ]).to_list(1)
+        totals = rows[0] if rows else {"blobs": 0, "references": 0, "orphaned": 0,
+                                       "stored_bytes": 0, "referenced_bytes": 0}
+        totals.pop("_id", None)
+        return totals
+
+blob_store = BlobStore()
@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Tuple, Union
+import aiohttp
+from rpc_pool import RPCProviderPool, RPCEndpointError
+
+class RPCError(Exception):
+    """JSON-RPC call failed or returned an error object"""
+
+class RPCTimeout(RPCError):
+    """JSON-RPC call did not complete within its timeout"""
+
+def hex_to_int(value: Optional[str]) -> Optional[int]:
+    return int(value, 16) if isinstance(value, str) else value
+
+class ChainClient:
+    """Non-blocking JSON-RPC client for the Polygon node.
+
+    Calls go over a shared aiohttp session, so a slow RPC endpoint only
+    suspends the awaiting handler instead of the whole event loop. Every call
+    has a timeout, which also covers the wait for a concurrency slot, and the
+    number of in-flight calls is bounded by a semaphore. `rpc_urls` may list
+    several endpoints (comma-separated or as a list); they are routed through
+    an RPCProviderPool.
+    """
+
+    def __init__(
+        self,
+        rpc_urls: Union[str, List[str]],
+        timeout: float = 10.0,
+        max_concurrency: int = 16,
+        batch_size: int = 100,
+        hedge_delay: Optional[float] = None
+    ):
+        if isinstance(rpc_urls, str):
+            rpc_urls = [url.strip() for url in rpc_urls.split(",") if url.strip()]
+        self.rpc_url = rpc_urls[0]
+        self.pool = RPCProviderPool(rpc_urls, hedge_delay=hedge_delay)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                # Headroom for hedged requests to a second endpoint
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency * 2)
+            )
+        return self._session
+
+    async def _post(self, payload: Any) -> Any:
+        async with self._get_semaphore():
+            try:
+                return await self.pool.post(self._get_session(), payload)
+            except RPCEndpointError as e:
+                raise RPCError(str(e))
+
+    async def request(self, method: str, params: Optional[List[Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Perform a single JSON-RPC call and return its result"""
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        try:
+            body = await asyncio.wait_for(self._post(payload), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise RPCTimeout(f"{method} timed out after {timeout or self.timeout}s")
+        except aiohttp.ClientError as e:
+            raise RPCError(f"{method} failed: {e}")
+
+        if body.get("error"):
+            raise RPCError(f"{method} error: {body['error'].get('message', body['error'])}")
+        return body.get("result")
+
+    async def batch_request(
+        self,
+        calls: List[Tuple[str, List[Any]]],
+        timeout: Optional[float] = None
+    ) -> List[Any]:
+        """Send many calls as JSON-RPC batches and return results in call order.
+
+        Calls are split into HTTP batches of `batch_size`. A per-call error
+        object comes back as an RPCError instance in its slot instead of
+        failing the whole batch.
+        """
+        results: List[Any] = [None] * len(calls)
+
+        async def send(offset: int, chunk: List[Tuple[str, List[Any]]]) -> None:
+            ids = {}
+            payload = []
+            for index, (method, params) in enumerate(chunk):
+                call_id = next(self._ids)
+                ids[call_id] = offset + index
+                payload.append({"jsonrpc": "2.0", "id": call_id, "method": method, "params": params})
+            try:
+                body = await asyncio.wait_for(self._post(payload), timeout or self.timeout)
+            except asyncio.TimeoutError:
+                raise RPCTimeout(f"batch of {len(chunk)} calls timed out after {timeout or self.timeout}s")
+            except aiohttp.ClientError as e:
+                raise RPCError(f"batch of {len(chunk)} calls failed: {e}")
+            if not isinstance(body, list):
+                raise RPCError(f"batch rejected: {body.get('error', body) if isinstance(body, dict) else body}")
+
+            for item in body:
+                index = ids.get(item.get("id"))
+                if index is None:
+                    continue
+                if item.get("error"):
+                    results[index] = RPCError(item["error"].get("message", str(item["error"])))
+                else:
+                    results[index] = item.get("result")
+
+        await asyncio.gather(*(
+            send(offset, calls[offset:offset + self.batch_size])
+            for offset in range(0, len(calls), self.batch_size)
+        ))
+        return results
+
+    async def block_number(self) -> int:
+        return hex_to_int(await self.request("eth_blockNumber"))
+
+    async def is_connected(self) -> bool:
+        try:
+            await self.request("eth_blockNumber")
+            return True
+        except RPCError:
+            return False
+
+    async def get_transaction(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        return await self.request("eth_getTransactionByHash", [tx_hash])
+
+    async def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        return await self.request("eth_getTransactionReceipt", [tx_hash])
+
+    async def get_logs(self, address: str, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        return await self.request("eth_getLogs", [{
+            "address": address,
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block)
+        }])
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from chain_client import ChainClient
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class ChainHeadTracker:
+    """Shared, periodically refreshed view of the latest block number.
+
+    A background loop polls eth_blockNumber every `refresh_interval` seconds.
+    Readers get the value from memory. When it is missing or older than
+    `max_age`, concurrent readers share a single in-flight refresh instead of
+    each issuing their own RPC call.
+    """
+
+    def __init__(self, chain: ChainClient, refresh_interval: float = 5.0, max_age: float = 30.0):
+        self.chain = chain
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.block_number: Optional[int] = None
+        self.error: Optional[str] = None
+        self.rpc_calls = 0
+        self._fetched_at: Optional[float] = None
+        self._flight = SingleFlight("chain_head")
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    async def refresh(self) -> int:
+        """Fetch the head, joining a refresh that is already in flight"""
+        return await self._flight.do("head", self._fetch)
+
+    async def _fetch(self) -> int:
+        self.rpc_calls += 1
+        try:
+            block_number = await self.chain.block_number()
+        except Exception as e:
+            self.error = str(e)
+            raise
+        self.block_number = block_number
+        self.error = None
+        self._fetched_at = time.monotonic()
+        return block_number
+
+    async def latest(self) -> int:
+        """Latest block number, served from memory while it is fresh"""
+        age = self.age
+        if self.block_number is not None and age is not None and age <= self.max_age:
+            return self.block_number
+        return await self.refresh()
+
+    def snapshot(self) -> Dict[str, Any]:
+        age = self.age
+        return {
+            "latest_block": self.block_number,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stale": age is None or age > self.max_age,
+            "error": self.error
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Chain head refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from pymongo import UpdateOne
+from chain_client import RPCError
+from datetime_codec import utcnow
+from receipt_cache import ReceiptCache
+
+logger = logging.getLogger(__name__)
+
+class ChainIndexer:
+    """Background worker that verifies pending transactions against the chain.
+
+    Each pass scans transactions whose `chain_status` is still pending, in
+    `_id` order and `batch_size` at a time. They are resolved through the
+    receipt cache using JSON-RPC batches, with up to `concurrency` batches in
+    flight. The cache writes finalized receipts back to `transactions`. The
+    scan position is checkpointed in `indexer_state`, so a restart resumes
+    where it stopped. RPC failures back off exponentially with jitter.
+    Hashes that are still unknown are retried on a growing per-document
+    schedule, so fabricated hashes do not cost an RPC call on every pass.
+    A mined but not yet final transaction gets its block number recorded and
+    is re-checked once it should have reached finality.
+    """
+
+    STATE_ID = "transaction_verifier"
+
+    def __init__(
+        self,
+        receipt_cache: ReceiptCache,
+        batch_size: int = 100,
+        concurrency: int = 2,
+        idle_interval: float = 15.0,
+        max_backoff: float = 300.0,
+        retry_base: float = 30.0,
+        retry_max: float = 6 * 3600.0,
+        block_time: float = 2.0
+    ):
+        self.receipt_cache = receipt_cache
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.block_time = block_time
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self.metrics: Dict[str, Any] = {
+            "running": False,
+            "passes": 0,
+            "scanned": 0,
+            "resolved": 0,
+            "awaiting_finality": 0,
+            "pending": 0,
+            "rpc_errors": 0,
+            "last_batch_ms": None,
+            "last_pass_at": None,
+            "last_error": None,
+            "backoff_seconds": 0
+        }
+
+    def start(self, db) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db) -> None:
+        self.metrics["running"] = True
+        try:
+            while True:
+                try:
+                    await self.run_pass(db)
+                    self._failures = 0
+                    self.metrics["backoff_seconds"] = 0
+                    delay = self.idle_interval
+                except RPCError as e:
+                    self._failures += 1
+                    self.metrics["rpc_errors"] += 1
+                    self.metrics["last_error"] = str(e)
+                    delay = min(self.max_backoff, self.idle_interval * 2 ** self._failures)
+                    delay *= random.uniform(0.5, 1.0)
+                    self.metrics["backoff_seconds"] = round(delay, 1)
+                    logger.warning(f"Chain indexer backing off {delay:.1f}s: {e}")
+                except Exception as e:
+                    self.metrics["last_error"] = str(e)
+                    logger.error(f"Chain indexer pass failed: {e}")
+                    delay = self.idle_interval
+                await asyncio.sleep(delay)
+        finally:
+            self.metrics["running"] = False
+
+    async def run_pass(self, db) -> None:
+        """Scan from the checkpoint to the end of the unverified set once"""
+        state = await db.indexer_state.find_one({"_id": self.STATE_ID}) or {}
+        last_id = state.get("last_id")
+        pending = 0
+
+        while True:
+            query: Dict[str, Any] = {
+                "chain_status": {"$in": ["pending", None]},
+                "$or": [{"next_verify_at": None}, {"next_verify_at": {"$lte": utcnow()}}]
+            }
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            window = await db.transactions.find(
+                query, {"_id": 1, "tx_hash": 1, "verify_attempts": 1}
+            ).sort(
+                "_id", 1
+            ).limit(self.batch_size * self.concurrency).to_list(None)
+            if not window:
+                break
+
+            batches = [window[i:i + self.batch_size] for i in range(0, len(window), self.batch_size)]
+            results = await asyncio.gather(*(self._verify_batch(db, batch) for batch in batches))
+            pending += sum(results)
+
+            last_id = window[-1]["_id"]
+            await db.indexer_state.update_one(
+                {"_id": self.STATE_ID},
+                {"$set": {"last_id": last_id, "updated_at": utcnow()}},
+                upsert=True
+            )
+
+        # Wrap around so still-pending transactions are retried next pass
+        await db.indexer_state.update_one(
+            {"_id": self.STATE_ID},
+            {"$set": {"last_id": None, "updated_at": utcnow()}},
+            upsert=True
+        )
+        self.metrics["passes"] += 1
+        self.metrics["pending"] = pending
+        self.metrics["last_pass_at"] = utcnow().isoformat()
+
+    async def _verify_batch(self, db, batch) -> int:
+        """Resolve one batch and return how many remain pending"""
+        docs = [doc for doc in batch if doc.get("tx_hash")]
+        started = time.perf_counter()
+        results = await self.receipt_cache.lookup_many(db, [doc["tx_hash"] for doc in docs])
+        self.metrics["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.metrics["scanned"] += len(docs)
+
+        retries = []
+        now = utcnow()
+        head = None
+        for doc in docs:
+            result = results.get(doc["tx_hash"])
+            if isinstance(result, dict):
+                if head is None:
+                    head = await self.receipt_cache.latest_block()
+                remaining = self.receipt_cache.finality_blocks - (head - result["block_number"])
+                if remaining <= 0:
+                    # Final: the cache has already written it to the transaction
+                    self.metrics["resolved"] += 1
+                    continue
+                self.metrics["awaiting_finality"] += 1
+                retries.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"block_number": result["block_number"],
+                              "next_verify_at": now + timedelta(seconds=remaining * self.block_time)}}
+                ))
+                continue
+            attempts = doc.get("verify_attempts", 0) + 1
+            delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+            retries.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"verify_attempts": attempts, "next_verify_at": now + timedelta(seconds=delay)}}
+            ))
+        if retries:
+            await db.transactions.bulk_write(retries, ordered=False)
+        return len(retries)
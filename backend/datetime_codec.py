@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import typing
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def parse_datetime(value: Any) -> Any:
+    """Return value as an aware UTC datetime when it is a datetime or ISO string"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def decode_datetimes(doc: Optional[Dict[str, Any]], fields: List[str]) -> Optional[Dict[str, Any]]:
+    """Normalize the given timestamp fields of a Mongo document in place"""
+    if doc:
+        for field in fields:
+            if doc.get(field) is not None:
+                doc[field] = parse_datetime(doc[field])
+    return doc
+
+class MongoModel(BaseModel):
+    """Base model whose datetimes are stored as native BSON dates.
+
+    `to_mongo` keeps datetime objects as-is so pymongo encodes them as BSON
+    dates. `decode` accepts documents written before the migration, where the
+    same fields were ISO strings.
+    """
+    model_config = ConfigDict(extra="ignore")
+
+    @classmethod
+    def datetime_fields(cls) -> List[str]:
+        fields = []
+        for name, info in cls.model_fields.items():
+            annotation = info.annotation
+            if annotation is datetime or datetime in typing.get_args(annotation):
+                fields.append(name)
+        return fields
+
+    def to_mongo(self) -> Dict[str, Any]:
+        return self.model_dump()
+
+    @classmethod
+    def decode(cls, doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        return decode_datetimes(doc, cls.datetime_fields())
+
+class DatetimeMigration:
+    """Background, batched conversion of legacy ISO string timestamps to BSON dates"""
+
+    def __init__(self, batch_size: int = 500, pause: float = 0.05):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.state: Dict[str, Any] = {"running": False, "converted": {}, "error": None}
+
+    async def run(self, db, fields_by_collection: Dict[str, List[str]]) -> Dict[str, int]:
+        """Convert every string value of the given fields in place.
+
+        Each batch updates documents only if the field still holds the string
+        that was read, so writes racing with the migration are never clobbered.
+        The short pause between batches keeps the migration from starving
+        live traffic.
+        """
+        self.state.update(running=True, error=None)
+        try:
+            for collection, fields in fields_by_collection.items():
+                for field in fields:
+                    key = f"{collection}.{field}"
+                    self.state["converted"].setdefault(key, 0)
+                    last_id = None
+                    while True:
+                        query: Dict[str, Any] = {field: {"$type": "string"}}
+                        if last_id is not None:
+                            query["_id"] = {"$gt": last_id}
+                        batch = await db[collection].find(query, {"_id": 1, field: 1}).sort(
+                            "_id", 1
+                        ).limit(self.batch_size).to_list(self.batch_size)
+                        if not batch:
+                            break
+                        last_id = batch[-1]["_id"]
+
+                        ops = []
+                        for doc in batch:
+                            parsed = parse_datetime(doc[field])
+                            if isinstance(parsed, datetime):
+                                ops.append(UpdateOne(
+                                    {"_id": doc["_id"], field: doc[field]},
+                                    {"$set": {field: parsed}}
+                                ))
+                        if ops:
+                            result = await db[collection].bulk_write(ops, ordered=False)
+                            self.state["converted"][key] += result.modified_count
+                        await asyncio.sleep(self.pause)
+            logger.info(f"Datetime migration finished: {self.state['converted']}")
+        except Exception as e:
+            logger.error(f"Datetime migration failed: {e}")
+            self.state["error"] = str(e)
+        finally:
+            self.state["running"] = False
+        return self.state["converted"]
+
+datetime_migration = DatetimeMigration()
@@ -1,8 +1,17 @@
 from PIL import Image
 import exifread
 import io
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO
 import json
+import struct
+
+JPEG_SOI = b'\xff\xd8'
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+JPEG_APP1 = 0xE1
+EXIF_HEADER = b'Exif\x00\x00'
+TIFF_HEADERS = (b'II*\x00', b'MM\x00*')
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1'}
 
 class DocumentProcessor:
     """Process uploaded documents and extract metadata"""
@@ -10,49 +19,124 @@ class DocumentProcessor:
     @staticmethod
     def extract_gps_from_image(file_content: bytes) -> Optional[Dict[str, Any]]:
         """Extract GPS coordinates from image EXIF data"""
+        return DocumentProcessor._extract_gps(io.BytesIO(file_content))
+    
+    @staticmethod
+    def extract_gps_from_path(file_path: str) -> Optional[Dict[str, Any]]:
+        """Extract GPS coordinates from an image on disk without loading it whole"""
         try:
-            # Read EXIF data
-            tags = exifread.process_file(io.BytesIO(file_content))
+            with open(file_path, 'rb') as f:
+                return DocumentProcessor._extract_gps(f)
+        except OSError as e:
+            print(f"GPS extraction error: {e}")
+            return None
+    
+    @staticmethod
+    def _extract_gps(file_obj: BinaryIO) -> Optional[Dict[str, Any]]:
+        try:
+            try:
+                tags = DocumentProcessor._read_exif_fast(file_obj)
+            except Exception:
+                tags = None
+            if not tags:
+                # Unknown layout or nothing found: fall back to the full parse
+                tags = DocumentProcessor._read_exif_full(file_obj)
+            return DocumentProcessor._gps_from_tags(tags)
             
-            gps_data = {}
+        except Exception as e:
+            print(f"GPS extraction error: {e}")
+            return None
+    
+    @staticmethod
+    def _read_exif_full(file_obj: BinaryIO) -> Dict[str, Any]:
+        """Default exifread parse, including MakerNotes and the embedded thumbnail"""
+        return exifread.process_file(file_obj)
+    
+    @staticmethod
+    def _read_exif_fast(file_obj: BinaryIO) -> Optional[Dict[str, Any]]:
+        """Parse only the EXIF block, skipping MakerNotes and thumbnails.
+        
+        For JPEG only the APP1 Exif segment is read. TIFF and HEIC are parsed
+        in place, since exifread seeks straight to their IFDs. Returns None
+        for any other format.
+        """
+        file_obj.seek(0)
+        head = file_obj.read(12)
+        if head.startswith(JPEG_SOI):
+            segment = DocumentProcessor._jpeg_exif_segment(file_obj)
+            if segment is None:
+                return None
+            return exifread.process_file(io.BytesIO(segment), details=False, extract_thumbnail=False)
+        if head[:4] in TIFF_HEADERS or (head[4:8] == b'ftyp' and head[8:12] in HEIF_BRANDS):
+            return exifread.process_file(file_obj, details=False, extract_thumbnail=False)
+        return None
+    
+    @staticmethod
+    def _jpeg_exif_segment(file_obj: BinaryIO) -> Optional[bytes]:
+        """Walk JPEG marker segments up to the scan and return the TIFF body of APP1 Exif"""
+        file_obj.seek(2)
+        while True:
+            marker = file_obj.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            while marker[1] == 0xFF:
+                # Fill bytes before the marker code
+                marker = marker[1:] + file_obj.read(1)
+            code = marker[1]
+            if code in (JPEG_SOS, JPEG_EOI):
+                return None
+            if code == 0x01 or 0xD0 <= code <= 0xD7:
+                # Standalone markers carry no length
+                continue
+            length_bytes = file_obj.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0] - 2
+            if code == JPEG_APP1:
+                payload = file_obj.read(length)
+                if payload.startswith(EXIF_HEADER):
+                    return payload[len(EXIF_HEADER):]
+                # XMP or another APP1 user; keep looking
+            else:
+                file_obj.seek(length, io.SEEK_CUR)
+    
+    @staticmethod
+    def _gps_from_tags(tags: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        gps_data = {}
+        
+        # Extract GPS coordinates
+        if 'GPS GPSLatitude' in tags and 'GPS GPSLongitude' in tags:
+            lat = tags['GPS GPSLatitude']
+            lat_ref = tags.get('GPS GPSLatitudeRef', 'N')
+            lon = tags['GPS GPSLongitude']
+            lon_ref = tags.get('GPS GPSLongitudeRef', 'E')
             
-            # Extract GPS coordinates
-            if 'GPS GPSLatitude' in tags and 'GPS GPSLongitude' in tags:
-                lat = tags['GPS GPSLatitude']
-                lat_ref = tags.get('GPS GPSLatitudeRef', 'N')
-                lon = tags['GPS GPSLongitude']
-                lon_ref = tags.get('GPS GPSLongitudeRef', 'E')
-                
-                # Convert to decimal degrees
-                lat_decimal = DocumentProcessor._convert_to_degrees(lat)
-                if lat_ref.values[0] == 'S':
-                    lat_decimal = -lat_decimal
-                
-                lon_decimal = DocumentProcessor._convert_to_degrees(lon)
-                if lon_ref.values[0] == 'W':
-                    lon_decimal = -lon_decimal
-                
-                gps_data['latitude'] = lat_decimal
-                gps_data['longitude'] = lon_decimal
-                gps_data['verified'] = True
-                
-            # Extract timestamp
-            if 'GPS GPSDate' in tags:
-                gps_data['date'] = str(tags['GPS GPSDate'])
-            if 'EXIF DateTimeOriginal' in tags:
-                gps_data['timestamp'] = str(tags['EXIF DateTimeOriginal'])
+            # Convert to decimal degrees
+            lat_decimal = DocumentProcessor._convert_to_degrees(lat)
+            if lat_ref.values[0] == 'S':
+                lat_decimal = -lat_decimal
             
-            # Extract camera info for authenticity
-            if 'Image Make' in tags:
-                gps_data['camera_make'] = str(tags['Image Make'])
-            if 'Image Model' in tags:
-                gps_data['camera_model'] = str(tags['Image Model'])
+            lon_decimal = DocumentProcessor._convert_to_degrees(lon)
+            if lon_ref.values[0] == 'W':
+                lon_decimal = -lon_decimal
             
-            return gps_data if gps_data else None
+            gps_data['latitude'] = lat_decimal
+            gps_data['longitude'] = lon_decimal
+            gps_data['verified'] = True
             
-        except Exception as e:
-            print(f"GPS extraction error: {e}")
-            return None
+        # Extract timestamp
+        if 'GPS GPSDate' in tags:
+            gps_data['date'] = str(tags['GPS GPSDate'])
+        if 'EXIF DateTimeOriginal' in tags:
+            gps_data['timestamp'] = str(tags['EXIF DateTimeOriginal'])
+        
+        # Extract camera info for authenticity
+        if 'Image Make' in tags:
+            gps_data['camera_make'] = str(tags['Image Make'])
+        if 'Image Model' in tags:
+            gps_data['camera_model'] = str(tags['Image Model'])
+        
+        return gps_data if gps_data else None
     
     @staticmethod
     def _convert_to_degrees(value):
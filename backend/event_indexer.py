@@ -0,0 +1,322 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+from pymongo import UpdateOne
+from chain_client import ChainClient, RPCError, hex_to_int
+from chain_head import ChainHeadTracker
+from datetime_codec import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Events emitted by contracts/FundTracker.sol
+FUND_TRACKER_EVENTS_ABI: List[Dict[str, Any]] = [
+    {"type": "event", "name": "ProjectCreated", "inputs": [
+        {"name": "projectId", "type": "uint256", "indexed": True},
+        {"name": "name", "type": "string", "indexed": False},
+        {"name": "budget", "type": "uint256", "indexed": False},
+        {"name": "manager", "type": "address", "indexed": False}
+    ]},
+    {"type": "event", "name": "FundsAllocated", "inputs": [
+        {"name": "projectId", "type": "uint256", "indexed": True},
+        {"name": "amount", "type": "uint256", "indexed": False}
+    ]},
+    {"type": "event", "name": "MilestoneCreated", "inputs": [
+        {"name": "milestoneId", "type": "uint256", "indexed": True},
+        {"name": "projectId", "type": "uint256", "indexed": True},
+        {"name": "name", "type": "string", "indexed": False},
+        {"name": "targetAmount", "type": "uint256", "indexed": False}
+    ]},
+    {"type": "event", "name": "ExpenditureRecorded", "inputs": [
+        {"name": "expenditureId", "type": "uint256", "indexed": True},
+        {"name": "projectId", "type": "uint256", "indexed": True},
+        {"name": "amount", "type": "uint256", "indexed": False},
+        {"name": "recipient", "type": "address", "indexed": False}
+    ]},
+    {"type": "event", "name": "MilestoneCompleted", "inputs": [
+        {"name": "milestoneId", "type": "uint256", "indexed": True},
+        {"name": "projectId", "type": "uint256", "indexed": True}
+    ]}
+]
+
+def load_event_abi(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Events from a compiled ABI file, or the built-in FundTracker events"""
+    if path:
+        with open(path) as f:
+            abi = json.load(f)
+        return [entry for entry in abi if entry.get("type") == "event"]
+    return FUND_TRACKER_EVENTS_ABI
+
+class EventDecoder:
+    """Decode raw logs using topic0 -> event lookups built once from the ABI"""
+
+    def __init__(self, abi: List[Dict[str, Any]]):
+        self.events: Dict[str, Dict[str, Any]] = {}
+        for event in abi:
+            types = ",".join(arg["type"] for arg in event["inputs"])
+            topic = "0x" + keccak(text=f"{event['name']}({types})").hex()
+            self.events[topic] = {
+                "name": event["name"],
+                "indexed": [arg for arg in event["inputs"] if arg.get("indexed")],
+                "data": [arg for arg in event["inputs"] if not arg.get("indexed")]
+            }
+
+    @staticmethod
+    def _normalize(arg_type: str, value: Any) -> Any:
+        if arg_type == "address":
+            return to_checksum_address(value)
+        if arg_type.startswith(("uint", "int")):
+            # uint256 does not fit a BSON int64
+            return str(value)
+        if isinstance(value, bytes):
+            return "0x" + value.hex()
+        return value
+
+    def decode(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        topics = log.get("topics") or []
+        if not topics:
+            return None
+        event = self.events.get(topics[0].lower())
+        if event is None:
+            return None
+
+        args = {}
+        for arg, topic in zip(event["indexed"], topics[1:]):
+            value = decode([arg["type"]], bytes.fromhex(topic[2:]))[0]
+            args[arg["name"]] = self._normalize(arg["type"], value)
+
+        data = bytes.fromhex((log.get("data") or "0x")[2:])
+        if event["data"]:
+            values = decode([arg["type"] for arg in event["data"]], data)
+            for arg, value in zip(event["data"], values):
+                args[arg["name"]] = self._normalize(arg["type"], value)
+
+        return {
+            "_id": f"{log['transactionHash'].lower()}:{hex_to_int(log['logIndex'])}",
+            "event": event["name"],
+            "args": args,
+            "tx_hash": log["transactionHash"].lower(),
+            "log_index": hex_to_int(log["logIndex"]),
+            "block_number": hex_to_int(log["blockNumber"]),
+            "block_hash": log.get("blockHash"),
+            "address": log.get("address")
+        }
+
+class EventIndexer:
+    """Pull contract logs into `chain_events` in checkpointed block ranges.
+
+    Ranges are fetched with eth_getLogs in chunks that adapt to the provider.
+    A failed chunk is halved and retried, and each success grows the next
+    chunk. Every pass starts `reorg_depth` blocks before the checkpoint. Logs
+    in that window are upserted, and stored events the chain no longer
+    returns are deleted, so reorged-out events disappear.
+    """
+
+    STATE_ID = "contract_events"
+
+    def __init__(
+        self,
+        chain: ChainClient,
+        head: ChainHeadTracker,
+        contract_address: str,
+        decoder: EventDecoder,
+        start_block: int = 0,
+        reorg_depth: int = 64,
+        chunk_size: int = 2000,
+        min_chunk_size: int = 1,
+        max_chunk_size: int = 10000,
+        interval: float = 15.0
+    ):
+        self.chain = chain
+        self.head = head
+        self.contract_address = contract_address
+        self.decoder = decoder
+        self.start_block = start_block
+        self.reorg_depth = reorg_depth
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, Any] = {
+            "running": False,
+            "last_block": None,
+            "chunk_size": chunk_size,
+            "events_upserted": 0,
+            "events_removed": 0,
+            "chunk_failures": 0,
+            "last_error": None
+        }
+
+    async def _fetch_chunk(self, block: int, to_block: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Fetch one chunk starting at `block`, shrinking it until the provider accepts"""
+        while True:
+            end = min(to_block, block + self.chunk_size - 1)
+            try:
+                logs = await self.chain.get_logs(self.contract_address, block, end)
+                break
+            except RPCError as e:
+                self.metrics["chunk_failures"] += 1
+                if self.chunk_size <= self.min_chunk_size:
+                    raise
+                self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
+                self.metrics["chunk_size"] = self.chunk_size
+                logger.info(f"eth_getLogs {block}-{end} failed ({e}); chunk size now {self.chunk_size}")
+
+        self.chunk_size = min(self.max_chunk_size, max(self.chunk_size + 1, int(self.chunk_size * 1.5)))
+        self.metrics["chunk_size"] = self.chunk_size
+        events = []
+        for log in logs or []:
+            if log.get("removed"):
+                continue
+            decoded = self.decoder.decode(log)
+            if decoded:
+                events.append(decoded)
+        return end, events
+
+    async def fetch_range(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """Fetch and decode all logs in [from_block, to_block] using adaptive chunks"""
+        events: List[Dict[str, Any]] = []
+        block = from_block
+        while block <= to_block:
+            end, chunk_events = await self._fetch_chunk(block, to_block)
+            events.extend(chunk_events)
+            block = end + 1
+        return events
+
+    async def run_pass(self, db) -> Tuple[int, int]:
+        """Index from the checkpoint (minus the reorg window) up to the chain head.
+
+        Each chunk is written and checkpointed on its own, so a long backfill
+        keeps its progress across restarts.
+        """
+        state = await db.indexer_state.find_one({"_id": self.STATE_ID}) or {}
+        last_block = state.get("last_block")
+        head = await self.head.latest()
+
+        if last_block is None:
+            block = self.start_block
+        else:
+            block = max(self.start_block, last_block + 1 - self.reorg_depth)
+        upserted = removed = 0
+
+        while block <= head:
+            end, events = await self._fetch_chunk(block, head)
+            indexed_at = utcnow()
+            if events:
+                await db.chain_events.bulk_write([
+                    UpdateOne({"_id": event["_id"]}, {"$set": {**event, "indexed_at": indexed_at}}, upsert=True)
+                    for event in events
+                ], ordered=False)
+                upserted += len(events)
+
+            # Within previously indexed blocks, drop events the chain no longer has
+            if last_block is not None and block <= last_block:
+                result = await db.chain_events.delete_many({
+                    "block_number": {"$gte": block, "$lte": min(end, last_block)},
+                    "_id": {"$nin": [event["_id"] for event in events]}
+                })
+                removed += result.deleted_count
+
+            await db.indexer_state.update_one(
+                {"_id": self.STATE_ID},
+                {"$set": {"last_block": max(end, last_block or 0), "updated_at": indexed_at}},
+                upsert=True
+            )
+            self.metrics["last_block"] = end
+            block = end + 1
+
+        self.metrics["events_upserted"] += upserted
+        self.metrics["events_removed"] += removed
+        return upserted, removed
+
+    def start(self, db) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db) -> None:
+        self.metrics["running"] = True
+        try:
+            while True:
+                try:
+                    await self.run_pass(db)
+                    self.metrics["last_error"] = None
+                except Exception as e:
+                    self.metrics["last_error"] = str(e)
+                    logger.warning(f"Event indexer pass failed: {e}")
+                await asyncio.sleep(self.interval)
+        finally:
+            self.metrics["running"] = False
+
+async def reconcile(db, sample_size: int = 20) -> Dict[str, Any]:
+    """Join `transactions` against `chain_events` on tx_hash, entirely in Mongo"""
+    def unmatched(from_collection, local_field, foreign_field):
+        # let/pipeline form: localField together with pipeline needs MongoDB 5.0
+        return [
+            {"$lookup": {
+                "from": from_collection,
+                "let": {"key": f"${local_field}"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": [f"${foreign_field}", "$$key"]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "matches"
+            }},
+            {"$match": {"matches": {"$size": 0}}},
+            {"$facet": {
+                "count": [{"$count": "n"}],
+                "sample": [{"$limit": sample_size}, {"$project": {"_id": 0, local_field: 1}}]
+            }}
+        ]
+
+    tx_side = await db.transactions.aggregate(unmatched("chain_events", "tx_hash", "tx_hash")).to_list(1)
+    event_side = await db.chain_events.aggregate(unmatched("transactions", "tx_hash", "tx_hash")).to_list(1)
+
+    def summarize(rows):
+        facets = rows[0] if rows else {"count": [], "sample": []}
+        count = facets["count"][0]["n"] if facets["count"] else 0
+        return {"count": count, "sample": [row["tx_hash"] for row in facets["sample"]]}
+
+    return {
+        "transactions_without_events": summarize(tx_side),
+        "events_without_transactions": summarize(event_side)
+    }
+
+def build_event_indexer(chain: ChainClient, head: ChainHeadTracker) -> Optional[EventIndexer]:
+    """Create the indexer from the environment; None when no contract is configured.
+
+    EVENT_INDEXER_START_BLOCK (the contract's deployment block) is required
+    with CONTRACT_ADDRESS. Without it, the first pass would scan eth_getLogs
+    from genesis.
+    """
+    contract_address = os.environ.get('CONTRACT_ADDRESS')
+    if not contract_address:
+        return None
+    start_block = os.environ.get('EVENT_INDEXER_START_BLOCK')
+    if not start_block:
+        raise RuntimeError(
+            "EVENT_INDEXER_START_BLOCK must be set to the block the contract at CONTRACT_ADDRESS was deployed in"
+        )
+    return EventIndexer(
+        chain,
+        head,
+        contract_address,
+        EventDecoder(load_event_abi(os.environ.get('CONTRACT_ABI_PATH'))),
+        start_block=int(start_block),
+        reorg_depth=int(os.environ.get('EVENT_INDEXER_REORG_DEPTH', '64')),
+        chunk_size=int(os.environ.get('EVENT_INDEXER_CHUNK_SIZE', '2000')),
+        interval=float(os.environ.get('EVENT_INDEXER_INTERVAL_SECONDS', '15'))
+    )
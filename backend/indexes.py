@@ -0,0 +1,139 @@
+import logging
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection -> list of (keys, options)
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "projects": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("created_at", ASCENDING), ("id", ASCENDING)]},
+        {"keys": [("status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]}
+    ],
+    "milestones": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("project_id", ASCENDING)]}
+    ],
+    "expenditures": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("project_id", ASCENDING), ("timestamp", ASCENDING)]},
+        {"keys": [("timestamp", ASCENDING), ("id", ASCENDING)]}
+    ],
+    "fund_allocations": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("project_id", ASCENDING), ("timestamp", ASCENDING)]},
+        {"keys": [("timestamp", ASCENDING), ("id", ASCENDING)]}
+    ],
+    "transactions": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("tx_hash", ASCENDING)], "unique": True},
+        {"keys": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+        {"keys": [("project_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]},
+        {"keys": [("chain_status", ASCENDING), ("_id", ASCENDING)]}
+    ],
+    "authorities": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("username", ASCENDING)], "unique": True},
+        {"keys": [("active_reviews", ASCENDING)]},
+        {"keys": [("department", ASCENDING), ("active_reviews", ASCENDING)]}
+    ],
+    "approval_requests": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("reviewer_id", ASCENDING), ("status", ASCENDING), ("assigned_at", ASCENDING), ("id", ASCENDING)]}
+    ],
+    "chain_events": [
+        {"keys": [("tx_hash", ASCENDING)]},
+        {"keys": [("block_number", ASCENDING)]}
+    ],
+    "blobs": [
+        {"keys": [("pin_status", ASCENDING), ("next_attempt_at", ASCENDING)]}
+    ],
+    "documents": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("project_id", ASCENDING)]},
+        {"keys": [("file_hash", ASCENDING)]}
+    ]
+}
+
+# Hot queries checked by the /api/admin/indexes report
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"name": "project_by_id", "collection": "projects", "filter": {"id": "probe"}},
+    {"name": "approved_projects", "collection": "projects", "filter": {"status": "Approved"},
+     "sort": [("created_at", ASCENDING), ("id", ASCENDING)]},
+    {"name": "milestones_by_project", "collection": "milestones", "filter": {"project_id": "probe"}},
+    {"name": "expenditures_by_project", "collection": "expenditures", "filter": {"project_id": "probe"}},
+    {"name": "allocations_by_project", "collection": "fund_allocations", "filter": {"project_id": "probe"}},
+    {"name": "transactions_recent", "collection": "transactions", "filter": {},
+     "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+    {"name": "transactions_by_project", "collection": "transactions", "filter": {"project_id": "probe"},
+     "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+    {"name": "transaction_by_hash", "collection": "transactions", "filter": {"tx_hash": "probe"}},
+    {"name": "pending_approvals", "collection": "approval_requests",
+     "filter": {"reviewer_id": "probe", "status": "Pending"},
+     "sort": [("assigned_at", ASCENDING), ("id", ASCENDING)]},
+    {"name": "documents_by_project", "collection": "documents", "filter": {"project_id": "probe"}}
+]
+
+def _index_name(keys) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every registered index. Safe to run on every startup.
+
+    create_index is a no-op when an identical index already exists. A failure
+    on one index (e.g. duplicates blocking a unique index) is logged and
+    reported without stopping the rest.
+    """
+    errors: Dict[str, List[str]] = {}
+    for collection, specs in INDEXES.items():
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            name = _index_name(spec["keys"])
+            try:
+                await db[collection].create_index(spec["keys"], name=name, **options)
+            except Exception as e:
+                logger.error(f"Index {collection}.{name} could not be created: {e}")
+                errors.setdefault(collection, []).append(f"{name}: {e}")
+    return errors
+
+def _winning_stages(plan: Dict[str, Any]) -> List[str]:
+    """Flatten the stage names of a winning plan tree"""
+    stages = [plan.get("stage", "")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages.extend(_winning_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_winning_stages(child))
+    return [stage for stage in stages if stage]
+
+async def index_report(db) -> Dict[str, Any]:
+    """Explain each hot query and flag any that fall back to a COLLSCAN"""
+    queries = []
+    for hot in HOT_QUERIES:
+        cursor = db[hot["collection"]].find(hot["filter"])
+        if hot.get("sort"):
+            cursor = cursor.sort(hot["sort"])
+        try:
+            explain = await cursor.explain()
+            planner = explain.get("queryPlanner", {})
+            stages = _winning_stages(planner.get("winningPlan", {}))
+            queries.append({
+                "name": hot["name"],
+                "collection": hot["collection"],
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages
+            })
+        except Exception as e:
+            queries.append({"name": hot["name"], "collection": hot["collection"], "error": str(e)})
+
+    indexes = {}
+    for collection in INDEXES:
+        info = await db[collection].index_information()
+        indexes[collection] = sorted(info.keys())
+
+    return {
+        "collscans": [q["name"] for q in queries if q.get("collscan")],
+        "queries": queries,
+        "indexes": indexes
+    }
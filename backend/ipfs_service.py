@@ -1,105 +1,159 @@
-import requests
+import aiohttp
+import asyncio
 import json
 import os
-from typing import Optional
+import random
+from typing import Any, Dict, Optional
+
+class IPFSError(Exception):
+    """Pinning request failed after all retries"""
+
+# Worth another attempt: rate limiting and upstream trouble
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
 
 class IPFSService:
-    """Service for interacting with IPFS via Pinata API"""
-    
-    def __init__(self):
-        self.pinata_api_key = os.environ.get('PINATA_API_KEY', '')
-        self.pinata_secret_key = os.environ.get('PINATA_SECRET_KEY', '')
-        self.pinata_jwt = os.environ.get('PINATA_JWT', '')
-        
+    """Async client for pinning to IPFS via the Pinata API.
+
+    Requests share one aiohttp session with a bounded keep-alive pool. Each
+    attempt has a timeout. Connection errors, timeouts and retryable HTTP
+    statuses are retried with jittered exponential backoff, honouring
+    Retry-After. Files are sent as streaming multipart straight from disk,
+    so an upload is never held in memory.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        timeout: float = 60.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        max_connections: int = 8
+    ):
+        self._api_url = api_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    # Read lazily: this module is imported before server.py loads .env
+    @property
+    def pinata_api_key(self) -> str:
+        return os.environ.get('PINATA_API_KEY', '')
+
+    @property
+    def pinata_secret_key(self) -> str:
+        return os.environ.get('PINATA_SECRET_KEY', '')
+
+    @property
+    def pinata_jwt(self) -> str:
+        return os.environ.get('PINATA_JWT', '')
+
+    @property
+    def api_url(self) -> str:
         # Use Pinata API
-        self.upload_url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-        self.json_url = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
-        
-    def upload_file(self, file_path: str, file_name: str) -> Optional[dict]:
-        """Upload file to IPFS via Pinata"""
-        try:
-            if not self.pinata_jwt and not self.pinata_api_key:
-                # Fallback: simulate IPFS upload for MVP
-                return self._simulate_ipfs_upload(file_name)
-            
-            headers = {
-                'Authorization': f'Bearer {self.pinata_jwt}' if self.pinata_jwt else None,
-                'pinata_api_key': self.pinata_api_key,
-                'pinata_secret_api_key': self.pinata_secret_key
-            }
-            
-            with open(file_path, 'rb') as file:
-                files = {'file': (file_name, file)}
-                response = requests.post(self.upload_url, files=files, headers=headers)
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    # Fallback to simulation
-                    return self._simulate_ipfs_upload(file_name)
-                    
-        except Exception as e:
-            print(f"IPFS upload error: {e}")
-            return self._simulate_ipfs_upload(file_name)
-    
-    def upload_json(self, data: dict) -> Optional[dict]:
-        """Upload JSON metadata to IPFS"""
-        try:
-            if not self.pinata_jwt and not self.pinata_api_key:
-                return self._simulate_ipfs_json(data)
-            
-            headers = {
-                'Authorization': f'Bearer {self.pinata_jwt}' if self.pinata_jwt else None,
-                'pinata_api_key': self.pinata_api_key,
-                'pinata_secret_api_key': self.pinata_secret_key,
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(self.json_url, json=data, headers=headers)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self._simulate_ipfs_json(data)
-                
-        except Exception as e:
-            print(f"IPFS JSON upload error: {e}")
-            return self._simulate_ipfs_json(data)
-    
-    def _simulate_ipfs_upload(self, file_name: str) -> dict:
-        """Simulate IPFS upload for MVP/testing"""
-        import hashlib
-        import time
-        
-        # Generate simulated IPFS hash
-        content = f"{file_name}{time.time()}"
-        ipfs_hash = 'Qm' + hashlib.sha256(content.encode()).hexdigest()[:44]
-        
-        return {
-            'IpfsHash': ipfs_hash,
-            'PinSize': 0,
-            'Timestamp': time.time(),
-            'simulated': True
-        }
-    
-    def _simulate_ipfs_json(self, data: dict) -> dict:
-        """Simulate IPFS JSON upload"""
-        import hashlib
-        import time
-        
-        content = json.dumps(data) + str(time.time())
-        ipfs_hash = 'Qm' + hashlib.sha256(content.encode()).hexdigest()[:44]
-        
+        return (self._api_url or os.environ.get('PINATA_API_URL', 'https://api.pinata.cloud')).rstrip('/')
+
+    @property
+    def upload_url(self) -> str:
+        return f"{self.api_url}/pinning/pinFileToIPFS"
+
+    @property
+    def json_url(self) -> str:
+        return f"{self.api_url}/pinning/pinJSONToIPFS"
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.pinata_jwt or self.pinata_api_key)
+
+    def _headers(self) -> Dict[str, str]:
+        if self.pinata_jwt:
+            return {'Authorization': f'Bearer {self.pinata_jwt}'}
         return {
-            'IpfsHash': ipfs_hash,
-            'PinSize': 0,
-            'Timestamp': time.time(),
-            'simulated': True
+            'pinata_api_key': self.pinata_api_key,
+            'pinata_secret_api_key': self.pinata_secret_key
         }
-    
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self._headers()
+            )
+        return self._session
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def _post(self, url: str, build_body) -> Dict[str, Any]:
+        """POST with retries.
+
+        build_body() returns (request kwargs, files to close) and is called
+        for every attempt, because a streamed body can only be sent once.
+        """
+        return await self._request('POST', url, build_body)
+
+    async def _request(self, method: str, url: str, build_body, ok_statuses=(200,)) -> Any:
+        last_error = None
+        for attempt in range(self.retries + 1):
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                body, handles = build_body()
+                try:
+                    async with self._get_session().request(method, url, **body) as response:
+                        if response.status in ok_statuses:
+                            text = await response.text()
+                            return json.loads(text) if text.lstrip().startswith(('{', '[')) else text
+                        text = await response.text()
+                        last_error = IPFSError(f"Pinata returned HTTP {response.status}: {text[:200]}")
+                        if response.status not in RETRY_STATUSES:
+                            break
+                        retry_after = response.headers.get('Retry-After')
+                finally:
+                    for handle in handles:
+                        handle.close()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = IPFSError(f"Pinata request failed: {e!r}")
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._delay(attempt, retry_after))
+        self.stats["failures"] += 1
+        raise last_error
+
+    async def pin_file(self, file_path: str, file_name: str) -> Dict[str, Any]:
+        """Pin a file from disk, raising IPFSError when Pinata keeps failing"""
+        def build_body():
+            handle = open(file_path, 'rb')
+            form = aiohttp.FormData()
+            form.add_field('file', handle, filename=file_name, content_type='application/octet-stream')
+            form.add_field('pinataMetadata', json.dumps({'name': file_name}))
+            return {'data': form}, [handle]
+
+        return await self._post(self.upload_url, build_body)
+
+    async def pin_json(self, data: dict) -> Dict[str, Any]:
+        """Pin a JSON document, raising IPFSError when Pinata keeps failing"""
+        return await self._post(self.json_url, lambda: ({'json': data}, []))
+
+    async def unpin(self, ipfs_hash: str) -> None:
+        """Remove our pin on a CID; a CID we no longer pin counts as done"""
+        await self._request('DELETE', f"{self.api_url}/pinning/unpin/{ipfs_hash}", lambda: ({}, []),
+                            ok_statuses=(200, 404))
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
     def get_gateway_url(self, ipfs_hash: str) -> str:
         """Get IPFS gateway URL"""
         return f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
 
 # Initialize IPFS service
-ipfs_service = IPFSService()
\ No newline at end of file
+ipfs_service = IPFSService()
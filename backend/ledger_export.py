@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import HTTPException
+
+EXPORT_BATCH_SIZE = 500
+
+# Exportable ledger collections: CSV columns and the field the `type` filter applies to
+EXPORT_COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "transactions": {
+        "columns": ["id", "tx_hash", "type", "project_id", "timestamp", "block_number", "verified", "details"],
+        "type_field": "type"
+    },
+    "expenditures": {
+        "columns": ["id", "project_id", "milestone_id", "amount", "category", "description",
+                    "recipient", "tx_hash", "timestamp", "verified"],
+        "type_field": "category"
+    },
+    "fund_allocations": {
+        "columns": ["id", "project_id", "amount", "allocated_by", "purpose", "tx_hash", "timestamp"],
+        "type_field": None
+    }
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+class LedgerExporter:
+    """Stream ledger collections as NDJSON or CSV straight from a Mongo cursor"""
+
+    @staticmethod
+    def build_query(
+        collection: str,
+        project_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the Mongo filter for an export request"""
+        if collection not in EXPORT_COLLECTIONS:
+            raise HTTPException(status_code=404, detail=f"Unknown export collection: {collection}")
+
+        query: Dict[str, Any] = {}
+        if project_id:
+            query["project_id"] = project_id
+
+        time_range = {}
+        if start:
+            time_range["$gte"] = LedgerExporter._as_utc(start)
+        if end:
+            time_range["$lt"] = LedgerExporter._as_utc(end)
+        if time_range:
+            # Rows the datetime migration has not reached yet still hold
+            # isoformat() strings, which sort chronologically as strings
+            iso_range = {op: bound.isoformat() for op, bound in time_range.items()}
+            query["$or"] = [{"timestamp": time_range}, {"timestamp": iso_range}]
+
+        if type:
+            type_field = EXPORT_COLLECTIONS[collection]["type_field"]
+            if not type_field:
+                raise HTTPException(status_code=400, detail=f"{collection} cannot be filtered by type")
+            query[type_field] = type
+
+        return query
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """Treat naive datetimes as UTC, matching how timestamps are written"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    async def stream(
+        self,
+        db,
+        collection: str,
+        query: Dict[str, Any],
+        format: str = "ndjson"
+    ) -> AsyncIterator[str]:
+        """Yield the export one row at a time; memory stays bounded by the cursor batch"""
+        cursor = db[collection].find(query, {"_id": 0}).sort(
+            [("timestamp", 1), ("id", 1)]
+        ).batch_size(EXPORT_BATCH_SIZE)
+
+        if format == "csv":
+            columns = EXPORT_COLLECTIONS[collection]["columns"]
+            yield self._csv_row(columns)
+            async for doc in cursor:
+                yield self._csv_row([self._csv_value(doc.get(column)) for column in columns])
+        else:
+            async for doc in cursor:
+                yield json.dumps(doc, default=str) + "\n"
+
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return "" if value is None else value
+
+    @staticmethod
+    def _csv_row(values: List[Any]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
+ledger_exporter = LedgerExporter()
@@ -0,0 +1,71 @@
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+from bson import json_util
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    """Encode the (sort value, id) of the last row into an opaque cursor"""
+    raw = json_util.dumps([sort_value, doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def keyset_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page ordered by (sort_field, id) using keyset pagination.
+
+    The cursor seeks directly to the last row of the previous page, so every
+    page is a bounded index range scan no matter how deep the client goes.
+    """
+    direction = -1 if descending else 1
+    query = seek_query(query, sort_field, cursor, descending)
+    docs = await collection.find(query, {"_id": 0}).sort(
+        [(sort_field, direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    return trim_page(docs, sort_field, limit)
+
+def seek_query(
+    query: Dict[str, Any],
+    sort_field: str,
+    cursor: Optional[str],
+    descending: bool = True
+) -> Dict[str, Any]:
+    """Add the keyset condition for `cursor` to a find/$match filter"""
+    if not cursor:
+        return query
+    op = "$lt" if descending else "$gt"
+    sort_value, last_id = decode_cursor(cursor)
+    seek = {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, "id": {op: last_id}}
+    ]}
+    return {"$and": [query, seek]} if query else seek
+
+def trim_page(
+    docs: List[Dict[str, Any]],
+    sort_field: str,
+    limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Cut a `limit + 1` fetch down to one page and the cursor for the next"""
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor(last.get(sort_field), last["id"])
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from datetime_codec import utcnow
+from ipfs_service import IPFSService, IPFSError
+
+logger = logging.getLogger(__name__)
+
+class PinQueue:
+    """Mongo-backed queue that pins stored uploads to IPFS in the background.
+
+    The queue is the `blobs` collection. A blob with `pin_status: pending`
+    and a due `next_attempt_at` is claimed by setting a lease with
+    find_one_and_update, so several workers (and processes) never pin the
+    same blob twice. A worker that dies leaves its lease to expire and the
+    blob is picked up again. Failures back off exponentially with jitter.
+    After `max_attempts` the blob and its documents are marked failed. On
+    success every document pointing at the blob gets the ipfs_hash, and the
+    local copy is removed.
+    """
+
+    def __init__(
+        self,
+        ipfs: IPFSService,
+        concurrency: int = 4,
+        lease_seconds: float = 300.0,
+        poll_interval: float = 10.0,
+        max_attempts: int = 8,
+        retry_base: float = 15.0,
+        retry_max: float = 3600.0
+    ):
+        self.ipfs = ipfs
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self.metrics: Dict[str, Any] = {"running": False, "pinned": 0, "retried": 0, "failed": 0,
+                                        "last_error": None}
+
+    def notify(self) -> None:
+        """Wake idle workers; called after a new blob is queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def claim(self, db) -> Optional[Dict[str, Any]]:
+        now = utcnow()
+        return await db.blobs.find_one_and_update(
+            {
+                "pin_status": "pending",
+                "refcount": {"$gt": 0},
+                "next_attempt_at": {"$lte": now},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+            },
+            {"$set": {"lease_until": now + timedelta(seconds=self.lease_seconds), "lease_owner": self.worker_id}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def process(self, db, blob: Dict[str, Any]) -> str:
+        """Pin one claimed blob and record the outcome; returns the new pin_status"""
+        owned = {"_id": blob["_id"], "lease_owner": self.worker_id}
+        attempts = blob.get("attempts", 0) + 1
+        local_path = blob.get("local_path")
+        if not local_path:
+            # e.g. a blob rebuilt from documents that were never pinned
+            return await self._give_up(db, owned, attempts, "No local copy to pin")
+        try:
+            result = await self.ipfs.pin_file(local_path, blob.get("file_name") or blob["_id"])
+        except OSError as e:
+            # Missing or unreadable local copy: retrying cannot help
+            return await self._give_up(db, owned, attempts, f"Local copy unreadable: {e}")
+        except IPFSError as e:
+            self.metrics["last_error"] = str(e)
+            if attempts >= self.max_attempts:
+                return await self._give_up(db, owned, attempts, str(e))
+
+            delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self.metrics["retried"] += 1
+            await db.blobs.update_one(owned, {
+                "$set": {"attempts": attempts, "pin_error": str(e),
+                         "next_attempt_at": utcnow() + timedelta(seconds=delay)},
+                "$unset": {"lease_until": "", "lease_owner": ""}
+            })
+            logger.warning(f"Pinning blob {blob['_id']} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            return "pending"
+
+        ipfs_hash = result["IpfsHash"]
+        pinned_at = utcnow()
+        await db.blobs.update_one(owned, {
+            "$set": {"pin_status": "pinned", "ipfs_hash": ipfs_hash, "pinned_at": pinned_at},
+            "$unset": {"lease_until": "", "lease_owner": "", "pin_error": "", "local_path": ""}
+        })
+        await db.documents.update_many({"file_hash": blob["_id"]}, {
+            "$set": {"pin_status": "pinned", "ipfs_hash": ipfs_hash,
+                     "ipfs_url": self.ipfs.get_gateway_url(ipfs_hash), "pinned_at": pinned_at},
+            "$unset": {"pin_error": ""}
+        })
+        try:
+            os.remove(local_path)
+        except OSError:
+            pass
+        self.metrics["pinned"] += 1
+        return "pinned"
+
+    async def _give_up(self, db, owned: Dict[str, Any], attempts: int, error: str) -> str:
+        """Mark a blob and its documents failed; a later duplicate upload can requeue it"""
+        self.metrics["failed"] += 1
+        self.metrics["last_error"] = error
+        await db.blobs.update_one(owned, {
+            "$set": {"pin_status": "failed", "attempts": attempts, "pin_error": error},
+            "$unset": {"lease_until": "", "lease_owner": ""}
+        })
+        await db.documents.update_many(
+            {"file_hash": owned["_id"]}, {"$set": {"pin_status": "failed", "pin_error": error}}
+        )
+        logger.error(f"Giving up pinning blob {owned['_id']}: {error}")
+        return "failed"
+
+    async def requeue(self, db, file_hash: str, local_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Give a failed blob a fresh set of attempts, optionally from a new local copy"""
+        update = {"pin_status": "pending", "attempts": 0, "next_attempt_at": utcnow()}
+        if local_path:
+            update["local_path"] = local_path
+        blob = await db.blobs.find_one_and_update(
+            {"_id": file_hash, "pin_status": "failed"},
+            {"$set": update},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob:
+            await db.documents.update_many({"file_hash": file_hash}, {"$set": {"pin_status": "pending"}})
+            self.notify()
+        return blob
+
+    async def stats(self, db) -> Dict[str, Any]:
+        counts = {row["_id"]: row["n"] async for row in db.blobs.aggregate([
+            {"$group": {"_id": "$pin_status", "n": {"$sum": 1}}}
+        ])}
+        return {**self.metrics, "worker_id": self.worker_id, "concurrency": self.concurrency,
+                "blobs_by_status": counts}
+
+    def start(self, db) -> None:
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._run(db)) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _run(self, db) -> None:
+        self.metrics["running"] = True
+        try:
+            while True:
+                try:
+                    blob = await self.claim(db)
+                    if blob is not None:
+                        await self.process(db, blob)
+                        continue
+                except Exception as e:
+                    # The lease expires and another pass picks the blob up
+                    self.metrics["last_error"] = str(e)
+                    logger.error(f"Pin queue worker error: {e}")
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.metrics["running"] = False
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+class ProcessingPool:
+    """Run CPU-bound document work (EXIF, PIL, hashing) off the event loop.
+
+    Work goes to a thread or process pool. At most `workers + max_queue`
+    tasks are admitted at a time. Past that, `run` raises PoolSaturated
+    immediately so the API can shed load with a 503 instead of letting
+    requests pile up. Queue wait and run time are recorded per task name.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self.active = 0
+        self.rejected = 0
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="documents")
+        return self._executor
+
+    async def run(self, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in the pool, or raise PoolSaturated when over capacity"""
+        if self.active >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(f"Document processing queue is full ({self.active} tasks)")
+
+        self.active += 1
+        submitted = time.perf_counter()
+        started = submitted
+        try:
+            if self.kind == "thread":
+                def timed():
+                    nonlocal started
+                    started = time.perf_counter()
+                    return fn(*args)
+                return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+            # Process workers cannot report their start time back cheaply
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.active -= 1
+            self._record(name, started - submitted, time.perf_counter() - started)
+
+    def _record(self, name: str, waited: float, ran: float) -> None:
+        stats = self.timings.setdefault(name, {"count": 0, "wait_ms": 0.0, "run_ms": 0.0, "max_run_ms": 0.0})
+        stats["count"] += 1
+        stats["wait_ms"] += waited * 1000
+        stats["run_ms"] += ran * 1000
+        stats["max_run_ms"] = max(stats["max_run_ms"], ran * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "rejected": self.rejected,
+            "tasks": {
+                name: {
+                    "count": t["count"],
+                    "avg_wait_ms": round(t["wait_ms"] / t["count"], 2),
+                    "avg_run_ms": round(t["run_ms"] / t["count"], 2),
+                    "max_run_ms": round(t["max_run_ms"], 2)
+                }
+                for name, t in self.timings.items()
+            }
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
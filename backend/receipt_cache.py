@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from chain_client import ChainClient, RPCError, hex_to_int
+from chain_head import ChainHeadTracker
+from datetime_codec import utcnow
+from pymongo import UpdateMany, UpdateOne
+
+EXPLORER_TX_URL = "https://mumbai.polygonscan.com/tx/{}"
+
+def format_receipt(tx_hash: str, receipt: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a raw JSON-RPC receipt into the /api/verify response"""
+    return {
+        "verified": True,
+        "tx_hash": tx_hash,
+        "block_number": hex_to_int(receipt['blockNumber']),
+        "from": receipt['from'],
+        "to": receipt['to'],
+        "status": hex_to_int(receipt['status']),
+        "gas_used": hex_to_int(receipt['gasUsed']),
+        "explorer_url": EXPLORER_TX_URL.format(tx_hash)
+    }
+
+class ReceiptCache:
+    """Two-tier cache of transaction receipts: in-process LRU plus Mongo.
+
+    A receipt that is `finality_blocks` deep can no longer change, so it is
+    kept forever in the `receipts` collection and the LRU. Pending or unknown
+    hashes are only cached in-process for `negative_ttl` seconds, so they get
+    re-checked soon.
+    """
+
+    def __init__(
+        self,
+        chain: ChainClient,
+        max_entries: int = 10000,
+        negative_ttl: float = 15.0,
+        finality_blocks: int = 128,
+        head: Optional[ChainHeadTracker] = None
+    ):
+        self.chain = chain
+        self.head = head
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.finality_blocks = finality_blocks
+        self._entries: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], Optional[float]]]" = OrderedDict()
+        self.hits = {"memory": 0, "mongo": 0, "rpc": 0}
+
+    def _get_local(self, tx_hash: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        entry = self._entries.get(tx_hash)
+        if entry is None:
+            return False, None
+        result, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[tx_hash]
+            return False, None
+        self._entries.move_to_end(tx_hash)
+        return True, result
+
+    def _put_local(self, tx_hash: str, result: Optional[Dict[str, Any]], ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[tx_hash] = (result, expires_at)
+        self._entries.move_to_end(tx_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def lookup(self, db, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the verification result for tx_hash, or None if not on chain yet"""
+        key = tx_hash.lower()
+        found, result = self._get_local(key)
+        if found:
+            self.hits["memory"] += 1
+            return result
+
+        stored = await db.receipts.find_one({"_id": key})
+        if stored:
+            self.hits["mongo"] += 1
+            result = stored["result"]
+            self._put_local(key, result, None)
+            return result
+
+        self.hits["rpc"] += 1
+        tx, receipt, head = await asyncio.gather(
+            self.chain.get_transaction(tx_hash),
+            self.chain.get_transaction_receipt(tx_hash),
+            self.latest_block()
+        )
+        result, final = self._resolve(tx_hash, tx, receipt, head)
+        if final:
+            await self.store_final(db, [result])
+        return result
+
+    async def latest_block(self) -> int:
+        if self.head is not None:
+            return await self.head.latest()
+        return await self.chain.block_number()
+
+    def _resolve(self, tx_hash: str, tx, receipt, head: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Cache an RPC answer locally and report whether it is final"""
+        key = tx_hash.lower()
+        if not tx or not receipt or receipt.get("blockNumber") is None:
+            self._put_local(key, None, self.negative_ttl)
+            return None, False
+
+        result = format_receipt(tx_hash, receipt)
+        final = head - result["block_number"] >= self.finality_blocks
+        self._put_local(key, result, None if final else self.negative_ttl)
+        return result, final
+
+    async def lookup_many(self, db, tx_hashes: List[str]) -> Dict[str, Any]:
+        """Resolve many hashes at once: one Mongo $in query, then JSON-RPC batches.
+
+        Returns tx_hash -> result dict, None when not on chain, or an RPCError
+        when that hash's lookup failed. Hashes differing only in case are
+        looked up once and each gets the result.
+        """
+        results: Dict[str, Any] = {}
+        # Lowercase key -> the caller's spellings of it
+        missing: Dict[str, List[str]] = {}
+        for tx_hash in tx_hashes:
+            key = tx_hash.lower()
+            found, result = self._get_local(key)
+            if found:
+                self.hits["memory"] += 1
+                results[tx_hash] = result
+            else:
+                missing.setdefault(key, []).append(tx_hash)
+
+        if missing:
+            async for stored in db.receipts.find({"_id": {"$in": list(missing)}}):
+                self.hits["mongo"] += 1
+                self._put_local(stored["_id"], stored["result"], None)
+                for tx_hash in missing.pop(stored["_id"]):
+                    results[tx_hash] = stored["result"]
+
+        if not missing:
+            return results
+
+        self.hits["rpc"] += len(missing)
+        pending = list(missing.values())
+        calls = []
+        for spellings in pending:
+            calls.append(("eth_getTransactionByHash", [spellings[0]]))
+            calls.append(("eth_getTransactionReceipt", [spellings[0]]))
+        responses, head = await asyncio.gather(self.chain.batch_request(calls), self.latest_block())
+
+        finalized = []
+        for index, spellings in enumerate(pending):
+            tx, receipt = responses[2 * index], responses[2 * index + 1]
+            if isinstance(tx, RPCError) or isinstance(receipt, RPCError):
+                result = tx if isinstance(tx, RPCError) else receipt
+            else:
+                result, final = self._resolve(spellings[0], tx, receipt, head)
+                if final:
+                    finalized.append(result)
+            for tx_hash in spellings:
+                results[tx_hash] = result
+
+        if finalized:
+            await self.store_final(db, finalized)
+        return results
+
+    async def store_final(self, db, results: List[Dict[str, Any]]) -> None:
+        """Persist finalized receipts and backfill the matching transactions"""
+        stored_at = utcnow()
+        await db.receipts.bulk_write([
+            UpdateOne(
+                {"_id": result["tx_hash"].lower()},
+                {"$setOnInsert": {"result": result, "stored_at": stored_at}},
+                upsert=True
+            )
+            for result in results
+        ], ordered=False)
+        # Transactions are recorded lowercase; older records kept the caller's casing
+        await db.transactions.bulk_write([
+            UpdateMany(
+                {"tx_hash": {"$in": list({result["tx_hash"], result["tx_hash"].lower()})}},
+                {"$set": {
+                    "block_number": result["block_number"],
+                    "verified": result["status"] == 1,
+                    "chain_status": "confirmed" if result["status"] == 1 else "failed"
+                }}
+            )
+            for result in results
+        ], ordered=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": dict(self.hits)}
@@ -0,0 +1,192 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import aiohttp
+
+class RPCEndpointError(Exception):
+    """One endpoint failed at the HTTP level"""
+
+class RPCEndpoint:
+    """Rolling health statistics for one JSON-RPC URL"""
+
+    def __init__(self, url: str, window: int = 50, alpha: float = 0.2):
+        self.url = url
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def cooling_down(self) -> bool:
+        return self.cooldown_until > time.monotonic()
+
+    def score(self) -> float:
+        """Lower is healthier: expected latency inflated by recent errors"""
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + 10 * self.error_rate) + 0.01 * self.in_flight
+
+    def record_success(self, elapsed: float) -> None:
+        self.latency = elapsed if self.latency is None else self.alpha * elapsed + (1 - self.alpha) * self.latency
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_abandoned(self, elapsed: float) -> None:
+        """A cancelled attempt that was overtaken by a later hedge or timed out.
+
+        Its elapsed time is a lower bound on the real latency, so it is only
+        folded in when it makes the endpoint look slower.
+        """
+        if self.latency is None or elapsed > self.latency:
+            self.latency = elapsed if self.latency is None else self.alpha * elapsed + (1 - self.alpha) * self.latency
+
+    def record_failure(self, cooldown_after: int, cooldown: float) -> None:
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= cooldown_after:
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "score": round(self.score(), 4),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": self.cooling_down
+        }
+
+class RPCProviderPool:
+    """Health-scored routing across several JSON-RPC endpoints.
+
+    Each call goes to the endpoint with the best score. An endpoint that keeps
+    failing is benched for `cooldown` seconds. If the first endpoint has not
+    answered within the hedge delay, the same payload is also sent to the next
+    endpoint and the first success wins. HTTP-level failures fail over to the
+    next endpoint until one succeeds or all have been tried.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        hedge_delay: Optional[float] = None,
+        min_hedge_delay: float = 0.05,
+        cooldown_after: int = 3,
+        cooldown: float = 30.0
+    ):
+        if not urls:
+            raise ValueError("RPCProviderPool needs at least one URL")
+        self.endpoints = [RPCEndpoint(url) for url in urls]
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.cooldown_after = cooldown_after
+        self.cooldown = cooldown
+        self.hedges = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[RPCEndpoint]:
+        return sorted(self.endpoints, key=lambda ep: (ep.cooling_down, ep.score()))
+
+    def _hedge_after(self, endpoint: RPCEndpoint) -> Optional[float]:
+        if len(self.endpoints) < 2:
+            return None
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if endpoint.latency is None:
+            return None
+        return max(self.min_hedge_delay, 3 * endpoint.latency)
+
+    async def _attempt(self, session: aiohttp.ClientSession, endpoint: RPCEndpoint, payload: Any) -> Any:
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        started = time.monotonic()
+        try:
+            async with session.post(endpoint.url, json=payload) as response:
+                if response.status != 200:
+                    raise RPCEndpointError(f"{endpoint.url} returned HTTP {response.status}")
+                body = await response.json(content_type=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            endpoint.record_failure(self.cooldown_after, self.cooldown)
+            if isinstance(e, RPCEndpointError):
+                raise
+            raise RPCEndpointError(f"{endpoint.url} failed: {e}")
+        finally:
+            endpoint.in_flight -= 1
+        endpoint.record_success(time.monotonic() - started)
+        return body
+
+    async def post(self, session: aiohttp.ClientSession, payload: Any) -> Any:
+        """Send a JSON-RPC payload (single or batch) and return the decoded body"""
+        candidates = iter(self.ranked())
+        primary = next(candidates)
+        # task -> (endpoint, start time), to judge attempts cancelled below
+        attempts: Dict[asyncio.Future, Any] = {}
+
+        def launch(endpoint: RPCEndpoint) -> asyncio.Future:
+            task = asyncio.ensure_future(self._attempt(session, endpoint, payload))
+            attempts[task] = (endpoint, time.monotonic())
+            return task
+
+        pending = {launch(primary)}
+        hedge_after = self._hedge_after(primary)
+        last_error: Optional[Exception] = None
+        winner_started: Optional[float] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Primary is slow: hedge once to the next endpoint
+                    hedge_after = None
+                    backup = next(candidates, None)
+                    if backup is not None:
+                        self.hedges += 1
+                        pending.add(launch(backup))
+                    continue
+
+                for task in done:
+                    if task.exception() is None:
+                        winner_started = attempts[task][1]
+                        return task.result()
+                    last_error = task.exception()
+
+                if not pending:
+                    backup = next(candidates, None)
+                    if backup is not None:
+                        self.failovers += 1
+                        hedge_after = None
+                        pending.add(launch(backup))
+        finally:
+            now = time.monotonic()
+            for task in pending:
+                task.cancel()
+                endpoint, started = attempts[task]
+                # A hedge that merely lost to the earlier attempt is not slow. One
+                # overtaken by a later hedge, or cut off by the caller, is.
+                if winner_started is None or started <= winner_started:
+                    endpoint.record_abandoned(now - started)
+
+        raise last_error or RPCEndpointError("No RPC endpoint available")
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "hedge_delay": self.hedge_delay,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "endpoints": [endpoint.state() for endpoint in self.ranked()]
+        }
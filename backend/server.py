@@ -1,39 +1,140 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Query, Response, Header, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import StreamingResponse, JSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 import os
 import logging
+import asyncio
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
-from web3 import Web3
 import json
 import shutil
+from contextlib import asynccontextmanager
 from ipfs_service import ipfs_service
 from document_processor import document_processor
+from upload_storage import UploadStore, UploadTooLarge
+from processing_pool import ProcessingPool, PoolSaturated
+from stats_service import stats_service
+from blob_store import blob_store
+from pin_queue import PinQueue
+from thumbnails import ThumbnailCache, ThumbnailStore, render_thumbnails, variant_name, THUMBNAIL_SIZES, THUMBNAIL_FORMATS
+from datetime_codec import MongoModel, utcnow, datetime_migration
+from chain_client import ChainClient, RPCError, RPCTimeout
+from chain_head import ChainHeadTracker
+from receipt_cache import ReceiptCache
+from chain_indexer import ChainIndexer
+from single_flight import SingleFlight
+from event_indexer import build_event_indexer, reconcile
+from pagination import keyset_page, trim_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from approvals import pending_approvals_pipeline, ReviewerScheduler
+from approval_events import ApprovalEventBus, assignment_event, decision_event
+from ledger_export import ledger_exporter, EXPORT_FORMATS
+from indexes import ensure_indexes, index_report
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
-# Web3 connection to Polygon Mumbai
+# Non-blocking JSON-RPC connection to Polygon Mumbai
+# POLYGON_RPC_URLS takes a comma-separated list of endpoints for failover
 POLYGON_RPC = os.environ.get('POLYGON_RPC_URL', 'https://rpc-mumbai.maticvigil.com')
-w3 = Web3(Web3.HTTPProvider(POLYGON_RPC))
+POLYGON_RPC_URLS = os.environ.get('POLYGON_RPC_URLS', POLYGON_RPC)
+RPC_HEDGE_DELAY = os.environ.get('RPC_HEDGE_DELAY_SECONDS')
+chain_client = ChainClient(
+    POLYGON_RPC_URLS,
+    timeout=float(os.environ.get('RPC_TIMEOUT_SECONDS', '10')),
+    max_concurrency=int(os.environ.get('RPC_MAX_CONCURRENCY', '16')),
+    batch_size=int(os.environ.get('RPC_BATCH_SIZE', '100')),
+    hedge_delay=float(RPC_HEDGE_DELAY) if RPC_HEDGE_DELAY else None
+)
+chain_head = ChainHeadTracker(
+    chain_client,
+    refresh_interval=float(os.environ.get('CHAIN_HEAD_REFRESH_SECONDS', '5')),
+    max_age=float(os.environ.get('CHAIN_HEAD_MAX_AGE_SECONDS', '30'))
+)
+receipt_cache = ReceiptCache(
+    chain_client,
+    max_entries=int(os.environ.get('RECEIPT_CACHE_SIZE', '10000')),
+    negative_ttl=float(os.environ.get('RECEIPT_NEGATIVE_TTL_SECONDS', '15')),
+    finality_blocks=int(os.environ.get('RECEIPT_FINALITY_BLOCKS', '128')),
+    head=chain_head
+)
+chain_indexer = ChainIndexer(
+    receipt_cache,
+    batch_size=int(os.environ.get('INDEXER_BATCH_SIZE', '100')),
+    concurrency=int(os.environ.get('INDEXER_CONCURRENCY', '2')),
+    idle_interval=float(os.environ.get('INDEXER_INTERVAL_SECONDS', '15')),
+    block_time=float(os.environ.get('CHAIN_BLOCK_TIME_SECONDS', '2'))
+)
+event_indexer = build_event_indexer(chain_client, chain_head)
+
+# Concurrent requests for the same key share one upstream lookup
+verify_flight = SingleFlight("verify")
+project_flight = SingleFlight("project")
+
+# REVIEWER_CAPACITY caps concurrent reviews per authority (0 = unlimited)
+reviewer_scheduler = ReviewerScheduler(capacity=int(os.environ.get('REVIEWER_CAPACITY', '0')) or None)
+
+# Approval queue push events. APPROVAL_EVENTS_SOURCE=change_stream takes them
+# from a Mongo change stream (replica set required) instead of this process.
+APPROVAL_EVENTS_SOURCE = os.environ.get('APPROVAL_EVENTS_SOURCE', 'local')
+APPROVAL_EVENTS_HEARTBEAT = float(os.environ.get('APPROVAL_EVENTS_HEARTBEAT_SECONDS', '15'))
+approval_events = ApprovalEventBus()
+
+# Uploads are streamed to disk; MAX_UPLOAD_BYTES caps a single file
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(200 * 1024 * 1024)))
+# Allowance for multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Batch uploads: whole-request cap, file count and files processed at once
+MAX_BATCH_UPLOAD_BYTES = int(os.environ.get('MAX_BATCH_UPLOAD_BYTES', str(1024 * 1024 * 1024)))
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', '100'))
+BATCH_UPLOAD_CONCURRENCY = int(os.environ.get('BATCH_UPLOAD_CONCURRENCY', '4'))
+upload_store = UploadStore(
+    Path(os.environ.get('UPLOADS_DIR', '/app/backend/uploads')),
+    max_bytes=MAX_UPLOAD_BYTES,
+    chunk_size=int(os.environ.get('UPLOAD_CHUNK_BYTES', str(1024 * 1024)))
+)
+
+# Background IPFS pinning of stored uploads
+pin_queue = PinQueue(
+    ipfs_service,
+    concurrency=int(os.environ.get('PIN_WORKERS', '4')),
+    max_attempts=int(os.environ.get('PIN_MAX_ATTEMPTS', '8')),
+    poll_interval=float(os.environ.get('PIN_POLL_SECONDS', '10'))
+)
+BLOB_SWEEP_INTERVAL = float(os.environ.get('BLOB_SWEEP_INTERVAL_SECONDS', str(6 * 3600)))
+BLOB_ORPHAN_GRACE = float(os.environ.get('BLOB_ORPHAN_GRACE_SECONDS', str(7 * 24 * 3600)))
+
+# Photo thumbnails: stored in Mongo, served through a size-bounded disk cache
+thumbnail_store = ThumbnailStore(ThumbnailCache(
+    Path(os.environ.get('THUMBNAIL_CACHE_DIR', str(upload_store.uploads_dir / 'thumbnails'))),
+    max_bytes=int(os.environ.get('THUMBNAIL_CACHE_BYTES', str(256 * 1024 * 1024)))
+))
+# Content-addressed, so safe to cache for a year
+THUMBNAIL_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# EXIF/PIL work runs here instead of on the event loop
+processing_pool = ProcessingPool(
+    kind=os.environ.get('DOCUMENT_POOL_KIND', 'thread'),
+    workers=int(os.environ.get('DOCUMENT_POOL_WORKERS', str(os.cpu_count() or 4))),
+    max_queue=int(os.environ.get('DOCUMENT_POOL_QUEUE', '32'))
+)
 
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 # Models
-class Project(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+class Project(MongoModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     description: str
@@ -50,7 +151,7 @@ class Project(BaseModel):
     approved_at: Optional[datetime] = None
     reviewer_id: Optional[str] = None
     rejection_reason: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
     tx_hash: Optional[str] = None
     contract_project_id: Optional[int] = None
 
@@ -65,15 +166,14 @@ class ProjectCreate(BaseModel):
     tx_hash: Optional[str] = None
     contract_project_id: Optional[int] = None
 
-class FundAllocation(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+class FundAllocation(MongoModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     project_id: str
     amount: float
     allocated_by: str
     purpose: str
     tx_hash: str
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: datetime = Field(default_factory=utcnow)
 
 class FundAllocationCreate(BaseModel):
     project_id: str
@@ -82,8 +182,7 @@ class FundAllocationCreate(BaseModel):
     purpose: str
     tx_hash: str
 
-class Milestone(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+class Milestone(MongoModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     project_id: str
     name: str
@@ -93,7 +192,7 @@ class Milestone(BaseModel):
     status: str = "Pending"  # Pending, InProgress, Completed
     completion_date: Optional[datetime] = None
     tx_hash: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class MilestoneCreate(BaseModel):
     project_id: str
@@ -107,8 +206,7 @@ class MilestoneUpdate(BaseModel):
     status: Optional[str] = None
     tx_hash: Optional[str] = None
 
-class Expenditure(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+class Expenditure(MongoModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     project_id: str
     milestone_id: Optional[str] = None
@@ -117,7 +215,7 @@ class Expenditure(BaseModel):
     description: str
     recipient: str
     tx_hash: str
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: datetime = Field(default_factory=utcnow)
     verified: bool = False
 
 class ExpenditureCreate(BaseModel):
@@ -129,16 +227,39 @@ class ExpenditureCreate(BaseModel):
     recipient: str
     tx_hash: str
 
-class Transaction(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+class Transaction(MongoModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     tx_hash: str
     type: str  # project_create, milestone_create, expenditure, fund_allocation
     project_id: Optional[str] = None
     details: dict
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: datetime = Field(default_factory=utcnow)
     block_number: Optional[int] = None
     verified: bool = False
+    chain_status: str = "pending"  # pending, confirmed, failed
+
+    # Hex casing varies by wallet; one spelling keeps the unique index meaningful
+    @field_validator('tx_hash')
+    @classmethod
+    def lowercase_tx_hash(cls, value: str) -> str:
+        return value.lower()
+
+# Timestamp fields converted from legacy ISO strings by the startup migration
+DATETIME_FIELDS = {
+    "projects": Project.datetime_fields(),
+    "milestones": Milestone.datetime_fields(),
+    "expenditures": Expenditure.datetime_fields(),
+    "fund_allocations": FundAllocation.datetime_fields(),
+    "transactions": Transaction.datetime_fields(),
+    "approval_requests": ["assigned_at", "reviewed_at"],
+    "authorities": ["joined_at"],
+    "documents": ["uploaded_at"]
+}
+
+MAX_VERIFY_BATCH = 500
+
+class VerifyBatchRequest(BaseModel):
+    tx_hashes: List[str] = Field(..., min_length=1, max_length=MAX_VERIFY_BATCH)
 
 # API Routes
 @api_router.get("/")
@@ -148,60 +269,90 @@ async def root():
 @api_router.get("/blockchain/status")
 async def blockchain_status():
     try:
-        is_connected = w3.is_connected()
-        latest_block = w3.eth.block_number if is_connected else None
+        latest_block = await chain_head.latest()
         return {
-            "connected": is_connected,
+            "connected": True,
             "network": "Polygon Mumbai",
             "latest_block": latest_block,
-            "rpc_url": POLYGON_RPC
+            "age_seconds": chain_head.snapshot()["age_seconds"],
+            "rpc_url": chain_client.pool.ranked()[0].url
         }
     except Exception as e:
         return {"connected": False, "error": str(e)}
 
+@asynccontextmanager
+async def recorded_transaction(tx_record: Optional[Transaction]):
+    """Record the transaction before the writes it describes.
+
+    tx_hash is unique, so a replayed request is refused with 409 before it
+    can insert or increment anything. If a later write fails, the record is
+    removed so that a retry can go through.
+    """
+    if tx_record is None:
+        yield
+        return
+    try:
+        await db.transactions.insert_one(tx_record.to_mongo())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Transaction {tx_record.tx_hash} is already recorded")
+    try:
+        yield
+    except BaseException:
+        await db.transactions.delete_one({"id": tx_record.id})
+        raise
+
 # Project endpoints
 @api_router.post("/projects", response_model=Project)
 async def create_project(input: ProjectCreate):
     project_dict = input.model_dump()
     project_obj = Project(**project_dict)
     
-    doc = project_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    if doc.get('completion_date'):
-        doc['completion_date'] = doc['completion_date'].isoformat()
-    
-    await db.projects.insert_one(doc)
+    doc = project_obj.to_mongo()
     
     # Record transaction
-    if input.tx_hash:
-        tx_record = Transaction(
-            tx_hash=input.tx_hash,
-            type="project_create",
-            project_id=project_obj.id,
-            details={"name": input.name, "budget": input.budget, "category": input.category}
-        )
-        tx_doc = tx_record.model_dump()
-        tx_doc['timestamp'] = tx_doc['timestamp'].isoformat()
-        await db.transactions.insert_one(tx_doc)
+    tx_record = Transaction(
+        tx_hash=input.tx_hash,
+        type="project_create",
+        project_id=project_obj.id,
+        details={"name": input.name, "budget": input.budget, "category": input.category}
+    ) if input.tx_hash else None
+    
+    async with recorded_transaction(tx_record):
+        await db.projects.insert_one(doc)
+    await stats_service.apply(
+        db,
+        global_inc={
+            "total_projects": 1,
+            "total_budget": project_obj.budget,
+            **stats_service.status_delta(None, project_obj.status)
+        },
+        project_category=project_obj.category,
+        project_category_inc={"budget": project_obj.budget}
+    )
     
     return project_obj
 
 @api_router.get("/projects", response_model=List[Project])
-async def get_projects():
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    for project in projects:
-        if isinstance(project['created_at'], str):
-            project['created_at'] = datetime.fromisoformat(project['created_at'])
-    return projects
+async def get_projects(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    projects, next_cursor = await keyset_page(
+        db.projects, {}, "created_at", limit, cursor, descending=False
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [Project.decode(project) for project in projects]
 
 @api_router.get("/projects/{project_id}", response_model=Project)
 async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    project = await project_flight.do(
+        project_id, lambda: db.projects.find_one({"id": project_id}, {"_id": 0})
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    if isinstance(project['created_at'], str):
-        project['created_at'] = datetime.fromisoformat(project['created_at'])
-    return project
+    return Project.decode(project)
 
 # Fund Allocation endpoints
 @api_router.post("/allocations", response_model=FundAllocation)
@@ -214,16 +365,7 @@ async def allocate_funds(input: FundAllocationCreate):
     allocation_dict = input.model_dump()
     allocation_obj = FundAllocation(**allocation_dict)
     
-    doc = allocation_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-    
-    await db.fund_allocations.insert_one(doc)
-    
-    # Update project allocated funds
-    await db.projects.update_one(
-        {"id": input.project_id},
-        {"$inc": {"allocated_funds": input.amount}}
-    )
+    doc = allocation_obj.to_mongo()
     
     # Record transaction
     tx_record = Transaction(
@@ -232,19 +374,23 @@ async def allocate_funds(input: FundAllocationCreate):
         project_id=input.project_id,
         details={"amount": input.amount, "purpose": input.purpose}
     )
-    tx_doc = tx_record.model_dump()
-    tx_doc['timestamp'] = tx_doc['timestamp'].isoformat()
-    await db.transactions.insert_one(tx_doc)
+    
+    async with recorded_transaction(tx_record):
+        await db.fund_allocations.insert_one(doc)
+    
+    # Update project allocated funds
+    await db.projects.update_one(
+        {"id": input.project_id},
+        {"$inc": {"allocated_funds": input.amount}}
+    )
+    await stats_service.apply(db, global_inc={"total_allocated": input.amount})
     
     return allocation_obj
 
 @api_router.get("/allocations/{project_id}", response_model=List[FundAllocation])
 async def get_project_allocations(project_id: str):
     allocations = await db.fund_allocations.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    for alloc in allocations:
-        if isinstance(alloc['timestamp'], str):
-            alloc['timestamp'] = datetime.fromisoformat(alloc['timestamp'])
-    return allocations
+    return [FundAllocation.decode(alloc) for alloc in allocations]
 
 # Milestone endpoints
 @api_router.post("/milestones", response_model=Milestone)
@@ -257,36 +403,32 @@ async def create_milestone(input: MilestoneCreate):
     milestone_dict = input.model_dump()
     milestone_obj = Milestone(**milestone_dict)
     
-    doc = milestone_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    if doc.get('completion_date'):
-        doc['completion_date'] = doc['completion_date'].isoformat()
-    
-    await db.milestones.insert_one(doc)
+    doc = milestone_obj.to_mongo()
     
     # Record transaction
-    if input.tx_hash:
-        tx_record = Transaction(
-            tx_hash=input.tx_hash,
-            type="milestone_create",
-            project_id=input.project_id,
-            details={"milestone_name": input.name, "target_amount": input.target_amount}
-        )
-        tx_doc = tx_record.model_dump()
-        tx_doc['timestamp'] = tx_doc['timestamp'].isoformat()
-        await db.transactions.insert_one(tx_doc)
+    tx_record = Transaction(
+        tx_hash=input.tx_hash,
+        type="milestone_create",
+        project_id=input.project_id,
+        details={"milestone_name": input.name, "target_amount": input.target_amount}
+    ) if input.tx_hash else None
+    
+    async with recorded_transaction(tx_record):
+        await db.milestones.insert_one(doc)
+    await stats_service.apply(
+        db,
+        global_inc={
+            "total_milestones": 1,
+            "completed_milestones": 1 if milestone_obj.status == "Completed" else 0
+        }
+    )
     
     return milestone_obj
 
 @api_router.get("/milestones/{project_id}", response_model=List[Milestone])
 async def get_project_milestones(project_id: str):
     milestones = await db.milestones.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    for milestone in milestones:
-        if isinstance(milestone['created_at'], str):
-            milestone['created_at'] = datetime.fromisoformat(milestone['created_at'])
-        if milestone.get('completion_date') and isinstance(milestone['completion_date'], str):
-            milestone['completion_date'] = datetime.fromisoformat(milestone['completion_date'])
-    return milestones
+    return [Milestone.decode(milestone) for milestone in milestones]
 
 @api_router.put("/milestones/{milestone_id}", response_model=Milestone)
 async def update_milestone(milestone_id: str, input: MilestoneUpdate):
@@ -297,10 +439,15 @@ async def update_milestone(milestone_id: str, input: MilestoneUpdate):
     update_data = {k: v for k, v in input.model_dump().items() if v is not None}
     
     if "status" in update_data and update_data["status"] == "Completed":
-        update_data["completion_date"] = datetime.now(timezone.utc).isoformat()
+        update_data["completion_date"] = utcnow()
     
     await db.milestones.update_one({"id": milestone_id}, {"$set": update_data})
     
+    was_completed = milestone.get("status") == "Completed"
+    is_completed = update_data.get("status", milestone.get("status")) == "Completed"
+    if was_completed != is_completed:
+        await stats_service.apply(db, global_inc={"completed_milestones": 1 if is_completed else -1})
+    
     # Update project spent funds
     if "spent_amount" in update_data:
         project = await db.projects.find_one({"id": milestone["project_id"]})
@@ -312,14 +459,15 @@ async def update_milestone(milestone_id: str, input: MilestoneUpdate):
                 {"id": milestone["project_id"]},
                 {"$inc": {"spent_funds": diff}}
             )
+            await stats_service.apply(
+                db,
+                global_inc={"total_spent": diff},
+                project_category=project.get("category"),
+                project_category_inc={"spent": diff}
+            )
     
     updated_milestone = await db.milestones.find_one({"id": milestone_id}, {"_id": 0})
-    if isinstance(updated_milestone['created_at'], str):
-        updated_milestone['created_at'] = datetime.fromisoformat(updated_milestone['created_at'])
-    if updated_milestone.get('completion_date') and isinstance(updated_milestone['completion_date'], str):
-        updated_milestone['completion_date'] = datetime.fromisoformat(updated_milestone['completion_date'])
-    
-    return updated_milestone
+    return Milestone.decode(updated_milestone)
 
 # Expenditure endpoints
 @api_router.post("/expenditures", response_model=Expenditure)
@@ -332,16 +480,37 @@ async def create_expenditure(input: ExpenditureCreate):
     expenditure_dict = input.model_dump()
     expenditure_obj = Expenditure(**expenditure_dict)
     
-    doc = expenditure_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
+    doc = expenditure_obj.to_mongo()
     
-    await db.expenditures.insert_one(doc)
+    # Record transaction
+    tx_record = Transaction(
+        tx_hash=input.tx_hash,
+        type="expenditure",
+        project_id=input.project_id,
+        details={
+            "amount": input.amount,
+            "category": input.category,
+            "description": input.description,
+            "recipient": input.recipient
+        }
+    )
+    
+    async with recorded_transaction(tx_record):
+        await db.expenditures.insert_one(doc)
     
     # Update project spent funds
     await db.projects.update_one(
         {"id": input.project_id},
         {"$inc": {"spent_funds": input.amount}}
     )
+    await stats_service.apply(
+        db,
+        global_inc={"total_expenditures": 1, "total_spent": input.amount},
+        project_category=project.get("category"),
+        project_category_inc={"spent": input.amount},
+        expenditure_category=input.category,
+        expenditure_amount=input.amount
+    )
     
     # Update milestone if specified
     if input.milestone_id:
@@ -350,120 +519,178 @@ async def create_expenditure(input: ExpenditureCreate):
             {"$inc": {"spent_amount": input.amount}}
         )
     
-    # Record transaction
-    tx_record = Transaction(
-        tx_hash=input.tx_hash,
-        type="expenditure",
-        project_id=input.project_id,
-        details={
-            "amount": input.amount,
-            "category": input.category,
-            "description": input.description,
-            "recipient": input.recipient
-        }
-    )
-    tx_doc = tx_record.model_dump()
-    tx_doc['timestamp'] = tx_doc['timestamp'].isoformat()
-    await db.transactions.insert_one(tx_doc)
-    
     return expenditure_obj
 
 @api_router.get("/expenditures/{project_id}", response_model=List[Expenditure])
 async def get_project_expenditures(project_id: str):
     expenditures = await db.expenditures.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    for exp in expenditures:
-        if isinstance(exp['timestamp'], str):
-            exp['timestamp'] = datetime.fromisoformat(exp['timestamp'])
-    return expenditures
+    return [Expenditure.decode(exp) for exp in expenditures]
 
 # Transaction endpoints
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_all_transactions():
-    transactions = await db.transactions.find({}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    for tx in transactions:
-        if isinstance(tx['timestamp'], str):
-            tx['timestamp'] = datetime.fromisoformat(tx['timestamp'])
-    return transactions
+async def get_all_transactions(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    transactions, next_cursor = await keyset_page(db.transactions, {}, "timestamp", limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [Transaction.decode(tx) for tx in transactions]
 
 @api_router.get("/transactions/{project_id}", response_model=List[Transaction])
-async def get_project_transactions(project_id: str):
-    transactions = await db.transactions.find({"project_id": project_id}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    for tx in transactions:
-        if isinstance(tx['timestamp'], str):
-            tx['timestamp'] = datetime.fromisoformat(tx['timestamp'])
-    return transactions
+async def get_project_transactions(
+    project_id: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    transactions, next_cursor = await keyset_page(
+        db.transactions, {"project_id": project_id}, "timestamp", limit, cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [Transaction.decode(tx) for tx in transactions]
+
+# Ledger export endpoints
+@api_router.get("/export/{collection}")
+async def export_ledger(
+    collection: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    project_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type: Optional[str] = None
+):
+    """Stream transactions, expenditures or fund allocations for auditors"""
+    query = ledger_exporter.build_query(collection, project_id, start, end, type)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        ledger_exporter.stream(db, collection, query, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{collection}_{timestamp}.{format}"'}
+    )
+
+@api_router.post("/verify/batch")
+async def verify_transactions_batch(input: VerifyBatchRequest):
+    """Verify many transactions using JSON-RPC batch requests"""
+    tx_hashes = list(dict.fromkeys(input.tx_hashes))
+    try:
+        found = await receipt_cache.lookup_many(db, tx_hashes)
+    except RPCTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Blockchain RPC timed out: {str(e)}")
+    except RPCError as e:
+        raise HTTPException(status_code=502, detail=f"Blockchain RPC failed: {str(e)}")
+    
+    results = []
+    for tx_hash in tx_hashes:
+        result = found.get(tx_hash)
+        if isinstance(result, RPCError):
+            results.append({"tx_hash": tx_hash, "verified": False, "error": str(result)})
+        elif result is None:
+            results.append({"tx_hash": tx_hash, "verified": False, "error": "Transaction not found"})
+        else:
+            results.append(result)
+    return {"results": results}
 
 @api_router.get("/verify/{tx_hash}")
 async def verify_transaction(tx_hash: str):
     try:
-        tx = w3.eth.get_transaction(tx_hash)
-        receipt = w3.eth.get_transaction_receipt(tx_hash)
-        
-        return {
-            "verified": True,
-            "tx_hash": tx_hash,
-            "block_number": receipt['blockNumber'],
-            "from": receipt['from'],
-            "to": receipt['to'],
-            "status": receipt['status'],
-            "gas_used": receipt['gasUsed'],
-            "explorer_url": f"https://mumbai.polygonscan.com/tx/{tx_hash}"
-        }
-    except Exception as e:
+        result = await verify_flight.do(tx_hash.lower(), lambda: receipt_cache.lookup(db, tx_hash))
+    except RPCTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Blockchain RPC timed out: {str(e)}")
+    except RPCError as e:
         raise HTTPException(status_code=404, detail=f"Transaction not found: {str(e)}")
-
-@api_router.get("/stats")
-async def get_stats():
-    total_projects = await db.projects.count_documents({})
-    active_projects = await db.projects.count_documents({"status": "Active"})
-    approved_projects = await db.projects.count_documents({"status": "Approved"})
-    pending_approvals = await db.projects.count_documents({"status": {"$in": ["PendingApproval", "UnderReview"]}})
-    total_milestones = await db.milestones.count_documents({})
-    completed_milestones = await db.milestones.count_documents({"status": "Completed"})
-    total_expenditures = await db.expenditures.count_documents({})
-    
-    # Calculate total budget, allocated, and spent
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    total_budget = sum(p.get('budget', 0) for p in projects)
-    total_allocated = sum(p.get('allocated_funds', 0) for p in projects)
-    total_spent = sum(p.get('spent_funds', 0) for p in projects)
-    
-    # Category breakdown
-    expenditures = await db.expenditures.find({}, {"_id": 0}).to_list(1000)
-    category_spending = {}
-    for exp in expenditures:
-        category = exp.get('category', 'General')
-        category_spending[category] = category_spending.get(category, 0) + exp.get('amount', 0)
-    
-    # Project category breakdown
-    project_category_budget = {}
-    project_category_spent = {}
-    for p in projects:
-        category = p.get('category', 'Other')
-        project_category_budget[category] = project_category_budget.get(category, 0) + p.get('budget', 0)
-        project_category_spent[category] = project_category_spent.get(category, 0) + p.get('spent_funds', 0)
     
+    if not result:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    return result
+
+@api_router.get("/indexer/metrics")
+async def get_indexer_metrics():
+    """Progress and health of the background transaction verifier"""
+    pending = await db.transactions.count_documents({"chain_status": {"$in": ["pending", None]}})
     return {
-        "total_projects": total_projects,
-        "active_projects": active_projects,
-        "approved_projects": approved_projects,
-        "pending_approvals": pending_approvals,
-        "total_milestones": total_milestones,
-        "completed_milestones": completed_milestones,
-        "total_expenditures": total_expenditures,
-        "total_budget": total_budget,
-        "total_allocated": total_allocated,
-        "total_spent": total_spent,
-        "unallocated_funds": total_budget - total_allocated,
-        "allocated_unspent": total_allocated - total_spent,
-        "budget_utilization": (total_spent / total_budget * 100) if total_budget > 0 else 0,
-        "allocation_rate": (total_allocated / total_budget * 100) if total_budget > 0 else 0,
-        "spending_rate": (total_spent / total_allocated * 100) if total_allocated > 0 else 0,
-        "expenditure_by_category": category_spending,
-        "budget_by_project_category": project_category_budget,
-        "spent_by_project_category": project_category_spent
+        **chain_indexer.metrics,
+        "pending_transactions": pending,
+        "receipt_cache": receipt_cache.stats(),
+        "coalescing": [verify_flight.stats(), project_flight.stats()]
     }
 
+@api_router.get("/chain/events/metrics")
+async def get_event_indexer_metrics():
+    """Progress of the contract event log indexer"""
+    if event_indexer is None:
+        return {"enabled": False}
+    return {"enabled": True, **event_indexer.metrics}
+
+@api_router.get("/chain/reconcile")
+async def reconcile_chain_events():
+    """Transactions without a matching contract event, and vice versa"""
+    return await reconcile(db)
+
+@api_router.get("/stats")
+async def get_stats():
+    totals = await stats_service.read(db)
+    return stats_service.format_response(totals)
+
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    """Explain the hot queries and flag any collection scans"""
+    return await index_report(db)
+
+@api_router.get("/admin/rpc-pool")
+async def get_rpc_pool_state():
+    """Per-endpoint latency, error rate and routing order of the RPC pool"""
+    return chain_client.pool.state()
+
+@api_router.get("/admin/approval-events")
+async def get_approval_events_state():
+    """Subscribers and replay buffer of the approval event stream"""
+    return {"source": APPROVAL_EVENTS_SOURCE, **approval_events.stats()}
+
+@api_router.get("/admin/processing-pool")
+async def get_processing_pool_state():
+    """Queue depth, rejections and per-task timings of the document worker pool"""
+    return processing_pool.stats()
+
+@api_router.get("/admin/blobs")
+async def get_blob_stats():
+    """Deduplicated blob count, references and bytes saved"""
+    return await blob_store.stats(db)
+
+@api_router.post("/admin/blobs/rebuild")
+async def rebuild_blob_refcounts():
+    """Recompute blob reference counts from the documents collection"""
+    return await blob_store.rebuild(db)
+
+@api_router.post("/admin/blobs/sweep")
+async def sweep_orphaned_blobs():
+    """Unpin and forget blobs unreferenced for longer than the grace period"""
+    return await blob_store.sweep(db, ipfs_service, BLOB_ORPHAN_GRACE)
+
+@api_router.get("/admin/thumbnail-cache")
+async def get_thumbnail_cache_state():
+    """Disk cache hit rate and footprint for photo thumbnails"""
+    return thumbnail_store.cache.summary()
+
+@api_router.get("/admin/pin-queue")
+async def get_pin_queue_state():
+    """Pinning workers and blob counts by pin_status"""
+    return {"enabled": ipfs_service.configured, **await pin_queue.stats(db)}
+
+@api_router.get("/admin/migrations/datetimes")
+async def get_datetime_migration_status():
+    """Progress of the ISO string -> BSON date migration"""
+    return datetime_migration.state
+
+@api_router.post("/admin/stats/rebuild")
+async def rebuild_stats():
+    """Recompute the stats rollup from raw collections and report drift"""
+    report = await stats_service.rebuild(db)
+    return {"rebuilt": report["rebuilt"], "had_rollup": report["had_rollup"], "drift": report["drift"]}
+
 # ==================== HIGHER AUTHORITY & APPROVAL ENDPOINTS ====================
 
 @api_router.post("/auth/authority/login")
@@ -486,7 +713,6 @@ async def authority_login(credentials: dict):
 @api_router.post("/auth/authority/register")
 async def register_authority(authority_data: dict):
     """Register new authority"""
-    from datetime import datetime, timezone
     import uuid
     
     authority = {
@@ -497,92 +723,109 @@ async def register_authority(authority_data: dict):
         "department": authority_data.get('department', 'Municipal Office'),
         "active_reviews": 0,
         "total_reviewed": 0,
-        "joined_at": datetime.now(timezone.utc).isoformat()
+        "joined_at": utcnow()
     }
     
-    await db.authorities.insert_one(authority)
+    try:
+        await db.authorities.insert_one(authority)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Username already registered")
     return {"success": True, "authority_id": authority['id']}
 
 @api_router.post("/projects/{project_id}/submit-approval")
-async def submit_for_approval(project_id: str):
-    """Submit project for approval"""
-    from datetime import datetime, timezone
+async def submit_for_approval(project_id: str, department: Optional[str] = None):
+    """Submit project for approval, preferring reviewers from `department`"""
     import uuid
     
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Get next available reviewer
-    authorities = await db.authorities.find({}, {"_id": 0}).sort("active_reviews", 1).to_list(10)
-    if not authorities:
+    # Atomically reserve a slot with the least-loaded reviewer
+    reviewer = await reviewer_scheduler.assign(db, department)
+    if not reviewer:
+        if await db.authorities.count_documents({}, limit=1):
+            raise HTTPException(status_code=503, detail="All reviewers are at capacity. Please try again later.")
         raise HTTPException(status_code=503, detail="No reviewers available. Please register authorities first.")
     
-    reviewer_id = authorities[0]['id']
+    reviewer_id = reviewer['id']
     
     # Generate tx hash
     tx_hash = '0x' + ''.join([hex(int(x))[2:] for x in os.urandom(32)])
     
-    # Update project
-    await db.projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "status": "PendingApproval",
-            "submitted_at": datetime.now(timezone.utc).isoformat(),
+    try:
+        # Update project
+        await db.projects.update_one(
+            {"id": project_id},
+            {"$set": {
+                "status": "PendingApproval",
+                "submitted_at": utcnow(),
+                "reviewer_id": reviewer_id,
+                "is_anonymous": True,
+                "tx_hash": tx_hash
+            }}
+        )
+        
+        # Create approval request
+        approval = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
             "reviewer_id": reviewer_id,
-            "is_anonymous": True,
-            "tx_hash": tx_hash
-        }}
-    )
-    
-    # Create approval request
-    approval = {
-        "id": str(uuid.uuid4()),
-        "project_id": project_id,
-        "reviewer_id": reviewer_id,
-        "assigned_at": datetime.now(timezone.utc).isoformat(),
-        "status": "Pending"
-    }
-    
-    await db.approval_requests.insert_one(approval)
+            "assigned_at": utcnow(),
+            "status": "Pending"
+        }
+        
+        await db.approval_requests.insert_one(approval)
+    except BaseException:
+        # Give back the slot assign() reserved, or it stays counted forever
+        await reviewer_scheduler.release(db, reviewer_id, reviewed=False)
+        raise
     
-    # Update reviewer count
-    await db.authorities.update_one(
-        {"id": reviewer_id},
-        {"$inc": {"active_reviews": 1}}
+    await stats_service.apply(
+        db,
+        global_inc=stats_service.status_delta(project.get("status"), "PendingApproval")
     )
+    if APPROVAL_EVENTS_SOURCE == 'local':
+        approval_events.publish(reviewer_id, "assigned", assignment_event(approval))
     
     return {"success": True, "message": "Project submitted for approval", "tx_hash": tx_hash}
 
 @api_router.get("/approvals/pending/{authority_id}")
-async def get_pending_approvals(authority_id: str):
+async def get_pending_approvals(
+    authority_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     """Get pending approvals for authority"""
-    approvals = await db.approval_requests.find(
-        {"reviewer_id": authority_id, "status": "Pending"},
-        {"_id": 0}
-    ).to_list(100)
-    
-    for approval in approvals:
-        project = await db.projects.find_one({"id": approval['project_id']}, {"_id": 0})
-        if project:
-            approval['project'] = {
-                "id": project['id'],
-                "name": project['name'],
-                "description": project['description'],
-                "category": project['category'],
-                "budget": project['budget'],
-                "status": project['status'],
-                "contractor_name": "[REDACTED]",
-                "contractor_wallet": "[HIDDEN]",
-                "submitted_at": project.get('submitted_at')
-            }
-    
+    docs = await db.approval_requests.aggregate(
+        pending_approvals_pipeline(authority_id, limit, cursor)
+    ).to_list(limit + 1)
+    approvals, next_cursor = trim_page(docs, "assigned_at", limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return approvals
 
+@api_router.get("/approvals/stream/{authority_id}")
+async def stream_approval_events(
+    authority_id: str,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = None
+):
+    """Server-sent events for a reviewer's queue: `assigned`, `decided` and `resync`.
+
+    Browsers resend Last-Event-ID on reconnect. `since` does the same for
+    clients that cannot set headers.
+    """
+    return StreamingResponse(
+        approval_events.stream(authority_id, last_event_id or since, APPROVAL_EVENTS_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.post("/approvals/{approval_id}/decide")
 async def decide_approval(approval_id: str, decision: dict):
     """Approve or reject project"""
-    from datetime import datetime, timezone
     import uuid
     
     approval = await db.approval_requests.find_one({"id": approval_id})
@@ -592,15 +835,17 @@ async def decide_approval(approval_id: str, decision: dict):
     tx_hash = '0x' + ''.join([hex(int(x))[2:] for x in os.urandom(32)])
     
     # Update approval
-    await db.approval_requests.update_one(
-        {"id": approval_id},
-        {"$set": {
-            "status": decision['decision'],
-            "review_comments": decision.get('comments'),
-            "reviewed_at": datetime.now(timezone.utc).isoformat(),
-            "approval_tx_hash": tx_hash
-        }}
-    )
+    approval_update = {
+        "status": decision['decision'],
+        "review_comments": decision.get('comments'),
+        "reviewed_at": utcnow(),
+        "approval_tx_hash": tx_hash
+    }
+    await db.approval_requests.update_one({"id": approval_id}, {"$set": approval_update})
+    if APPROVAL_EVENTS_SOURCE == 'local':
+        approval_events.publish(
+            approval['reviewer_id'], "decided", decision_event({**approval, **approval_update})
+        )
     
     # Update project
     project_status = "Approved" if decision['decision'] == "Approved" else "Rejected"
@@ -609,20 +854,24 @@ async def decide_approval(approval_id: str, decision: dict):
         "is_anonymous": False if decision['decision'] == "Approved" else True
     }
     
-    if decision['decision'] == "Approved":
-        project = await db.projects.find_one({"id": approval['project_id']})
-        project_update["approved_at"] = datetime.now(timezone.utc).isoformat()
-        project_update["allocated_funds"] = project['budget']
+    project = await db.projects.find_one({"id": approval['project_id']})
+    if project is not None:
+        global_inc = stats_service.status_delta(project.get('status'), project_status)
+        if decision['decision'] == "Approved":
+            project_update["approved_at"] = utcnow()
+            project_update["allocated_funds"] = project['budget']
+            global_inc["total_allocated"] = project['budget'] - project.get('allocated_funds', 0)
+        else:
+            project_update["rejection_reason"] = decision.get('comments')
+        
+        await db.projects.update_one({"id": approval['project_id']}, {"$set": project_update})
+        await stats_service.apply(db, global_inc=global_inc)
     else:
-        project_update["rejection_reason"] = decision.get('comments')
-    
-    await db.projects.update_one({"id": approval['project_id']}, {"$set": project_update})
+        # Project deleted since submission: record the decision, nothing to update
+        logger.warning(f"Approval {approval_id} decided for missing project {approval['project_id']}")
     
     # Update reviewer stats
-    await db.authorities.update_one(
-        {"id": approval['reviewer_id']},
-        {"$inc": {"active_reviews": -1, "total_reviewed": 1}}
-    )
+    await reviewer_scheduler.release(db, approval['reviewer_id'])
     
     # Record transaction
     tx_record = {
@@ -631,8 +880,9 @@ async def decide_approval(approval_id: str, decision: dict):
         "type": "project_approval" if decision['decision'] == "Approved" else "project_rejection",
         "project_id": approval['project_id'],
         "details": {"decision": decision['decision'], "comments": decision.get('comments')},
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "verified": False
+        "timestamp": utcnow(),
+        "verified": False,
+        "chain_status": "pending"
     }
     
     await db.transactions.insert_one(tx_record)
@@ -640,60 +890,102 @@ async def decide_approval(approval_id: str, decision: dict):
     return {"success": True, "decision": decision['decision'], "tx_hash": tx_hash}
 
 @api_router.get("/public/projects/approved")
-async def get_approved_projects():
+async def get_approved_projects(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     """Get approved projects for citizens"""
-    projects = await db.projects.find({"status": "Approved"}, {"_id": 0}).to_list(1000)
-    return projects
+    projects, next_cursor = await keyset_page(
+        db.projects, {"status": "Approved"}, "created_at", limit, cursor, descending=False
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [Project.decode(project) for project in projects]
 
 # ==================== DOCUMENT UPLOAD & MANAGEMENT ENDPOINTS ====================
 
-@api_router.post("/projects/{project_id}/upload-document")
-async def upload_document(
-    project_id: str,
-    file: UploadFile = File(...),
-    document_type: str = Form(...),
-    uploaded_by: str = Form(...)
-):
-    """Upload document for a project"""
+# Photo types that get GPS extraction and thumbnails (older clients sent the singular)
+PHOTO_DOCUMENT_TYPES = {'gps_photos', 'site_photos', 'gps_photo', 'site_photo'}
+
+async def _prepare_document(project_id: str, file: UploadFile, document_type: str, uploaded_by: str) -> dict:
+    """Store and process one uploaded file and return its document record.
+
+    The record is not inserted. The caller owns the blob reference it took
+    and must release it if the record is never written.
+    """
+    # Stream the upload to disk, hashing as it goes
+    try:
+        file_path, file_size, file_hash = await upload_store.save(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    # Identical bytes already stored: take a reference instead of re-pinning
+    blob = await blob_store.acquire(db, file_hash)
     try:
-        # Verify project exists
-        project = await db.projects.find_one({"id": project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        # Create uploads directory if not exists
-        uploads_dir = Path("/app/backend/uploads")
-        uploads_dir.mkdir(exist_ok=True)
-        
-        # Save file temporarily
-        file_path = uploads_dir / f"{uuid.uuid4()}_{file.filename}"
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-        
         # Process document based on type
         metadata = {}
+        blob_metadata = {}
         
-        # Extract GPS from photos
-        if document_type in ['gps_photos', 'site_photos'] and file.content_type and 'image' in file.content_type:
-            gps_data = document_processor.extract_gps_from_image(file_content)
+        # Extract GPS from photos (reused from the blob when it was parsed before)
+        if document_type in PHOTO_DOCUMENT_TYPES and file.content_type and 'image' in file.content_type:
+            if blob and 'gps_data' in blob:
+                gps_data = blob['gps_data']
+            else:
+                try:
+                    gps_data = await processing_pool.run(
+                        "extract_gps", document_processor.extract_gps_from_path, str(file_path)
+                    )
+                except PoolSaturated as e:
+                    raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+                blob_metadata['gps_data'] = gps_data
             if gps_data:
                 metadata['gps_data'] = gps_data
+            
+            # Preview derivatives so dashboards never load the original
+            if blob and 'thumbnails' in blob:
+                thumbnails = blob['thumbnails']
+            else:
+                try:
+                    renders = await processing_pool.run("thumbnails", render_thumbnails, str(file_path))
+                    thumbnails = await thumbnail_store.save(db, file_hash, renders)
+                except PoolSaturated as e:
+                    raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+                except Exception as e:
+                    logger.warning(f"Thumbnail generation failed for {file.filename}: {e}")
+                    thumbnails = None
+                blob_metadata['thumbnails'] = thumbnails
+            if thumbnails:
+                metadata['thumbnails'] = thumbnails
         
-        # Get file hash
-        file_hash = document_processor.get_file_hash(file_content)
         metadata['file_hash'] = file_hash
         
-        # Upload to IPFS (simulated)
-        ipfs_result = ipfs_service.upload_file(str(file_path), file.filename)
-        ipfs_hash = ipfs_result['IpfsHash']
-        ipfs_url = ipfs_service.get_gateway_url(ipfs_hash)
+        deduplicated = blob is not None
+        if not deduplicated:
+            # Keep the bytes locally until the pin queue has pinned them
+            local_path = upload_store.promote(file_path, file_hash)
+            blob = await blob_store.register(
+                db, file_hash, str(local_path), file.filename, file_size, blob_metadata
+            )
+            if blob.get('pin_status') == 'failed':
+                # A concurrent upload registered first and its pin gave up
+                blob = await pin_queue.requeue(db, file_hash, str(local_path)) or blob
+            elif blob.get('local_path') != str(local_path):
+                # A concurrent upload registered first and has pinned or kept its own copy
+                upload_store.remove(local_path)
+        else:
+            if blob_metadata:
+                # Blob predates this metadata; keep it for the next duplicate
+                await db.blobs.update_one({"_id": file_hash}, {"$set": blob_metadata})
+            if blob.get('pin_status') == 'failed':
+                # The failed pin may have had no usable copy; this upload is one
+                local_path = blob.get('local_path')
+                if not local_path or not os.path.exists(local_path):
+                    local_path = str(upload_store.promote(file_path, file_hash, unique=True))
+                blob = await pin_queue.requeue(db, file_hash, local_path) or blob
+        ipfs_hash = blob.get('ipfs_hash')
         
-        # Store document record
-        document = {
+        return {
             "id": str(uuid.uuid4()),
             "project_id": project_id,
             "file_name": file.filename,
@@ -701,35 +993,157 @@ async def upload_document(
             "file_type": file.content_type or 'application/octet-stream',
             "document_type": document_type,
             "ipfs_hash": ipfs_hash,
-            "ipfs_url": ipfs_url,
+            "ipfs_url": ipfs_service.get_gateway_url(ipfs_hash) if ipfs_hash else None,
+            "pin_status": blob.get('pin_status', 'pinned'),
             "file_hash": file_hash,
             "uploaded_by": uploaded_by,
-            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            "uploaded_at": utcnow(),
             "metadata": metadata,
             "gps_data": metadata.get('gps_data'),
-            "verified": True if metadata.get('gps_data') else False
+            "thumbnails": metadata.get('thumbnails'),
+            "verified": True if metadata.get('gps_data') else False,
+            "deduplicated": deduplicated
         }
+    except BaseException:
+        # Give back the blob reference this upload took
+        if blob:
+            await blob_store.release(db, file_hash)
+        raise
+    finally:
+        # Clean up temp file (already moved if it became a new blob)
+        upload_store.remove(file_path)
+
+async def _catch_up_pins(documents: List[dict]) -> None:
+    """Apply pin outcomes reached before these pending records were inserted"""
+    pending = {doc['file_hash'] for doc in documents if doc['pin_status'] == 'pending'}
+    if not pending:
+        return
+    pin_queue.notify()
+    settled = {
+        blob['_id']: blob
+        async for blob in db.blobs.find(
+            {"_id": {"$in": list(pending)}, "pin_status": {"$in": ["pinned", "failed"]}},
+            {"pin_status": 1, "ipfs_hash": 1, "pin_error": 1}
+        )
+    }
+    for doc in documents:
+        blob = settled.get(doc['file_hash']) if doc['pin_status'] == 'pending' else None
+        if blob is None:
+            continue
+        if blob['pin_status'] == 'pinned':
+            doc['ipfs_hash'], doc['pin_status'] = blob['ipfs_hash'], 'pinned'
+            doc['ipfs_url'] = ipfs_service.get_gateway_url(doc['ipfs_hash'])
+            update = {"ipfs_hash": doc['ipfs_hash'], "ipfs_url": doc['ipfs_url'], "pin_status": 'pinned'}
+        else:
+            doc['pin_status'], doc['pin_error'] = 'failed', blob.get('pin_error')
+            update = {"pin_status": 'failed', "pin_error": doc['pin_error']}
+        await db.documents.update_one({"id": doc['id'], "pin_status": 'pending'}, {"$set": update})
+
+def _upload_result(document: dict) -> dict:
+    return {
+        "success": True,
+        "document_id": document['id'],
+        "ipfs_hash": document['ipfs_hash'],
+        "ipfs_url": document['ipfs_url'],
+        "pin_status": document['pin_status'],
+        "gps_verified": bool(document['gps_data']),
+        "thumbnails": document['thumbnails'],
+        "deduplicated": document['deduplicated']
+    }
+
+@api_router.post("/projects/{project_id}/upload-document")
+async def upload_document(
+    project_id: str,
+    file: UploadFile = File(...),
+    document_type: str = Form(...),
+    uploaded_by: str = Form(...)
+):
+    """Upload document for a project"""
+    try:
+        # Verify project exists
+        project = await db.projects.find_one({"id": project_id})
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
         
-        await db.documents.insert_one(document)
-        
-        # Clean up temp file
+        document = await _prepare_document(project_id, file, document_type, uploaded_by)
+        deduplicated = document.pop('deduplicated')
         try:
-            os.remove(file_path)
-        except:
-            pass
+            await db.documents.insert_one(document)
+        except BaseException:
+            await blob_store.release(db, document['file_hash'])
+            raise
+        document['deduplicated'] = deduplicated
         
-        return {
-            "success": True,
-            "document_id": document['id'],
-            "ipfs_hash": ipfs_hash,
-            "ipfs_url": ipfs_url,
-            "gps_verified": bool(metadata.get('gps_data'))
-        }
+        await _catch_up_pins([document])
+        return _upload_result(document)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Document upload error: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@api_router.post("/projects/{project_id}/upload-documents")
+async def upload_documents(
+    project_id: str,
+    files: List[UploadFile] = File(...),
+    document_type: str = Form(...),
+    uploaded_by: str = Form(...)
+):
+    """Upload many documents for a project in one request.
+
+    Files are processed concurrently, at most BATCH_UPLOAD_CONCURRENCY at a
+    time, and the records are written with one insert_many. A file that
+    fails is reported in its result and does not abort the rest.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    project = await db.projects.find_one({"id": project_id}, {"_id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    slots = asyncio.Semaphore(BATCH_UPLOAD_CONCURRENCY)
+    
+    async def prepare(file: UploadFile):
+        async with slots:
+            try:
+                return await _prepare_document(project_id, file, document_type, uploaded_by)
+            except HTTPException as e:
+                return {"success": False, "file_name": file.filename, "status_code": e.status_code, "error": e.detail}
+            except Exception as e:
+                logger.error(f"Batch upload error for {file.filename}: {e}")
+                return {"success": False, "file_name": file.filename, "status_code": 500, "error": str(e)}
+    
+    results = await asyncio.gather(*(prepare(file) for file in files))
+    prepared = [(i, doc) for i, doc in enumerate(results) if 'id' in doc]
+    flags = {doc['id']: doc.pop('deduplicated') for _, doc in prepared}
+    
+    failed_writes = {}
+    if prepared:
+        try:
+            await db.documents.insert_many([doc for _, doc in prepared], ordered=False)
+        except BulkWriteError as e:
+            failed_writes = {err['index']: err.get('errmsg', 'insert failed') for err in e.details.get('writeErrors', [])}
+        except Exception as e:
+            logger.error(f"Batch insert error: {e}")
+            failed_writes = {n: str(e) for n in range(len(prepared))}
+    
+    inserted = []
+    for n, (i, doc) in enumerate(prepared):
+        if n in failed_writes:
+            await blob_store.release(db, doc['file_hash'])
+            results[i] = {"success": False, "file_name": doc['file_name'], "status_code": 500, "error": failed_writes[n]}
+        else:
+            doc['deduplicated'] = flags[doc['id']]
+            inserted.append(doc)
+    await _catch_up_pins(inserted)
+    
+    for i, doc in enumerate(results):
+        if 'id' in doc:
+            results[i] = {"file_name": doc['file_name'], **_upload_result(doc)}
+    failed = len(results) - len(inserted)
+    return {"success": failed == 0, "uploaded": len(inserted), "failed": failed, "results": results}
+
 @api_router.get("/projects/{project_id}/documents")
 async def get_project_documents(project_id: str):
     """Get all documents for a project"""
@@ -745,18 +1159,61 @@ async def get_project_documents(project_id: str):
         logger.error(f"Error fetching documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/documents/{document_id}/status")
+async def get_document_status(document_id: str):
+    """Pinning progress of an uploaded document"""
+    document = await db.documents.find_one(
+        {"id": document_id},
+        {"_id": 0, "id": 1, "file_hash": 1, "pin_status": 1, "ipfs_hash": 1, "ipfs_url": 1, "pin_error": 1}
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    document.setdefault("pin_status", "pinned" if document.get("ipfs_hash") else "pending")
+    if document["pin_status"] == "pending" and document.get("file_hash"):
+        blob = await db.blobs.find_one({"_id": document["file_hash"]}, {"attempts": 1, "next_attempt_at": 1})
+        if blob:
+            document["attempts"] = blob.get("attempts", 0)
+            document["next_attempt_at"] = blob.get("next_attempt_at")
+    return document
+
+@api_router.get("/documents/{document_id}/thumbnails/{size}")
+async def get_document_thumbnail(
+    document_id: str,
+    size: str,
+    format: str = Query("webp"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Serve a photo preview; `size` is small, medium or large and `format` webp or jpeg"""
+    if size not in THUMBNAIL_SIZES or format not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown thumbnail variant")
+    document = await db.documents.find_one({"id": document_id}, {"_id": 0, "file_hash": 1, "thumbnails": 1})
+    if not document or size not in (document.get("thumbnails") or {}):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    
+    variant = variant_name(size, format)
+    headers = {"Cache-Control": THUMBNAIL_CACHE_CONTROL, "ETag": f'"{document["file_hash"]}.{variant}"'}
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    data = await thumbnail_store.load(db, document["file_hash"], variant)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return Response(content=data, media_type=THUMBNAIL_FORMATS[format][1], headers=headers)
+
 @api_router.delete("/projects/{project_id}/documents/{document_id}")
 async def delete_document(project_id: str, document_id: str):
     """Delete a document"""
     try:
-        result = await db.documents.delete_one({
+        document = await db.documents.find_one_and_delete({
             "id": document_id,
             "project_id": project_id
         })
         
-        if result.deleted_count == 0:
+        if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
+        # Drop this record's reference to the shared blob
+        await blob_store.release(db, document.get('file_hash'))
+        
         return {"success": True, "message": "Document deleted"}
         
     except HTTPException:
@@ -768,12 +1225,28 @@ async def delete_document(project_id: str, document_id: str):
 # Include router
 app.include_router(api_router)
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads by Content-Length before the multipart body is read"""
+    content_length = request.headers.get("content-length")
+    if request.method == "POST" and content_length and content_length.isdigit():
+        if request.url.path.endswith("/upload-document"):
+            limit = MAX_UPLOAD_BYTES
+        elif request.url.path.endswith("/upload-documents"):
+            limit = MAX_BATCH_UPLOAD_BYTES
+        else:
+            limit = None
+        if limit is not None and int(content_length) > limit + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds {limit} bytes"})
+    return await call_next(request)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 logging.basicConfig(
@@ -782,6 +1255,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    errors = await ensure_indexes(db)
+    if errors:
+        logger.warning(f"Some indexes could not be created: {errors}")
+
+@app.on_event("startup")
+async def seed_stats_rollup():
+    # Seed before any write increments the rollup
+    try:
+        if await stats_service.ensure_seeded(db):
+            logger.info("Seeded stats rollup from existing data")
+    except Exception as e:
+        logger.error(f"Stats rollup seeding failed: {e}")
+
+async def _sweep_blobs_periodically():
+    while True:
+        await asyncio.sleep(BLOB_SWEEP_INTERVAL)
+        try:
+            swept = await blob_store.sweep(db, ipfs_service, BLOB_ORPHAN_GRACE)
+            if swept["removed"]:
+                logger.info(f"Swept orphaned blobs: {swept}")
+        except Exception as e:
+            logger.error(f"Orphaned blob sweep failed: {e}")
+
+@app.on_event("startup")
+async def start_blob_sweeper():
+    if BLOB_SWEEP_INTERVAL > 0:
+        app.state.blob_sweeper = asyncio.create_task(_sweep_blobs_periodically())
+
+@app.on_event("startup")
+async def start_datetime_migration():
+    app.state.datetime_migration = asyncio.create_task(datetime_migration.run(db, DATETIME_FIELDS))
+
+@app.on_event("startup")
+async def start_chain_indexer():
+    chain_head.start()
+    if os.environ.get('INDEXER_ENABLED', 'true').lower() == 'true':
+        chain_indexer.start(db)
+    if event_indexer is not None:
+        event_indexer.start(db)
+    if APPROVAL_EVENTS_SOURCE == 'change_stream':
+        approval_events.start(db)
+    if ipfs_service.configured:
+        pin_queue.start(db)
+    else:
+        logger.warning("Pinata credentials are not set; uploads stay pending until pinning is configured")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await chain_indexer.stop()
+    if event_indexer is not None:
+        await event_indexer.stop()
+    await chain_head.stop()
+    await approval_events.stop()
+    await pin_queue.stop()
+    if getattr(app.state, 'blob_sweeper', None) is not None:
+        app.state.blob_sweeper.cancel()
+    processing_pool.shutdown()
+    await ipfs_service.close()
+    client.close()
+    await chain_client.close()
\ No newline at end of file
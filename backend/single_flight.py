@@ -0,0 +1,49 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight future.
+
+    The first caller for a key starts the work. Callers that arrive while it
+    is still running await the same future and get the same result or
+    exception. Each caller gets its own deep copy of the result, so a handler
+    that mutates it cannot leak into another's response. Nothing is cached:
+    once the future settles the key is free again. Each waiter is shielded,
+    so a cancelled caller does not cancel the shared work for the others.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the run that is already in flight"""
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved; callers see it through await
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,318 @@
+from typing import Dict, Any, List, Optional
+from pymongo import UpdateOne, ReplaceOne
+
+PENDING_STATUSES = ["PendingApproval", "UnderReview"]
+
+# Counters kept on the global rollup document
+GLOBAL_FIELDS = [
+    "total_projects", "active_projects", "approved_projects", "pending_approvals",
+    "total_milestones", "completed_milestones", "total_expenditures",
+    "total_budget", "total_allocated", "total_spent"
+]
+
+# Status -> rollup counter it contributes to
+STATUS_COUNTERS = {
+    "Active": "active_projects",
+    "Approved": "approved_projects",
+    "PendingApproval": "pending_approvals",
+    "UnderReview": "pending_approvals"
+}
+
+DRIFT_TOLERANCE = 1e-6
+
+class StatsService:
+    """Compute dashboard statistics with server-side aggregation"""
+
+    @staticmethod
+    def _pipeline() -> List[Dict[str, Any]]:
+        """Single aggregation over projects, milestones and expenditures.
+
+        Milestones and expenditures are folded into the projects stream with
+        $unionWith and tagged with a `_src` marker, so one $facet stage can
+        compute every counter and breakdown in one round trip.
+        """
+        def src(name):
+            return {"$match": {"_src": name}}
+
+        def flag(condition):
+            return {"$sum": {"$cond": [condition, 1, 0]}}
+
+        return [
+            {"$project": {
+                "_id": 0, "_src": {"$literal": "p"}, "status": 1, "category": 1,
+                "budget": 1, "allocated_funds": 1, "spent_funds": 1
+            }},
+            {"$unionWith": {"coll": "milestones", "pipeline": [
+                {"$project": {"_id": 0, "_src": {"$literal": "m"}, "status": 1}}
+            ]}},
+            {"$unionWith": {"coll": "expenditures", "pipeline": [
+                {"$project": {"_id": 0, "_src": {"$literal": "e"}, "category": 1, "amount": 1}}
+            ]}},
+            {"$facet": {
+                "projects": [src("p"), {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "active": flag({"$eq": ["$status", "Active"]}),
+                    "approved": flag({"$eq": ["$status", "Approved"]}),
+                    "pending": flag({"$in": ["$status", PENDING_STATUSES]}),
+                    "budget": {"$sum": "$budget"},
+                    "allocated": {"$sum": "$allocated_funds"},
+                    "spent": {"$sum": "$spent_funds"}
+                }}],
+                "project_categories": [src("p"), {"$group": {
+                    "_id": {"$ifNull": ["$category", "Other"]},
+                    "budget": {"$sum": "$budget"},
+                    "spent": {"$sum": "$spent_funds"}
+                }}],
+                "milestones": [src("m"), {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "completed": flag({"$eq": ["$status", "Completed"]})
+                }}],
+                "expenditures": [src("e"), {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1}
+                }}],
+                "expenditure_categories": [src("e"), {"$group": {
+                    "_id": {"$ifNull": ["$category", "General"]},
+                    "amount": {"$sum": "$amount"}
+                }}]
+            }}
+        ]
+
+    async def compute(self, db) -> Dict[str, Any]:
+        """Run the stats aggregation and return the raw totals"""
+        result = await db.projects.aggregate(self._pipeline(), allowDiskUse=True).to_list(1)
+        facets = result[0] if result else {}
+
+        def single(name):
+            rows = facets.get(name) or []
+            return rows[0] if rows else {}
+
+        projects = single("projects")
+        milestones = single("milestones")
+        expenditures = single("expenditures")
+
+        return {
+            "total_projects": projects.get("total", 0),
+            "active_projects": projects.get("active", 0),
+            "approved_projects": projects.get("approved", 0),
+            "pending_approvals": projects.get("pending", 0),
+            "total_milestones": milestones.get("total", 0),
+            "completed_milestones": milestones.get("completed", 0),
+            "total_expenditures": expenditures.get("total", 0),
+            "total_budget": projects.get("budget", 0),
+            "total_allocated": projects.get("allocated", 0),
+            "total_spent": projects.get("spent", 0),
+            "expenditure_by_category": {
+                row["_id"]: row["amount"] for row in facets.get("expenditure_categories", [])
+            },
+            "budget_by_project_category": {
+                row["_id"]: row["budget"] for row in facets.get("project_categories", [])
+            },
+            "spent_by_project_category": {
+                row["_id"]: row["spent"] for row in facets.get("project_categories", [])
+            }
+        }
+
+    @staticmethod
+    def format_response(totals: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape raw totals into the /api/stats response"""
+        total_budget = totals["total_budget"]
+        total_allocated = totals["total_allocated"]
+        total_spent = totals["total_spent"]
+
+        return {
+            "total_projects": totals["total_projects"],
+            "active_projects": totals["active_projects"],
+            "approved_projects": totals["approved_projects"],
+            "pending_approvals": totals["pending_approvals"],
+            "total_milestones": totals["total_milestones"],
+            "completed_milestones": totals["completed_milestones"],
+            "total_expenditures": totals["total_expenditures"],
+            "total_budget": total_budget,
+            "total_allocated": total_allocated,
+            "total_spent": total_spent,
+            "unallocated_funds": total_budget - total_allocated,
+            "allocated_unspent": total_allocated - total_spent,
+            "budget_utilization": (total_spent / total_budget * 100) if total_budget > 0 else 0,
+            "allocation_rate": (total_allocated / total_budget * 100) if total_budget > 0 else 0,
+            "spending_rate": (total_spent / total_allocated * 100) if total_allocated > 0 else 0,
+            "expenditure_by_category": totals["expenditure_by_category"],
+            "budget_by_project_category": totals["budget_by_project_category"],
+            "spent_by_project_category": totals["spent_by_project_category"]
+        }
+
+    # ==================== MATERIALIZED ROLLUP ====================
+
+    @staticmethod
+    def status_delta(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+        """Counter increments for a project moving from one status to another"""
+        delta: Dict[str, int] = {}
+        old_counter = STATUS_COUNTERS.get(old_status)
+        new_counter = STATUS_COUNTERS.get(new_status)
+        if old_counter == new_counter:
+            return delta
+        if old_counter:
+            delta[old_counter] = -1
+        if new_counter:
+            delta[new_counter] = 1
+        return delta
+
+    async def apply(
+        self,
+        db,
+        global_inc: Optional[Dict[str, float]] = None,
+        project_category: Optional[str] = None,
+        project_category_inc: Optional[Dict[str, float]] = None,
+        expenditure_category: Optional[str] = None,
+        expenditure_amount: float = 0
+    ) -> None:
+        """Apply increments to the stats_rollup documents in one bulk write.
+
+        Called by the write endpoints right after their data change. Should
+        the process die in between, `rebuild` recomputes and reports drift.
+        The global document is never upserted here: until `rebuild` has
+        seeded it, an increment would become the whole total.
+        """
+        ops = []
+        global_inc = {k: v for k, v in (global_inc or {}).items() if v}
+        if global_inc:
+            ops.append(UpdateOne({"_id": "global"}, {"$inc": global_inc}))
+
+        project_category_inc = {k: v for k, v in (project_category_inc or {}).items() if v}
+        if project_category_inc:
+            category = project_category or "Other"
+            ops.append(UpdateOne(
+                {"_id": f"project_category:{category}"},
+                {"$inc": project_category_inc,
+                 "$setOnInsert": {"kind": "project_category", "category": category}},
+                upsert=True
+            ))
+
+        if expenditure_amount:
+            category = expenditure_category or "General"
+            ops.append(UpdateOne(
+                {"_id": f"expenditure_category:{category}"},
+                {"$inc": {"amount": expenditure_amount},
+                 "$setOnInsert": {"kind": "expenditure_category", "category": category}},
+                upsert=True
+            ))
+
+        if ops:
+            await db.stats_rollup.bulk_write(ops, ordered=False)
+
+    async def ensure_seeded(self, db) -> bool:
+        """Build the rollup from the raw collections if it has never been built"""
+        if await db.stats_rollup.find_one({"_id": "global"}, {"_id": 1}):
+            return False
+        await self.rebuild(db)
+        return True
+
+    async def read(self, db) -> Dict[str, Any]:
+        """Read totals from the rollup, building it on first use"""
+        docs = await db.stats_rollup.find({}).to_list(None)
+        totals = self._totals_from_rollup(docs)
+        if totals is None:
+            report = await self.rebuild(db)
+            totals = report["totals"]
+        return totals
+
+    @staticmethod
+    def _totals_from_rollup(docs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        global_doc = next((d for d in docs if d["_id"] == "global"), None)
+        if global_doc is None:
+            return None
+
+        totals: Dict[str, Any] = {field: global_doc.get(field, 0) for field in GLOBAL_FIELDS}
+        totals["expenditure_by_category"] = {}
+        totals["budget_by_project_category"] = {}
+        totals["spent_by_project_category"] = {}
+        for doc in docs:
+            if doc.get("kind") == "project_category":
+                totals["budget_by_project_category"][doc["category"]] = doc.get("budget", 0)
+                totals["spent_by_project_category"][doc["category"]] = doc.get("spent", 0)
+            elif doc.get("kind") == "expenditure_category":
+                totals["expenditure_by_category"][doc["category"]] = doc.get("amount", 0)
+        return totals
+
+    async def rebuild(self, db) -> Dict[str, Any]:
+        """Recompute the rollup from the raw collections and report drift"""
+        previous = self._totals_from_rollup(await db.stats_rollup.find({}).to_list(None))
+        totals = await self.compute(db)
+
+        docs = [{"_id": "global", **{field: totals[field] for field in GLOBAL_FIELDS}}]
+        for category, budget in totals["budget_by_project_category"].items():
+            docs.append({
+                "_id": f"project_category:{category}",
+                "kind": "project_category",
+                "category": category,
+                "budget": budget,
+                "spent": totals["spent_by_project_category"].get(category, 0)
+            })
+        for category, amount in totals["expenditure_by_category"].items():
+            docs.append({
+                "_id": f"expenditure_category:{category}",
+                "kind": "expenditure_category",
+                "category": category,
+                "amount": amount
+            })
+
+        await db.stats_rollup.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+            ordered=False
+        )
+        await db.stats_rollup.delete_many({"_id": {"$nin": [doc["_id"] for doc in docs]}})
+
+        return {
+            "rebuilt": True,
+            "had_rollup": previous is not None,
+            "drift": self._drift(previous, totals) if previous is not None else {},
+            "totals": totals
+        }
+
+    @staticmethod
+    def _drift(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields where the stored rollup differed from the recomputed value"""
+        drift: Dict[str, Any] = {}
+        for field in GLOBAL_FIELDS:
+            stored, actual = previous.get(field, 0), current.get(field, 0)
+            if abs(stored - actual) > DRIFT_TOLERANCE:
+                drift[field] = {"rollup": stored, "actual": actual}
+
+        for field in ["expenditure_by_category", "budget_by_project_category", "spent_by_project_category"]:
+            stored_map, actual_map = previous.get(field, {}), current.get(field, {})
+            for category in set(stored_map) | set(actual_map):
+                stored, actual = stored_map.get(category, 0), actual_map.get(category, 0)
+                if abs(stored - actual) > DRIFT_TOLERANCE:
+                    drift.setdefault(field, {})[category] = {"rollup": stored, "actual": actual}
+        return drift
+
+stats_service = StatsService()
+
+if __name__ == "__main__":
+    # Rebuild command: python stats_service.py rebuild
+    import asyncio
+    import json
+    import os
+    import sys
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python stats_service.py rebuild")
+        sys.exit(2)
+
+    load_dotenv(Path(__file__).parent / '.env')
+
+    async def _rebuild():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        try:
+            report = await stats_service.rebuild(client[os.environ['DB_NAME']])
+        finally:
+            client.close()
+        print(json.dumps({"drift": report["drift"], "had_rollup": report["had_rollup"]}, indent=2, default=str))
+        return 1 if report["drift"] else 0
+
+    sys.exit(asyncio.run(_rebuild()))
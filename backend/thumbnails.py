@@ -0,0 +1,190 @@
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from PIL import Image, ImageOps
+from pymongo import UpdateOne
+from datetime_codec import utcnow
+
+# Longest edge in pixels for each derivative
+THUMBNAIL_SIZES = {"small": 160, "medium": 480, "large": 1280}
+# WebP for browsers that take it, JPEG as the fallback
+THUMBNAIL_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+THUMBNAIL_QUALITY = 80
+
+def variant_name(size: str, fmt: str) -> str:
+    return f"{size}.{fmt}"
+
+def render_thumbnails(source_path: str, sizes: Dict[str, int] = THUMBNAIL_SIZES,
+                      formats: Dict[str, tuple] = THUMBNAIL_FORMATS) -> Dict[str, Dict[str, Any]]:
+    """Decode a photo once and encode every size/format derivative.
+
+    Runs in the processing pool. JPEGs are decoded at a reduced DCT scale
+    that is still at least the largest size. Sizes are then produced
+    largest-first, each downscaled from the one before. Returns
+    {variant: {"width", "height", "content_type", "data"}}.
+    """
+    renders = {}
+    with Image.open(source_path) as image:
+        largest = max(sizes.values())
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        for size, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((edge, edge), Image.LANCZOS)
+            for fmt, (pil_format, content_type) in formats.items():
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, quality=THUMBNAIL_QUALITY, optimize=True)
+                renders[variant_name(size, fmt)] = {
+                    "width": image.width,
+                    "height": image.height,
+                    "content_type": content_type,
+                    "data": buffer.getvalue()
+                }
+    return renders
+
+class ThumbnailCache:
+    """Size-bounded LRU of rendered thumbnails on local disk.
+
+    Recency is tracked in memory. It is seeded from file mtimes on first use,
+    so the order survives restarts. Once the total size goes over
+    `max_bytes`, the least recently served files are deleted. Files are read
+    and written off the event loop.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._loaded = False
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.cache_dir.exists():
+            return
+        files = [(p.stat().st_mtime, p) for p in self.cache_dir.glob("*/*") if not p.name.endswith(".tmp")]
+        for _, path in sorted(files):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self.total_bytes += size
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+        if key not in self._entries:
+            self.stats["misses"] += 1
+            return None
+        try:
+            data = await asyncio.to_thread(self._read, self._path(key))
+        except FileNotFoundError:
+            # Removed behind our back
+            self.total_bytes -= self._entries.pop(key, 0)
+            self.stats["misses"] += 1
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+        if len(data) > self.max_bytes:
+            return
+        await asyncio.to_thread(self._write, self._path(key), data)
+        self.total_bytes += len(data) - self._entries.pop(key, 0)
+        self._entries[key] = len(data)
+
+        victims: List[Path] = []
+        while self.total_bytes > self.max_bytes and self._entries:
+            victim, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            victims.append(self._path(victim))
+        if victims:
+            self.stats["evictions"] += len(victims)
+            await asyncio.to_thread(self._remove, victims)
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes}
+
+    @staticmethod
+    def _read(path: Path) -> bytes:
+        with open(path, "rb") as f:
+            data = f.read()
+        # Keeps the recency order for the next restart
+        os.utime(path)
+        return data
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".tmp")
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    @staticmethod
+    def _remove(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+class ThumbnailStore:
+    """Thumbnail derivatives keyed by blob hash.
+
+    The `thumbnails` collection holds the encoded bytes, one small record
+    per variant, so derivatives outlive the local upload once it is pinned.
+    The disk cache sits in front of it for serving. Because derivatives are
+    keyed by content hash, deduplicated uploads share them.
+    """
+
+    def __init__(self, cache: ThumbnailCache):
+        self.cache = cache
+
+    @staticmethod
+    def _key(file_hash: str, variant: str) -> str:
+        return f"{file_hash}.{variant}"
+
+    async def save(self, db, file_hash: str, renders: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """Persist rendered variants and return the {size: {width, height}} summary for the document"""
+        now = utcnow()
+        await db.thumbnails.bulk_write([
+            UpdateOne(
+                {"_id": self._key(file_hash, variant)},
+                {"$setOnInsert": {"file_hash": file_hash, "variant": variant, "width": render["width"],
+                                  "height": render["height"], "content_type": render["content_type"],
+                                  "size": len(render["data"]), "data": render["data"], "created_at": now}},
+                upsert=True
+            )
+            for variant, render in renders.items()
+        ], ordered=False)
+        for variant, render in renders.items():
+            await self.cache.put(self._key(file_hash, variant), render["data"])
+
+        summary = {}
+        for variant, render in renders.items():
+            size = variant.split(".", 1)[0]
+            summary[size] = {"width": render["width"], "height": render["height"]}
+        return summary
+
+    async def load(self, db, file_hash: str, variant: str) -> Optional[bytes]:
+        key = self._key(file_hash, variant)
+        data = await self.cache.get(key)
+        if data is None:
+            record = await db.thumbnails.find_one({"_id": key}, {"data": 1})
+            if not record:
+                return None
+            data = bytes(record["data"])
+            await self.cache.put(key, data)
+        return data
@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Tuple
+from fastapi import UploadFile
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the configured maximum size"""
+
+class UploadStore:
+    """Write uploads to disk chunk by chunk, hashing as they stream.
+
+    At most one `chunk_size` buffer per upload is held in memory, and the
+    SHA-256 is computed during the copy, so the file is never read back for
+    hashing. Data is written to a `.part` file, which is fsynced and renamed
+    once complete and removed if the upload fails or exceeds `max_bytes`.
+    """
+
+    def __init__(self, uploads_dir: Path, max_bytes: int, chunk_size: int = 1024 * 1024):
+        self.uploads_dir = uploads_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+
+    async def save(self, upload: UploadFile) -> Tuple[Path, int, str]:
+        """Store an upload and return (path, size, sha256 hex digest)"""
+        self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        name = Path(upload.filename or "upload").name
+        path = self.uploads_dir / f"{uuid.uuid4()}_{name}"
+        partial = path.with_name(path.name + ".part")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(partial, "wb") as f:
+                while True:
+                    chunk = await upload.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                    await asyncio.to_thread(self._write_chunk, f, digest, chunk)
+                await asyncio.to_thread(self._sync, f)
+            os.replace(partial, path)
+        except BaseException:
+            self.remove(partial)
+            raise
+        return path, size, digest.hexdigest()
+
+    def promote(self, path: Path, file_hash: str, unique: bool = False) -> Path:
+        """Move a saved upload to its content-addressed home until it is pinned.
+
+        `unique` gives the copy a name of its own, for replacing a copy that
+        may be deleted concurrently.
+        """
+        blobs_dir = self.uploads_dir / "blobs"
+        blobs_dir.mkdir(parents=True, exist_ok=True)
+        target = blobs_dir / (f"{file_hash}.{uuid.uuid4().hex[:8]}" if unique else file_hash)
+        os.replace(path, target)
+        return target
+
+    @staticmethod
+    def _write_chunk(f, digest, chunk: bytes) -> None:
+        # hashlib and file writes release the GIL, so this runs off the loop
+        digest.update(chunk)
+        f.write(chunk)
+
+    @staticmethod
+    def _sync(f) -> None:
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def remove(path: Path) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
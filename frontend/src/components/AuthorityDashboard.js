@@ -30,11 +30,17 @@ const AuthorityDashboard = () => {
     const auth = JSON.parse(storedAuthority);
     setAuthority(auth);
     fetchPendingApprovals(auth.id);
+
+    // Refresh the queue when the server pushes an assignment or decision
+    const events = new EventSource(`${API}/approvals/stream/${auth.id}`);
+    const refresh = () => fetchPendingApprovals(auth.id, { quiet: true });
+    ['assigned', 'decided', 'resync'].forEach((type) => events.addEventListener(type, refresh));
+    return () => events.close();
   }, [navigate]);
 
-  const fetchPendingApprovals = async (authorityId) => {
+  const fetchPendingApprovals = async (authorityId, { quiet = false } = {}) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const response = await axios.get(`${API}/approvals/pending/${authorityId}`);
       setApprovals(response.data);
     } catch (error) {
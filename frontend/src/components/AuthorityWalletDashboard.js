@@ -290,6 +290,19 @@ const AuthorityWalletDashboard = ({ account, onDisconnect }) => {
                   <Card key={idx} className="bg-slate-800/50 border-slate-700">
                     <CardContent className="pt-4">
                       <div className="flex items-start justify-between">
+                        {doc.thumbnails?.small && (
+                          <picture className="mr-4 shrink-0">
+                            <source srcSet={`${API}/documents/${doc.id}/thumbnails/small?format=webp`} type="image/webp" />
+                            <img
+                              src={`${API}/documents/${doc.id}/thumbnails/small?format=jpeg`}
+                              width={doc.thumbnails.small.width}
+                              height={doc.thumbnails.small.height}
+                              loading="lazy"
+                              alt={doc.file_name}
+                              className="rounded-md object-cover"
+                            />
+                          </picture>
+                        )}
                         <div className="space-y-2 flex-1">
                           <div className="flex items-center space-x-2">
                             <FileText className="w-4 h-4 text-blue-400" />
@@ -298,7 +311,10 @@ const AuthorityWalletDashboard = ({ account, onDisconnect }) => {
                           <div className="text-sm space-y-1">
                             <p className="text-slate-400">Type: <span className="text-white">{doc.document_type}</span></p>
                             <p className="text-slate-400">Size: <span className="text-white">{(doc.file_size / 1024).toFixed(2)} KB</span></p>
-                            <p className="text-slate-400">IPFS: <span className="text-xs font-mono text-green-400">{doc.ipfs_hash}</span></p>
+                            <p className="text-slate-400">IPFS: {doc.ipfs_hash
+                              ? <span className="text-xs font-mono text-green-400">{doc.ipfs_hash}</span>
+                              : <span className="text-xs text-yellow-400">{doc.pin_status === 'failed' ? 'pinning failed' : 'pinning…'}</span>}
+                            </p>
                             {doc.gps_data && (
                               <div className="flex items-center space-x-2 text-green-400">
                                 <MapPin className="w-3 h-3" />
@@ -309,15 +325,17 @@ const AuthorityWalletDashboard = ({ account, onDisconnect }) => {
                             )}
                           </div>
                         </div>
-                        <a
-                          href={doc.ipfs_url}
-                          target="_blank"
-                          rel="noopener noreferrer"
-                          className="flex items-center space-x-2 px-3 py-2 bg-blue-500 hover:bg-blue-600 rounded-lg text-white text-sm"
-                        >
-                          <Download className="w-4 h-4" />
-                          <span>View</span>
-                        </a>
+                        {doc.ipfs_url && (
+                          <a
+                            href={doc.ipfs_url}
+                            target="_blank"
+                            rel="noopener noreferrer"
+                            className="flex items-center space-x-2 px-3 py-2 bg-blue-500 hover:bg-blue-600 rounded-lg text-white text-sm"
+                          >
+                            <Download className="w-4 h-4" />
+                            <span>View</span>
+                          </a>
+                        )}
                       </div>
                     </CardContent>
                   </Card>
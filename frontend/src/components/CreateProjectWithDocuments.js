@@ -62,6 +62,24 @@ const CreateProjectWithDocuments = ({ account }) => {
     return response.data;
   };
 
+  const uploadDocuments = async (files, docType) => {
+    if (files.length === 0) return [];
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    formData.append('document_type', docType);
+    formData.append('uploaded_by', account);
+
+    const response = await axios.post(
+      `${API}/projects/${projectId}/upload-documents`,
+      formData,
+      { headers: { 'Content-Type': 'multipart/form-data' } }
+    );
+    response.data.results
+      .filter((result) => !result.success)
+      .forEach((result) => toast.error(`${result.file_name}: ${result.error}`));
+    return response.data.results;
+  };
+
   const handleStep1Submit = async () => {
     if (!projectData.name || !projectData.budget || !projectData.contractor_name) {
       toast.error('Please fill all required fields');
@@ -112,24 +130,21 @@ const CreateProjectWithDocuments = ({ account }) => {
         await uploadDocument(documents.proposal, 'proposal');
       }
 
-      // Upload GPS photos
-      for (const file of documents.gps_photos) {
-        toast.info('Uploading GPS photo...');
-        const result = await uploadDocument(file, 'gps_photo');
-        if (result.gps_data) {
-          toast.success(`GPS: ${result.gps_data.latitude?.toFixed(6)}, ${result.gps_data.longitude?.toFixed(6)}`);
+      // Upload GPS photos in one batch
+      if (documents.gps_photos.length > 0) {
+        toast.info(`Uploading ${documents.gps_photos.length} GPS photo(s)...`);
+        const photoResults = await uploadDocuments(documents.gps_photos, 'gps_photos');
+        const verified = photoResults.filter((result) => result.gps_verified).length;
+        if (verified > 0) {
+          toast.success(`GPS verified on ${verified} photo(s)`);
         }
       }
 
       // Upload lab reports
-      for (const file of documents.lab_reports) {
-        await uploadDocument(file, 'lab_report');
-      }
+      await uploadDocuments(documents.lab_reports, 'lab_report');
 
       // Upload invoices
-      for (const file of documents.invoices) {
-        await uploadDocument(file, 'invoice');
-      }
+      await uploadDocuments(documents.invoices, 'invoice');
 
       toast.success('All documents uploaded!');
       setCurrentStep(3);
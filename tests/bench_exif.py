@@ -0,0 +1,104 @@
+"""GPS/EXIF extraction over a photo corpus: full exifread parse vs the fast path.
+
+Point it at a directory of real camera images (JPEG, HEIC, TIFF). Each
+file is parsed `repeats` times per path. The script reports per-file
+timings, how often the fast path had to fall back, and any file where the
+two paths disagree:
+
+    python -m tests.bench_exif <photo dir> [repeats]
+
+Without a directory it generates synthetic JPEGs carrying GPS tags and a
+Canon-style MakerNote IFD.
+"""
+
+import io
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from tests import conftest  # noqa: F401  (puts backend/ on sys.path)
+from document_processor import DocumentProcessor
+
+EXTENSIONS = {".jpg", ".jpeg", ".heic", ".heif", ".tif", ".tiff"}
+
+
+def current_path(path: str):
+    with open(path, "rb") as f:
+        return DocumentProcessor._gps_from_tags(DocumentProcessor._read_exif_full(f))
+
+
+def fast_path(path: str):
+    with open(path, "rb") as f:
+        return DocumentProcessor._extract_gps(f)
+
+
+def time_per_file(fn, paths, repeats: int):
+    timings = []
+    for path in paths:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            fn(path)
+        timings.append((time.perf_counter() - started) / repeats * 1000)
+    return timings
+
+
+def make_photo(path: str, side: int = 2000, maker_note_entries: int = 400) -> None:
+    # A plain little-endian IFD, the layout Canon MakerNotes use
+    maker_note = struct.pack("<H", maker_note_entries) + b"".join(
+        struct.pack("<HHIHH", 0x1000 + i, 3, 1, i, 0) for i in range(maker_note_entries)
+    ) + b"\0\0\0\0"
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"
+    exif[0x0110] = "EOS 5D"
+    exif[0x8825] = {1: "S", 2: (33.0, 51.0, 54.0), 3: "E", 4: (151.0, 12.0, 36.0)}
+    exif.get_ifd(0x8769)[0x927C] = maker_note
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(buffer, "JPEG", exif=exif)
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+
+
+def main(directory: str, repeats: int) -> None:
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names
+        if os.path.splitext(name)[1].lower() in EXTENSIONS
+    )
+    if not paths:
+        sys.exit(f"No JPEG/HEIC/TIFF files under {directory}")
+
+    fallbacks = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            try:
+                fast = DocumentProcessor._read_exif_fast(f)
+            except Exception:
+                fast = None
+        fallbacks += not fast
+    mismatches = [path for path in paths if current_path(path) != fast_path(path)]
+
+    results = {name: time_per_file(fn, paths, repeats) for name, fn in (("current", current_path), ("fast", fast_path))}
+    print(f"{len(paths)} files, {repeats} runs each, {fallbacks} fell back to the full parse")
+    for name, timings in results.items():
+        print(f"{name:>8}: total {sum(timings):8.1f} ms   per file median {statistics.median(timings):6.2f} ms"
+              f"  max {max(timings):6.2f} ms")
+    print(f" speedup: {sum(results['current']) / sum(results['fast']):.1f}x")
+    for path in mismatches:
+        print(f"MISMATCH {path}: {current_path(path)} != {fast_path(path)}")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    if len(sys.argv) > 1:
+        main(sys.argv[1], repeats)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(20):
+                make_photo(os.path.join(tmp, f"photo{i}.jpg"))
+            main(tmp, repeats)
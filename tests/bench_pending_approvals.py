@@ -0,0 +1,83 @@
+"""Compare the per-approval project lookups with the single $lookup page.
+
+Needs a MongoDB server; seeds and drops a scratch database:
+
+    MONGO_URL=mongodb://localhost:27017 python -m tests.bench_pending_approvals [queue sizes...]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from tests import conftest  # noqa: F401  (puts backend/ on sys.path)
+from approvals import pending_approvals_pipeline
+from datetime_codec import utcnow
+from indexes import ensure_indexes
+
+PAGE_SIZE = 100
+ROUNDS = 20
+
+
+async def n_plus_one(db, authority_id):
+    # Previous get_pending_approvals: one find_one per approval
+    approvals = await db.approval_requests.find(
+        {"reviewer_id": authority_id, "status": "Pending"}, {"_id": 0}
+    ).to_list(PAGE_SIZE)
+    for approval in approvals:
+        await db.projects.find_one({"id": approval["project_id"]}, {"_id": 0})
+    return approvals
+
+
+async def single_lookup(db, authority_id):
+    return await db.approval_requests.aggregate(
+        pending_approvals_pipeline(authority_id, PAGE_SIZE)
+    ).to_list(PAGE_SIZE + 1)
+
+
+async def seed(db, authority_id, size):
+    await db.projects.delete_many({})
+    await db.approval_requests.delete_many({})
+    projects, approvals = [], []
+    for i in range(size):
+        project_id = str(uuid.uuid4())
+        projects.append({
+            "id": project_id, "name": f"Project {i}", "description": "bench", "category": "Infrastructure",
+            "budget": 1000.0, "status": "PendingApproval", "contractor_name": "ACME",
+            "contractor_wallet": "0x0", "submitted_at": utcnow()
+        })
+        approvals.append({
+            "id": str(uuid.uuid4()), "project_id": project_id, "reviewer_id": authority_id,
+            "assigned_at": utcnow(), "status": "Pending"
+        })
+    await db.projects.insert_many(projects)
+    await db.approval_requests.insert_many(approvals)
+
+
+async def main(sizes):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"), tz_aware=True)
+    db = client[f"bench_pending_approvals_{uuid.uuid4().hex[:8]}"]
+    authority_id = str(uuid.uuid4())
+    try:
+        await ensure_indexes(db)
+        print(f"{'queue':>7} {'n+1 ms':>10} {'$lookup ms':>11}")
+        for size in sizes:
+            await seed(db, authority_id, size)
+            timings = []
+            for run in (n_plus_one, single_lookup):
+                started = time.perf_counter()
+                for _ in range(ROUNDS):
+                    await run(db, authority_id)
+                timings.append((time.perf_counter() - started) * 1000 / ROUNDS)
+            print(f"{size:>7} {timings[0]:>10.1f} {timings[1]:>11.1f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    asyncio.run(main(sizes))
@@ -0,0 +1,92 @@
+"""Event-loop latency during a burst of photo processing, inline vs pooled.
+
+A probe coroutine stands in for other endpoints. It wakes every 5 ms and
+records how late it was while a burst of large photos is EXIF-parsed and
+decoded:
+
+    python -m tests.bench_processing_pool [photos] [megapixels] [thread|process]
+"""
+
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from tests import conftest  # noqa: F401  (puts backend/ on sys.path)
+from document_processor import document_processor
+from processing_pool import ProcessingPool
+
+PROBE_INTERVAL = 0.005
+
+
+def make_photo(path: str, megapixels: float) -> None:
+    side = int((megapixels * 1_000_000) ** 0.5)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    exif = Image.Exif()
+    exif[0x010F] = "BenchCam"
+    image.save(path, "JPEG", quality=90, exif=exif)
+
+
+def process_photo(path: str) -> None:
+    # What upload_document does for a site photo, plus a full decode
+    document_processor.extract_gps_from_path(path)
+    with open(path, "rb") as f:
+        Image.open(io.BytesIO(f.read())).load()
+
+
+async def probe(stop: asyncio.Event, lateness: list) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lateness.append((loop.time() - expected) * 1000)
+
+
+async def burst(paths, pool) -> float:
+    stop = asyncio.Event()
+    lateness: list = []
+    prober = asyncio.create_task(probe(stop, lateness))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+
+    async def one(path):
+        if pool is None:
+            process_photo(path)
+            await asyncio.sleep(0)
+        else:
+            await pool.run("process_photo", process_photo, path)
+
+    await asyncio.gather(*(one(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    lateness.sort()
+    p50 = statistics.median(lateness)
+    p99 = lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))]
+    return elapsed, p50, p99
+
+
+async def main(count: int, megapixels: float, kind: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "photo.jpg")
+        make_photo(path, megapixels)
+        paths = [path] * count
+        pool = ProcessingPool(kind=kind, workers=os.cpu_count() or 4, max_queue=count)
+        try:
+            for name, runner in (("inline", None), (f"{kind} pool", pool)):
+                elapsed, p50, p99 = await burst(paths, runner)
+                print(f"{name:>12}: burst {elapsed * 1000:8.1f} ms   probe lateness p50 {p50:6.1f} ms  p99 {p99:7.1f} ms")
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    megapixels = float(sys.argv[2]) if len(sys.argv) > 2 else 12
+    kind = sys.argv[3] if len(sys.argv) > 3 else "thread"
+    asyncio.run(main(count, megapixels, kind))
@@ -0,0 +1,52 @@
+"""Compare per-hash verification with JSON-RPC batching.
+
+Runs against the local RPC stand-in with injected latency:
+
+    python -m tests.bench_verify_batch [hash_count] [latency_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from tests import conftest  # noqa: F401  (puts backend/ on sys.path)
+from chain_client import ChainClient
+from tests.rpc_stub import RPCStub
+
+
+async def per_hash_loop(client, hashes):
+    # Previous /api/verify behaviour: two sequential calls for every hash
+    for tx_hash in hashes:
+        await client.get_transaction(tx_hash)
+        await client.get_transaction_receipt(tx_hash)
+
+
+async def batched(client, hashes):
+    calls = [("eth_blockNumber", [])]
+    for tx_hash in hashes:
+        calls.append(("eth_getTransactionByHash", [tx_hash]))
+        calls.append(("eth_getTransactionReceipt", [tx_hash]))
+    await client.batch_request(calls)
+
+
+async def main(count: int, latency_ms: float):
+    async with RPCStub(latency=latency_ms / 1000) as stub:
+        hashes = ["0x%064x" % i for i in range(count)]
+        for tx_hash in hashes:
+            stub.add_transaction(tx_hash)
+        client = ChainClient(stub.url, timeout=60)
+        try:
+            for name, run in (("per-hash loop", per_hash_loop), ("json-rpc batch", batched)):
+                stub.http_requests = 0
+                started = time.perf_counter()
+                await run(client, hashes)
+                elapsed = time.perf_counter() - started
+                print(f"{name:>15}: {elapsed * 1000:8.1f} ms  {stub.http_requests:4d} HTTP requests")
+        finally:
+            await client.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(count, latency_ms))
@@ -0,0 +1,18 @@
+import os
+import uuid
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+
+async def scratch_db(prefix: str):
+    """A throwaway database on MONGO_URL; skips the test when Mongo is down"""
+    client = AsyncIOMotorClient(
+        os.environ.get("MONGO_URL", "mongodb://localhost:27017"), serverSelectionTimeoutMS=500, tz_aware=True
+    )
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip("MongoDB is not available")
+    return client, client[f"{prefix}_{uuid.uuid4().hex[:8]}"]
@@ -0,0 +1,72 @@
+"""Local HTTP stand-in for the Pinata pinning API, used by the IPFS tests"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+
+
+class PinningStub:
+    def __init__(self):
+        # Statuses to answer with before succeeding, consumed one per request
+        self.fail_with: List[int] = []
+        self.retry_after: Optional[str] = None
+        self.requests = 0
+        self.pinned: Dict[str, Dict[str, Any]] = {}
+        self.peers = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def _pin_file(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.fail_with:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else None
+            return web.Response(status=self.fail_with.pop(0), text="try later", headers=headers)
+
+        digest = hashlib.sha256()
+        name = metadata = None
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "file":
+                name = part.filename
+                while True:
+                    chunk = await part.read_chunk(64 * 1024)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+            elif part.name == "pinataMetadata":
+                metadata = json.loads(await part.text())
+        cid = "Qm" + digest.hexdigest()[:44]
+        self.pinned[cid] = {"name": name, "metadata": metadata,
+                            "authorization": request.headers.get("Authorization")}
+        return web.json_response({"IpfsHash": cid, "PinSize": 0, "Timestamp": "now"})
+
+    async def _pin_json(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        data = await request.json()
+        cid = "Qm" + hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:44]
+        self.pinned[cid] = {"json": data}
+        return web.json_response({"IpfsHash": cid, "PinSize": 0, "Timestamp": "now"})
+
+    async def _unpin(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.pinned.pop(request.match_info["cid"], None) is None:
+            return web.Response(status=404, text="not pinned")
+        return web.Response(text="OK")
+
+    async def __aenter__(self) -> "PinningStub":
+        app = web.Application()
+        app.router.add_post("/pinning/pinFileToIPFS", self._pin_file)
+        app.router.add_post("/pinning/pinJSONToIPFS", self._pin_json)
+        app.router.add_delete("/pinning/unpin/{cid}", self._unpin)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
@@ -0,0 +1,83 @@
+"""Local JSON-RPC stand-in for a Polygon node, used by the chain tests"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from aiohttp import web
+
+
+class RPCStub:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.fail = False
+        self.block_number = 1000
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self.hang_hashes: Set[str] = set()
+        self.logs: List[Dict[str, Any]] = []
+        self.max_log_range: Optional[int] = None
+        self.http_requests = 0
+        self.calls: Dict[str, int] = {}
+        self._release = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def add_transaction(self, tx_hash: str, block_number: int = 900, status: int = 1) -> None:
+        # Nodes match hashes regardless of hex casing
+        tx_hash = tx_hash.lower()
+        self.transactions[tx_hash] = {"hash": tx_hash, "blockNumber": hex(block_number)}
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(block_number),
+            "from": "0x" + "a" * 40,
+            "to": "0x" + "b" * 40,
+            "status": hex(status),
+            "gasUsed": hex(21000),
+        }
+
+    async def _call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = call.get("method"), call.get("params") or []
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if params and isinstance(params[0], str) and params[0] in self.hang_hashes:
+            await self._release.wait()
+
+        if method == "eth_blockNumber":
+            result = hex(self.block_number)
+        elif method == "eth_getTransactionByHash":
+            result = self.transactions.get(params[0].lower())
+        elif method == "eth_getTransactionReceipt":
+            result = self.receipts.get(params[0].lower())
+        elif method == "eth_getLogs":
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            if self.max_log_range is not None and end - start + 1 > self.max_log_range:
+                return {"jsonrpc": "2.0", "id": call.get("id"),
+                        "error": {"code": -32005, "message": "query returned more than 10000 results"}}
+            result = [log for log in self.logs if start <= int(log["blockNumber"], 16) <= end]
+        else:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.http_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            return web.Response(status=500, text="upstream unavailable")
+        payload = await request.json()
+        if isinstance(payload, list):
+            return web.json_response(await asyncio.gather(*(self._call(call) for call in payload)))
+        return web.json_response(await self._call(payload))
+
+    async def __aenter__(self) -> "RPCStub":
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._release.set()
+        await self._runner.cleanup()
@@ -0,0 +1,62 @@
+import asyncio
+
+from approval_events import ApprovalEventBus
+
+
+async def _next(stream):
+    return await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+
+def test_events_are_pushed_to_the_reviewer_concerned():
+    async def scenario():
+        bus = ApprovalEventBus()
+        stream = bus.stream("reviewer-1", heartbeat=0.05)
+        assert (await _next(stream)).startswith("retry:")
+
+        bus.publish("reviewer-2", "assigned", {"approval_id": "other"})
+        bus.publish("reviewer-1", "assigned", {"approval_id": "a1"})
+        frame = await _next(stream)
+        assert "event: assigned" in frame
+        assert '"approval_id": "a1"' in frame
+
+        # Idle streams keep the connection alive with comments
+        assert await _next(stream) == ": keepalive\n\n"
+
+        await stream.aclose()
+        assert bus.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_replays_after_last_event_id():
+    async def scenario():
+        bus = ApprovalEventBus(history=3)
+        first = bus.publish("reviewer-1", "assigned", {"approval_id": "a1"})
+        bus.publish("reviewer-1", "assigned", {"approval_id": "a2"})
+        bus.publish("reviewer-1", "decided", {"approval_id": "a1"})
+
+        missed, _ = bus.subscribe("reviewer-1", first["id"])
+        assert [m["data"]["approval_id"] for m in missed] == ["a2", "a1"]
+
+        # Ids older than the replay window or from a previous process resync
+        bus.publish("reviewer-1", "assigned", {"approval_id": "a3"})
+        bus.publish("reviewer-1", "assigned", {"approval_id": "a4"})
+        missed, _ = bus.subscribe("reviewer-1", first["id"])
+        assert [m["event"] for m in missed] == ["resync"]
+        missed, _ = bus.subscribe("reviewer-1", "deadbeef-2")
+        assert [m["event"] for m in missed] == ["resync"]
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def scenario():
+        bus = ApprovalEventBus(queue_size=2)
+        _, queue = bus.subscribe("reviewer-1")
+        for i in range(5):
+            bus.publish("reviewer-1", "assigned", {"approval_id": f"a{i}"})
+        events = [queue.get_nowait()["event"] for _ in range(queue.qsize())]
+        assert "resync" in events
+        assert len(events) <= 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import timedelta
+
+from blob_store import BlobStore
+from datetime_codec import utcnow
+from ipfs_service import IPFSService
+from tests.mongo import scratch_db
+from tests.pinning_stub import PinningStub
+
+FILE_HASH = "a" * 64
+PINNED_HASH = "c" * 64
+
+
+def test_duplicates_share_one_blob_and_release_references(tmp_path):
+    async def scenario():
+        client, db = await scratch_db("test_blobs")
+        try:
+            store = BlobStore()
+            assert await store.acquire(db, FILE_HASH) is None
+
+            local_copy = tmp_path / FILE_HASH
+            local_copy.write_bytes(b"abc")
+            first = await store.register(db, FILE_HASH, str(local_copy), "a.jpg", 3, {"gps_data": None})
+            assert first["pin_status"] == "pending"
+            # A racing upload of the same bytes keeps the first local copy
+            racer = await store.register(db, FILE_HASH, str(tmp_path / "second"), "b.jpg", 3)
+            duplicate = await store.acquire(db, FILE_HASH)
+            assert first["local_path"] == racer["local_path"] == duplicate["local_path"] == str(local_copy)
+            assert duplicate["refcount"] == 3
+            assert "gps_data" in duplicate
+
+            for _ in range(3):
+                await store.release(db, FILE_HASH)
+            blob = await db.blobs.find_one({"_id": FILE_HASH})
+            assert blob["refcount"] == 0
+            assert blob["orphaned_at"] is not None
+            # Never pinned, so the local copy goes now and a re-upload must supply one
+            assert not local_copy.exists()
+            assert blob["pin_status"] == "failed" and "local_path" not in blob
+
+            # Extra releases never go negative; a re-upload revives the blob
+            await store.release(db, FILE_HASH)
+            revived = await store.acquire(db, FILE_HASH)
+            assert revived["refcount"] == 1
+            assert "orphaned_at" not in revived
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def test_sweep_unpins_blobs_orphaned_past_the_grace_period(tmp_path, monkeypatch):
+    async def scenario():
+        monkeypatch.setenv("PINATA_JWT", "test-token")
+        client, db = await scratch_db("test_blobs")
+        async with PinningStub() as stub:
+            ipfs = IPFSService(api_url=stub.url, retries=0)
+            try:
+                store = BlobStore()
+                stub.pinned = {"QmOld": {}, "QmRecent": {}}
+                week_ago = utcnow() - timedelta(days=7)
+                await db.blobs.insert_many([
+                    {"_id": PINNED_HASH, "refcount": 0, "orphaned_at": week_ago,
+                     "pin_status": "pinned", "ipfs_hash": "QmOld"},
+                    {"_id": "recent", "refcount": 0, "orphaned_at": utcnow(),
+                     "pin_status": "pinned", "ipfs_hash": "QmRecent"},
+                    {"_id": "in-use", "refcount": 2, "pin_status": "pinned", "ipfs_hash": "QmInUse"}
+                ])
+                # Orphaned by a refcount rebuild while its pin was still pending
+                leftover = tmp_path / FILE_HASH
+                leftover.write_bytes(b"abc")
+                await db.blobs.insert_one({"_id": FILE_HASH, "refcount": 0, "orphaned_at": week_ago,
+                                           "pin_status": "pending", "ipfs_hash": None,
+                                           "local_path": str(leftover)})
+
+                swept = await store.sweep(db, ipfs, grace_seconds=24 * 3600)
+
+                assert swept == {"removed": 2, "unpinned": 1, "unpin_failed": 0}
+                assert set(stub.pinned) == {"QmRecent"}
+                assert not leftover.exists()
+                assert sorted(await db.blobs.distinct("_id")) == ["in-use", "recent"]
+            finally:
+                await ipfs.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from chain_client import ChainClient, RPCTimeout
+from chain_head import ChainHeadTracker
+from receipt_cache import ReceiptCache
+from tests.rpc_stub import RPCStub
+
+TX_HASH = "0x" + "1" * 64
+HUNG_HASH = "0x" + "2" * 64
+
+
+class _EmptyCollection:
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+class _EmptyDB:
+    """Stands in for Mongo so the receipt cache always falls through to RPC"""
+    receipts = _EmptyCollection()
+
+
+def test_receipt_fields_are_decoded():
+    async def scenario():
+        async with RPCStub() as stub:
+            stub.add_transaction(TX_HASH, block_number=1234)
+            client = ChainClient(stub.url, timeout=2)
+            try:
+                receipt = await client.get_transaction_receipt(TX_HASH)
+                assert int(receipt["blockNumber"], 16) == 1234
+                assert await client.block_number() == 1000
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_call_times_out():
+    async def scenario():
+        async with RPCStub() as stub:
+            stub.hang_hashes.add(HUNG_HASH)
+            client = ChainClient(stub.url, timeout=0.2)
+            try:
+                with pytest.raises(RPCTimeout):
+                    await client.get_transaction(HUNG_HASH)
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_hung_rpc_does_not_block_other_requests(monkeypatch):
+    async def scenario():
+        async with RPCStub() as stub:
+            stub.hang_hashes.add(HUNG_HASH)
+            client = ChainClient(stub.url, timeout=1.0)
+            head = ChainHeadTracker(client)
+            monkeypatch.setattr(server, "chain_client", client)
+            monkeypatch.setattr(server, "chain_head", head)
+            monkeypatch.setattr(server, "receipt_cache", ReceiptCache(client, head=head))
+            monkeypatch.setattr(server, "db", _EmptyDB())
+            try:
+                started = time.monotonic()
+                verify = asyncio.create_task(server.verify_transaction(HUNG_HASH))
+                await asyncio.sleep(0.05)
+
+                # Served while the verify call is still waiting on the RPC
+                status = await server.blockchain_status()
+                root = await server.root()
+                served_after = time.monotonic() - started
+                assert status["connected"] is True
+                assert root["message"]
+                assert not verify.done()
+                assert served_after < 0.5
+
+                with pytest.raises(HTTPException) as exc:
+                    await verify
+                assert exc.value.status_code == 504
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+import asyncio
+
+from chain_client import ChainClient
+from chain_head import ChainHeadTracker
+from tests.rpc_stub import RPCStub
+
+
+def test_concurrent_cold_reads_share_one_rpc_call():
+    async def scenario():
+        async with RPCStub(latency=0.1) as stub:
+            client = ChainClient(stub.url, timeout=2)
+            head = ChainHeadTracker(client, max_age=30)
+            try:
+                blocks = await asyncio.gather(*(head.latest() for _ in range(50)))
+                assert blocks == [1000] * 50
+                assert stub.calls["eth_blockNumber"] == 1
+
+                # Warm reads are served from memory
+                stub.block_number = 1001
+                assert await head.latest() == 1000
+                assert stub.calls["eth_blockNumber"] == 1
+                assert head.snapshot()["age_seconds"] is not None
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_stale_head_is_refreshed():
+    async def scenario():
+        async with RPCStub() as stub:
+            client = ChainClient(stub.url, timeout=2)
+            head = ChainHeadTracker(client, max_age=0)
+            try:
+                assert await head.latest() == 1000
+                stub.block_number = 1005
+                await asyncio.sleep(0.01)
+                assert await head.latest() == 1005
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import asyncio
+
+from chain_client import ChainClient
+from chain_indexer import ChainIndexer
+from datetime_codec import utcnow
+from receipt_cache import ReceiptCache
+from tests.mongo import scratch_db
+from tests.rpc_stub import RPCStub
+
+TX_HASH = "0x" + "4" * 64
+
+
+def test_mined_but_not_final_transaction_waits_for_finality():
+    async def scenario():
+        client, db = await scratch_db("test_chain_indexer")
+        async with RPCStub() as stub:
+            stub.block_number = 1000
+            stub.add_transaction(TX_HASH, block_number=990)
+            chain = ChainClient(stub.url, timeout=2)
+            cache = ReceiptCache(chain, negative_ttl=0, finality_blocks=128)
+            indexer = ChainIndexer(cache, block_time=2.0)
+            try:
+                await db.transactions.insert_one({"id": "t1", "tx_hash": TX_HASH, "chain_status": "pending"})
+
+                await indexer.run_pass(db)
+                tx = await db.transactions.find_one({"id": "t1"})
+                assert tx["block_number"] == 990
+                assert tx["chain_status"] == "pending"
+                assert tx["next_verify_at"] > utcnow()
+                assert indexer.metrics["resolved"] == 0
+
+                # Not polled again before it can be final
+                calls = stub.calls["eth_getTransactionReceipt"]
+                await indexer.run_pass(db)
+                assert stub.calls["eth_getTransactionReceipt"] == calls
+
+                stub.block_number = 2000
+                await db.transactions.update_one({"id": "t1"}, {"$set": {"next_verify_at": utcnow()}})
+                await indexer.run_pass(db)
+                tx = await db.transactions.find_one({"id": "t1"})
+                assert tx["chain_status"] == "confirmed"
+                assert indexer.metrics["resolved"] == 1
+            finally:
+                await chain.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
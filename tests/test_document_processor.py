@@ -0,0 +1,58 @@
+import io
+import os
+
+from PIL import Image
+
+from document_processor import DocumentProcessor, document_processor
+
+XMP_SEGMENT = b"http://ns.adobe.com/xap/1.0/\x00" + b"<x:xmpmeta/>" * 50
+
+
+def make_photo(path, side=1200, xmp_first=False):
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"
+    exif[0x0110] = "EOS 5D"
+    exif[0x8825] = {1: "S", 2: (33.0, 51.0, 54.0), 3: "E", 4: (151.0, 12.0, 36.0)}
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(buffer, "JPEG", exif=exif)
+    data = buffer.getvalue()
+    if xmp_first:
+        # An XMP APP1 segment ahead of the Exif one
+        data = data[:2] + b"\xff\xe1" + (len(XMP_SEGMENT) + 2).to_bytes(2, "big") + XMP_SEGMENT + data[2:]
+    path.write_bytes(data)
+    return path
+
+
+class CountingReader(io.BufferedReader):
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def test_fast_path_reads_only_the_exif_segment(tmp_path):
+    path = make_photo(tmp_path / "photo.jpg", xmp_first=True)
+
+    with CountingReader(io.FileIO(path)) as reader:
+        tags = DocumentProcessor._read_exif_fast(reader)
+        assert reader.bytes_read < 4096 < path.stat().st_size
+
+    gps = DocumentProcessor._gps_from_tags(tags)
+    assert round(gps["latitude"], 4) == -33.865
+    assert round(gps["longitude"], 4) == 151.21
+    assert gps["camera_make"] == "Canon"
+    with open(path, "rb") as f:
+        assert gps == DocumentProcessor._gps_from_tags(DocumentProcessor._read_exif_full(f))
+
+
+def test_falls_back_to_full_parse_without_an_exif_segment(tmp_path):
+    plain = tmp_path / "plain.jpg"
+    Image.new("RGB", (64, 64), "white").save(plain, "JPEG")
+    with open(plain, "rb") as f:
+        assert DocumentProcessor._read_exif_fast(f) is None
+    assert document_processor.extract_gps_from_path(str(plain)) is None
+
+    photo = make_photo(tmp_path / "photo.jpg", side=64)
+    assert document_processor.extract_gps_from_image(photo.read_bytes())["camera_model"] == "EOS 5D"
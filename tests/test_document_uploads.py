@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import io
+
+from starlette.datastructures import Headers, UploadFile
+
+import server
+from thumbnails import ThumbnailCache, ThumbnailStore
+from upload_storage import UploadStore
+from tests.mongo import scratch_db
+from tests.test_document_processor import make_photo
+
+
+def photo_upload(path, name="site.jpg"):
+    return UploadFile(io.BytesIO(path.read_bytes()), filename=name, headers=Headers({"content-type": "image/jpeg"}))
+
+
+async def _upload_env(tmp_path, monkeypatch):
+    client, db = await scratch_db("test_uploads")
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "upload_store", UploadStore(tmp_path / "uploads", max_bytes=10 * 1024 * 1024))
+    monkeypatch.setattr(server, "thumbnail_store", ThumbnailStore(ThumbnailCache(tmp_path / "thumbs", 1024 * 1024)))
+    await db.projects.insert_one({"id": "p1", "name": "Bridge"})
+    return client, db
+
+
+def test_batch_upload_of_wizard_photos_extracts_gps_and_thumbnails(tmp_path, monkeypatch):
+    async def scenario():
+        client, db = await _upload_env(tmp_path, monkeypatch)
+        try:
+            photo = make_photo(tmp_path / "photo.jpg", side=400)
+            files = [photo_upload(photo), UploadFile(io.BytesIO(b"%PDF-1.4"), filename="report.pdf")]
+
+            # The document type the project wizard sends
+            result = await server.upload_documents("p1", files, "gps_photos", "0xabc")
+
+            assert result["uploaded"] == 2 and result["failed"] == 0
+            assert result["results"][0]["gps_verified"] is True
+            assert set(result["results"][0]["thumbnails"]) == {"small", "medium", "large"}
+            stored = await db.documents.find_one({"id": result["results"][0]["document_id"]})
+            assert round(stored["gps_data"]["latitude"], 3) == -33.865
+            assert stored["thumbnails"]["small"]["width"] == 160
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def test_uploaded_photo_thumbnail_is_served_with_immutable_caching(tmp_path, monkeypatch):
+    async def scenario():
+        client, db = await _upload_env(tmp_path, monkeypatch)
+        try:
+            # What the wizard sends now, and the singular older clients sent
+            for document_type, side in (("gps_photos", 300), ("gps_photo", 500)):
+                photo = make_photo(tmp_path / f"{document_type}.jpg", side=side)
+                uploaded = await server.upload_document("p1", photo_upload(photo), document_type, "0xabc")
+                assert uploaded["thumbnails"]["small"] == {"width": 160, "height": 160}
+
+                response = await server.get_document_thumbnail(uploaded["document_id"], "small", "webp", None)
+                assert response.media_type == "image/webp"
+                assert "immutable" in response.headers["cache-control"]
+                cached = await server.get_document_thumbnail(
+                    uploaded["document_id"], "small", "webp", response.headers["etag"]
+                )
+                assert cached.status_code == 304
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def test_upload_racing_a_settled_pin_drops_its_copy_and_reports_the_outcome(tmp_path, monkeypatch):
+    async def scenario():
+        client, db = await _upload_env(tmp_path, monkeypatch)
+        try:
+            data = b"%PDF-1.4 inspection report"
+            file_hash = hashlib.sha256(data).hexdigest()
+            # Another upload of the same bytes registers and pins between our acquire and register
+            await db.blobs.insert_one({"_id": file_hash, "refcount": 1, "pin_status": "pinned", "ipfs_hash": "QmDone"})
+
+            async def lost_race(db, file_hash):
+                return None
+            monkeypatch.setattr(server.blob_store, "acquire", lost_race)
+
+            uploaded = await server.upload_document("p1", UploadFile(io.BytesIO(data), filename="report.pdf"),
+                                                    "report", "0xabc")
+            assert uploaded["pin_status"] == "pinned" and uploaded["ipfs_hash"] == "QmDone"
+            assert not (tmp_path / "uploads" / "blobs" / file_hash).exists()
+
+            # Pinning gave up after this record was prepared but before it was inserted
+            await db.blobs.update_one({"_id": file_hash}, {"$set": {"pin_status": "failed", "pin_error": "gone"}})
+            late = {"id": "late", "file_hash": file_hash, "pin_status": "pending"}
+            await db.documents.insert_one(dict(late))
+            await server._catch_up_pins([late])
+            assert late["pin_status"] == "failed"
+            stored = await db.documents.find_one({"id": "late"})
+            assert (stored["pin_status"], stored["pin_error"]) == ("failed", "gone")
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from eth_abi import encode
+from eth_utils import keccak
+
+from chain_client import ChainClient
+from chain_head import ChainHeadTracker
+from event_indexer import EventDecoder, EventIndexer, FUND_TRACKER_EVENTS_ABI, build_event_indexer
+from tests.mongo import scratch_db
+from tests.rpc_stub import RPCStub
+
+CONTRACT = "0x" + "c" * 40
+FUNDS_ALLOCATED = "0x" + keccak(text="FundsAllocated(uint256,uint256)").hex()
+
+
+def funds_allocated_log(block_number, project_id, amount, log_index=0):
+    return {
+        "address": CONTRACT,
+        "topics": [FUNDS_ALLOCATED, "0x" + encode(["uint256"], [project_id]).hex()],
+        "data": "0x" + encode(["uint256"], [amount]).hex(),
+        "blockNumber": hex(block_number),
+        "blockHash": "0x" + "d" * 64,
+        "transactionHash": "0x%064x" % block_number,
+        "logIndex": hex(log_index),
+    }
+
+
+def test_decodes_indexed_and_data_arguments():
+    decoder = EventDecoder(FUND_TRACKER_EVENTS_ABI)
+    event = decoder.decode(funds_allocated_log(42, project_id=7, amount=10 ** 30))
+    assert event["event"] == "FundsAllocated"
+    assert event["args"] == {"projectId": "7", "amount": str(10 ** 30)}
+    assert event["block_number"] == 42
+    assert event["_id"] == "0x%064x:0" % 42
+
+
+def test_fetch_range_shrinks_chunks_the_provider_rejects():
+    async def scenario():
+        async with RPCStub() as stub:
+            stub.max_log_range = 100
+            stub.logs = [funds_allocated_log(block, 1, block) for block in range(0, 1000, 37)]
+            client = ChainClient(stub.url, timeout=2)
+            indexer = EventIndexer(
+                client, ChainHeadTracker(client), CONTRACT,
+                EventDecoder(FUND_TRACKER_EVENTS_ABI), chunk_size=800
+            )
+            try:
+                events = await indexer.fetch_range(0, 999)
+            finally:
+                await client.close()
+
+            assert [e["block_number"] for e in events] == list(range(0, 1000, 37))
+            assert indexer.metrics["chunk_failures"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_reorg_inside_the_window_replaces_stale_events():
+    async def scenario():
+        client, db = await scratch_db("test_event_indexer")
+        async with RPCStub() as stub:
+            stub.block_number = 200
+            stub.logs = [funds_allocated_log(block, 1, block) for block in (50, 150, 190)]
+            chain = ChainClient(stub.url, timeout=2)
+            indexer = EventIndexer(chain, ChainHeadTracker(chain, max_age=0), CONTRACT,
+                                   EventDecoder(FUND_TRACKER_EVENTS_ABI), start_block=10, reorg_depth=64)
+            try:
+                assert await indexer.run_pass(db) == (3, 0)
+
+                # Block 190 is replaced by a fork carrying a different transaction
+                reorged = {**funds_allocated_log(190, 1, 999), "blockHash": "0x" + "e" * 64,
+                           "transactionHash": "0x" + "f" * 64}
+                stub.logs = [funds_allocated_log(block, 1, block) for block in (150,)] + [reorged]
+                stub.block_number = 210
+
+                assert await indexer.run_pass(db) == (2, 1)
+                events = {e["block_number"]: e async for e in db.chain_events.find()}
+                assert events[190]["tx_hash"] == "0x" + "f" * 64
+                assert events[190]["block_hash"] == "0x" + "e" * 64
+                assert events[190]["args"]["amount"] == "999"
+                # Block 50 is older than the window, so it is not re-fetched or deleted
+                assert sorted(events) == [50, 150, 190]
+                state = await db.indexer_state.find_one({"_id": EventIndexer.STATE_ID})
+                assert state["last_block"] == 210
+            finally:
+                await chain.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
+
+
+def test_contract_without_a_start_block_is_refused(monkeypatch):
+    monkeypatch.setenv("CONTRACT_ADDRESS", CONTRACT)
+    monkeypatch.delenv("EVENT_INDEXER_START_BLOCK", raising=False)
+    with pytest.raises(RuntimeError, match="EVENT_INDEXER_START_BLOCK"):
+        build_event_indexer(None, None)
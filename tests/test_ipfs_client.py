@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from ipfs_service import IPFSError, IPFSService
+from tests.pinning_stub import PinningStub
+
+
+def _client(stub, monkeypatch, **kwargs):
+    monkeypatch.setenv("PINATA_JWT", "test-token")
+    return IPFSService(api_url=stub.url, backoff=0.01, **kwargs)
+
+
+def test_file_is_pinned_over_one_pooled_connection(tmp_path, monkeypatch):
+    async def scenario():
+        content = b"invoice" * 200_000
+        path = tmp_path / "invoice.pdf"
+        path.write_bytes(content)
+        async with PinningStub() as stub:
+            client = _client(stub, monkeypatch)
+            try:
+                results = [await client.pin_file(str(path), "invoice.pdf") for _ in range(3)]
+                expected = "Qm" + hashlib.sha256(content).hexdigest()[:44]
+                assert {r["IpfsHash"] for r in results} == {expected}
+                assert stub.pinned[expected]["name"] == "invoice.pdf"
+                assert stub.pinned[expected]["authorization"] == "Bearer test-token"
+                # Keep-alive: sequential pins reuse the same connection
+                assert len(stub.peers) == 1
+
+                assert (await client.pin_json({"a": 1}))["IpfsHash"].startswith("Qm")
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_retryable_failures_are_retried(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(b"jpeg")
+        async with PinningStub() as stub:
+            stub.fail_with = [503, 429]
+            stub.retry_after = "0"
+            client = _client(stub, monkeypatch, retries=3)
+            try:
+                result = await client.pin_file(str(path), "photo.jpg")
+                assert result["IpfsHash"] in stub.pinned
+                assert stub.requests == 3
+                assert client.stats["retries"] == 2
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_gives_up_on_client_errors_and_after_retries(tmp_path, monkeypatch):
+    async def scenario():
+        path = tmp_path / "photo.jpg"
+        path.write_bytes(b"jpeg")
+        async with PinningStub() as stub:
+            client = _client(stub, monkeypatch, retries=2)
+            try:
+                stub.fail_with = [401]
+                with pytest.raises(IPFSError):
+                    await client.pin_file(str(path), "photo.jpg")
+                assert stub.requests == 1
+
+                stub.fail_with = [500, 500, 500]
+                with pytest.raises(IPFSError):
+                    await client.pin_file(str(path), "photo.jpg")
+                assert stub.requests == 4
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
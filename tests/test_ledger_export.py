@@ -0,0 +1,27 @@
+import asyncio
+from datetime import datetime, timezone
+
+from ledger_export import LedgerExporter
+from tests.mongo import scratch_db
+
+
+def test_date_range_matches_migrated_and_unmigrated_timestamps():
+    async def scenario():
+        client, db = await scratch_db("test_export")
+        try:
+            await db.transactions.insert_many([
+                {"id": "date-in", "timestamp": datetime(2024, 3, 5, 12, tzinfo=timezone.utc)},
+                {"id": "string-in", "timestamp": "2024-03-10T08:30:00.123456+00:00"},
+                {"id": "date-out", "timestamp": datetime(2024, 4, 2, tzinfo=timezone.utc)},
+                {"id": "string-out", "timestamp": "2024-02-28T23:59:59+00:00"}
+            ])
+            query = LedgerExporter.build_query(
+                "transactions", start=datetime(2024, 3, 1), end=datetime(2024, 4, 1)
+            )
+            found = await db.transactions.find(query).to_list(None)
+            assert sorted(doc["id"] for doc in found) == ["date-in", "string-in"]
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import timedelta
+
+from blob_store import BlobStore
+from datetime_codec import utcnow
+from ipfs_service import IPFSService
+from pin_queue import PinQueue
+from tests.mongo import scratch_db
+from tests.pinning_stub import PinningStub
+
+FILE_HASH = "b" * 64
+
+
+async def _queued_blob(db, tmp_path):
+    path = tmp_path / FILE_HASH
+    path.write_bytes(b"site photo")
+    await BlobStore().register(db, FILE_HASH, str(path), "photo.jpg", 10)
+    await db.documents.insert_many([
+        {"id": doc_id, "file_hash": FILE_HASH, "pin_status": "pending", "ipfs_hash": None}
+        for doc_id in ("d1", "d2")
+    ])
+    return path
+
+
+def test_pending_blob_is_pinned_and_documents_updated(tmp_path, monkeypatch):
+    async def scenario():
+        monkeypatch.setenv("PINATA_JWT", "test-token")
+        client, db = await scratch_db("test_pin_queue")
+        async with PinningStub() as stub:
+            ipfs = IPFSService(api_url=stub.url, backoff=0.01, retries=0)
+            queue = PinQueue(ipfs, max_attempts=2, retry_base=0.01)
+            try:
+                path = await _queued_blob(db, tmp_path)
+
+                # First attempt fails and is rescheduled
+                stub.fail_with = [503]
+                assert await queue.process(db, await queue.claim(db)) == "pending"
+                await db.blobs.update_one({"_id": FILE_HASH}, {"$set": {"next_attempt_at": utcnow()}})
+
+                blob = await queue.claim(db)
+                assert await queue.claim(db) is None  # leased
+                assert await queue.process(db, blob) == "pinned"
+
+                docs = await db.documents.find({"file_hash": FILE_HASH}).to_list(None)
+                assert {d["pin_status"] for d in docs} == {"pinned"}
+                assert docs[0]["ipfs_hash"] in stub.pinned
+                assert not path.exists()
+            finally:
+                await ipfs.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_reclaimed_and_repeated_failures_give_up(tmp_path, monkeypatch):
+    async def scenario():
+        monkeypatch.setenv("PINATA_JWT", "test-token")
+        client, db = await scratch_db("test_pin_queue")
+        async with PinningStub() as stub:
+            ipfs = IPFSService(api_url=stub.url, backoff=0.01, retries=0)
+            queue = PinQueue(ipfs, max_attempts=1)
+            try:
+                await _queued_blob(db, tmp_path)
+
+                # A worker that crashed mid-pin leaves an expired lease behind
+                await queue.claim(db)
+                await db.blobs.update_one(
+                    {"_id": FILE_HASH}, {"$set": {"lease_until": utcnow() - timedelta(seconds=1)}}
+                )
+                blob = await queue.claim(db)
+                assert blob is not None
+
+                stub.fail_with = [500]
+                assert await queue.process(db, blob) == "failed"
+                docs = await db.documents.find({"file_hash": FILE_HASH}).to_list(None)
+                assert {d["pin_status"] for d in docs} == {"failed"}
+
+                assert (await queue.requeue(db, FILE_HASH))["pin_status"] == "pending"
+            finally:
+                await ipfs.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
+
+
+def test_blob_without_local_copy_fails_until_requeued_with_one(tmp_path, monkeypatch):
+    async def scenario():
+        monkeypatch.setenv("PINATA_JWT", "test-token")
+        client, db = await scratch_db("test_pin_queue")
+        async with PinningStub() as stub:
+            ipfs = IPFSService(api_url=stub.url, backoff=0.01, retries=0)
+            queue = PinQueue(ipfs, max_attempts=5)
+            try:
+                # What BlobStore.rebuild writes for documents that were never pinned
+                await db.blobs.insert_one({"_id": FILE_HASH, "refcount": 1, "ipfs_hash": None, "pin_status": "failed"})
+                await queue.requeue(db, FILE_HASH)
+                assert await queue.process(db, await queue.claim(db)) == "failed"
+                assert stub.requests == 0
+
+                # A duplicate upload supplies the bytes again
+                path = tmp_path / FILE_HASH
+                path.write_bytes(b"site photo")
+                await queue.requeue(db, FILE_HASH, str(path))
+                assert await queue.process(db, await queue.claim(db)) == "pinned"
+            finally:
+                await ipfs.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import pytest
+
+from processing_pool import PoolSaturated, ProcessingPool
+
+
+def test_full_pool_rejects_instead_of_queueing():
+    async def scenario():
+        pool = ProcessingPool(workers=2, max_queue=1)
+        release = threading.Event()
+        try:
+            busy = [asyncio.ensure_future(pool.run("block", release.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(PoolSaturated):
+                await pool.run("block", release.wait, 5)
+
+            release.set()
+            assert await asyncio.gather(*busy) == [True, True, True]
+            stats = pool.stats()
+            assert stats["rejected"] == 1
+            assert stats["active"] == 0
+            assert stats["tasks"]["block"]["count"] == 3
+        finally:
+            release.set()
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_event_loop_stays_responsive_while_workers_are_busy():
+    async def scenario():
+        pool = ProcessingPool(workers=2, max_queue=4)
+        release = threading.Event()
+        try:
+            work = asyncio.gather(*(pool.run("block", release.wait, 5) for _ in range(4)))
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await asyncio.sleep(0.01)
+            assert loop.time() - started < 0.5
+            release.set()
+            await work
+        finally:
+            release.set()
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+import asyncio
+
+from chain_client import ChainClient
+from receipt_cache import ReceiptCache
+from tests.mongo import scratch_db
+from tests.rpc_stub import RPCStub
+
+TX_HASH = "0x" + "ab" * 32
+LEGACY_HASH = "0x" + "CD" * 32
+MIXED_HASH = "0x" + "AB" * 32
+
+
+def test_hashes_differing_in_case_share_a_receipt_and_backfill_records():
+    async def scenario():
+        client, db = await scratch_db("test_receipt_cache")
+        async with RPCStub() as stub:
+            stub.block_number = 1000
+            stub.add_transaction(TX_HASH, block_number=100)
+            stub.add_transaction(LEGACY_HASH, block_number=200)
+            chain = ChainClient(stub.url, timeout=2)
+            cache = ReceiptCache(chain, finality_blocks=128)
+            try:
+                await db.transactions.insert_many([
+                    {"id": "t1", "tx_hash": TX_HASH, "chain_status": "pending"},
+                    # Recorded before hashes were normalised
+                    {"id": "t2", "tx_hash": LEGACY_HASH, "chain_status": "pending"}
+                ])
+
+                results = await cache.lookup_many(db, [MIXED_HASH, TX_HASH, LEGACY_HASH])
+                assert results[MIXED_HASH]["block_number"] == results[TX_HASH]["block_number"] == 100
+                assert results[LEGACY_HASH]["block_number"] == 200
+                assert stub.calls["eth_getTransactionReceipt"] == 2
+
+                async for tx in db.transactions.find():
+                    assert tx["chain_status"] == "confirmed" and tx["verified"] is True
+                assert await db.receipts.count_documents({}) == 2
+            finally:
+                await chain.close()
+                await client.drop_database(db.name)
+                client.close()
+
+    asyncio.run(scenario())
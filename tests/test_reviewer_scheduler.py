@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import server
+from approvals import ReviewerScheduler
+from indexes import ensure_indexes
+from tests.mongo import scratch_db
+
+REVIEWERS = 8
+SUBMISSIONS = 400
+
+
+async def _register(db, count, department="Municipal Office"):
+    await db.authorities.insert_many([
+        {"id": str(uuid.uuid4()), "username": f"{department}-{i}", "department": department,
+         "active_reviews": 0, "total_reviewed": 0}
+        for i in range(count)
+    ])
+
+
+def test_concurrent_assignments_stay_balanced():
+    async def scenario():
+        client, db = await scratch_db("test_scheduler")
+        try:
+            await ensure_indexes(db)
+            await _register(db, REVIEWERS)
+            scheduler = ReviewerScheduler()
+
+            reviewers = await asyncio.gather(*(scheduler.assign(db) for _ in range(SUBMISSIONS)))
+            assert all(reviewers)
+
+            loads = [a["active_reviews"] async for a in db.authorities.find()]
+            assert sum(loads) == SUBMISSIONS
+            assert max(loads) - min(loads) <= 1
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def test_capacity_and_department_affinity():
+    async def scenario():
+        client, db = await scratch_db("test_scheduler")
+        try:
+            await ensure_indexes(db)
+            await _register(db, 2, department="Roads")
+            await _register(db, 2, department="Parks")
+            scheduler = ReviewerScheduler(capacity=3)
+
+            # Roads reviewers fill up first, then assignments spill over to Parks
+            reviewers = await asyncio.gather(*(scheduler.assign(db, "Roads") for _ in range(12)))
+            departments = [reviewer["department"] for reviewer in reviewers]
+            assert departments.count("Roads") == 6
+            assert departments.count("Parks") == 6
+
+            assert await scheduler.assign(db, "Roads") is None
+
+            await scheduler.release(db, reviewers[0]["id"])
+            assert (await scheduler.assign(db))["id"] == reviewers[0]["id"]
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_submission_gives_the_reserved_slot_back(monkeypatch):
+    async def scenario():
+        client, db = await scratch_db("test_scheduler")
+        try:
+            await ensure_indexes(db)
+            await _register(db, 1)
+            await db.projects.insert_one({"id": "p1", "status": "Draft"})
+            monkeypatch.setattr(server, "db", db)
+            monkeypatch.setattr(server, "reviewer_scheduler", ReviewerScheduler(capacity=1))
+
+            # Make the approval insert collide with an existing request id
+            clash = uuid.uuid4()
+            await db.approval_requests.insert_one({"id": str(clash)})
+            monkeypatch.setattr(uuid, "uuid4", lambda: clash)
+            with pytest.raises(DuplicateKeyError):
+                await server.submit_for_approval("p1")
+
+            reviewer = await db.authorities.find_one()
+            assert reviewer["active_reviews"] == 0
+            assert reviewer["total_reviewed"] == 0
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
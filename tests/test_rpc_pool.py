@@ -0,0 +1,117 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from chain_client import ChainClient
+from tests.rpc_stub import RPCStub
+
+
+async def start_stubs(stack, latencies):
+    return [await stack.enter_async_context(RPCStub(latency=latency)) for latency in latencies]
+
+
+def test_routes_to_fastest_endpoint():
+    async def scenario():
+        async with AsyncExitStack() as stack:
+            slow, fast = await start_stubs(stack, [0.08, 0.0])
+            client = ChainClient(f"{slow.url},{fast.url}", timeout=2, hedge_delay=5)
+            try:
+                # Warm up so both endpoints have a latency sample
+                await client.block_number()
+                await client.block_number()
+                slow.http_requests = fast.http_requests = 0
+                for _ in range(10):
+                    await client.block_number()
+                assert fast.http_requests == 10
+                assert slow.http_requests == 0
+                assert client.pool.ranked()[0].url == fast.url
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_fails_over_when_endpoint_errors():
+    async def scenario():
+        async with AsyncExitStack() as stack:
+            broken, healthy = await start_stubs(stack, [0.0, 0.0])
+            broken.fail = True
+            client = ChainClient([broken.url, healthy.url], timeout=2)
+            try:
+                for _ in range(5):
+                    assert await client.block_number() == 1000
+                state = {ep["url"]: ep for ep in client.pool.state()["endpoints"]}
+                assert state[broken.url]["error_rate"] == 1.0
+                assert state[healthy.url]["error_rate"] == 0.0
+                assert state[broken.url]["cooling_down"] is True
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_hedges_slow_request_to_second_endpoint():
+    async def scenario():
+        async with AsyncExitStack() as stack:
+            stalled, backup = await start_stubs(stack, [0.0, 0.0])
+            client = ChainClient([stalled.url, backup.url], timeout=5, hedge_delay=0.1)
+            try:
+                await client.block_number()
+                await client.block_number()
+                # The endpoint the pool prefers now stalls for a second
+                preferred = client.pool.ranked()[0].url
+                slow_stub = stalled if preferred == stalled.url else backup
+                slow_stub.latency = 1.0
+
+                started = time.monotonic()
+                assert await client.block_number() == 1000
+                assert time.monotonic() - started < 0.6
+                assert client.pool.hedges == 1
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_routing_moves_off_an_endpoint_that_keeps_getting_hedged():
+    async def scenario():
+        async with AsyncExitStack() as stack:
+            first, second = await start_stubs(stack, [0.0, 0.0])
+            client = ChainClient([first.url, second.url], timeout=5, hedge_delay=0.1)
+            try:
+                await client.block_number()
+                await client.block_number()
+                preferred = client.pool.ranked()[0].url
+                (first if preferred == first.url else second).latency = 1.0
+
+                for _ in range(5):
+                    assert await client.block_number() == 1000
+                assert client.pool.ranked()[0].url != preferred
+                assert client.pool.hedges <= 2
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_hedge_that_loses_to_the_primary_is_not_penalised():
+    async def scenario():
+        async with AsyncExitStack() as stack:
+            first, second = await start_stubs(stack, [0.0, 0.0])
+            client = ChainClient([first.url, second.url], timeout=5, hedge_delay=0.05)
+            try:
+                await client.block_number()
+                await client.block_number()
+                primary, backup = client.pool.ranked()
+                primary_stub, backup_stub = (first, second) if primary.url == first.url else (second, first)
+                primary_stub.latency, backup_stub.latency = 0.15, 0.5
+                backup_latency = backup.latency
+
+                # The backup is sent at 0.05s and cancelled when the primary answers at 0.15s
+                assert await client.block_number() == 1000
+                assert client.pool.hedges == 1
+                assert backup.latency == backup_latency
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+import asyncio
+
+import server
+from chain_client import ChainClient
+from chain_head import ChainHeadTracker
+from receipt_cache import ReceiptCache
+from single_flight import SingleFlight
+from tests.rpc_stub import RPCStub
+
+TX_HASH = "0x" + "3" * 64
+
+
+class _EmptyCollection:
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+class _EmptyDB:
+    receipts = _EmptyCollection()
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream_calls = 0
+
+        async def fetch():
+            nonlocal upstream_calls
+            upstream_calls += 1
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(100)))
+        assert upstream_calls == 1
+        assert all(result == {"value": 42} for result in results)
+        assert flight.stats()["coalesced"] == 99
+        assert not flight.in_flight("key")
+
+        # Settled keys are not cached
+        await flight.do("key", fetch)
+        assert upstream_calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_a_caller_mutating_its_result_does_not_affect_the_others():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return {"project": {"name": "Bridge", "tags": ["roads"]}}
+
+        async def redacting_handler():
+            result = await flight.do("key", fetch)
+            result["project"]["name"] = "[REDACTED]"
+            result["project"]["tags"].clear()
+            return result
+
+        redacted, plain = await asyncio.gather(redacting_handler(), flight.do("key", fetch))
+        assert flight.executions == 1
+        assert redacted["project"] == {"name": "[REDACTED]", "tags": []}
+        assert plain["project"] == {"name": "Bridge", "tags": ["roads"]}
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_cancellation_is_isolated():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ValueError("boom")
+
+        waiters = [asyncio.create_task(flight.do("key", failing)) for _ in range(5)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert all(isinstance(result, ValueError) for result in results[1:])
+        assert flight.executions == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_verify_requests_issue_one_rpc_lookup(monkeypatch):
+    async def scenario():
+        async with RPCStub(latency=0.05) as stub:
+            stub.add_transaction(TX_HASH, block_number=990)
+            client = ChainClient(stub.url, timeout=2)
+            head = ChainHeadTracker(client)
+            monkeypatch.setattr(server, "chain_client", client)
+            monkeypatch.setattr(server, "chain_head", head)
+            monkeypatch.setattr(server, "receipt_cache", ReceiptCache(client, head=head, negative_ttl=0))
+            monkeypatch.setattr(server, "verify_flight", SingleFlight("verify"))
+            monkeypatch.setattr(server, "db", _EmptyDB())
+            try:
+                results = await asyncio.gather(*(server.verify_transaction(TX_HASH) for _ in range(50)))
+                assert all(result["block_number"] == 990 for result in results)
+                assert stub.calls["eth_getTransactionReceipt"] == 1
+                assert stub.calls["eth_getTransactionByHash"] == 1
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+import asyncio
+
+from stats_service import StatsService
+from tests.mongo import scratch_db
+
+
+def test_write_to_existing_data_keeps_rollup_equal_to_compute():
+    async def scenario():
+        client, db = await scratch_db("test_stats")
+        try:
+            # A deployment with data but no rollup yet
+            await db.projects.insert_many([
+                {"id": "p1", "status": "Active", "category": "Roads", "budget": 100.0,
+                 "allocated_funds": 40.0, "spent_funds": 10.0},
+                {"id": "p2", "status": "Approved", "category": "Water", "budget": 50.0,
+                 "allocated_funds": 0.0, "spent_funds": 0.0}
+            ])
+            await db.expenditures.insert_one({"project_id": "p1", "category": "Labour", "amount": 10.0})
+            stats = StatsService()
+
+            # A write racing ahead of the seed must not create a partial global doc
+            await stats.apply(db, global_inc={"total_projects": 1})
+            assert await db.stats_rollup.find_one({"_id": "global"}) is None
+
+            assert await stats.ensure_seeded(db) is True
+            assert await stats.ensure_seeded(db) is False
+
+            await db.projects.insert_one({"id": "p3", "status": "Active", "category": "Roads", "budget": 25.0,
+                                          "allocated_funds": 0.0, "spent_funds": 0.0})
+            await stats.apply(
+                db,
+                global_inc={"total_projects": 1, "total_budget": 25.0, "active_projects": 1},
+                project_category="Roads",
+                project_category_inc={"budget": 25.0}
+            )
+            assert await stats.read(db) == await stats.compute(db)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
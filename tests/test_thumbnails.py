@@ -0,0 +1,42 @@
+import asyncio
+
+from PIL import Image
+
+from thumbnails import ThumbnailCache, render_thumbnails, THUMBNAIL_SIZES
+
+
+def test_renders_every_size_and_format_with_exif_orientation(tmp_path):
+    source = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees: stored landscape, shown portrait
+    Image.new("RGB", (2000, 1000), "red").save(source, "JPEG", exif=exif)
+
+    renders = render_thumbnails(str(source))
+
+    assert set(renders) == {f"{size}.{fmt}" for size in THUMBNAIL_SIZES for fmt in ("webp", "jpeg")}
+    large = renders["large.webp"]
+    assert (large["width"], large["height"]) == (640, 1280)
+    assert renders["small.jpeg"]["height"] == THUMBNAIL_SIZES["small"]
+    assert renders["small.jpeg"]["data"][:2] == b"\xff\xd8"
+    assert renders["small.webp"]["data"][8:12] == b"WEBP"
+
+
+def test_cache_evicts_least_recently_served(tmp_path):
+    async def scenario():
+        cache = ThumbnailCache(tmp_path, max_bytes=30)
+        await cache.put("aa.one", b"1" * 10)
+        await cache.put("bb.two", b"2" * 10)
+        await cache.put("cc.three", b"3" * 10)
+        assert await cache.get("aa.one") == b"1" * 10
+
+        await cache.put("dd.four", b"4" * 10)
+        assert await cache.get("bb.two") is None
+        assert not (tmp_path / "bb" / "bb.two").exists()
+        assert cache.summary()["bytes"] == 30
+
+        # A restarted cache picks the survivors back up from disk
+        reopened = ThumbnailCache(tmp_path, max_bytes=30)
+        assert await reopened.get("cc.three") == b"3" * 10
+        assert reopened.summary()["entries"] == 3
+
+    asyncio.run(scenario())
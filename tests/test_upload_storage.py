@@ -0,0 +1,44 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from upload_storage import UploadStore, UploadTooLarge
+
+
+class _CountingFile(io.BytesIO):
+    """Records the largest single read the store asks for"""
+    largest_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.largest_read = max(self.largest_read, len(data))
+        return data
+
+
+def test_upload_is_streamed_and_hashed(tmp_path):
+    async def scenario():
+        content = b"site survey " * 100_000
+        source = _CountingFile(content)
+        store = UploadStore(tmp_path, max_bytes=len(content), chunk_size=64 * 1024)
+
+        path, size, sha256 = await store.save(UploadFile(source, filename="../survey.pdf"))
+        assert size == len(content)
+        assert sha256 == hashlib.sha256(content).hexdigest()
+        assert path.parent == tmp_path and path.name.endswith("_survey.pdf")
+        assert path.read_bytes() == content
+        assert source.largest_read <= 64 * 1024
+
+    asyncio.run(scenario())
+
+
+def test_oversized_upload_is_rejected_and_removed(tmp_path):
+    async def scenario():
+        store = UploadStore(tmp_path, max_bytes=1000, chunk_size=256)
+        with pytest.raises(UploadTooLarge):
+            await store.save(UploadFile(io.BytesIO(b"x" * 1001), filename="big.jpg"))
+        assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import asyncio
+
+from chain_client import ChainClient, RPCError
+from tests.rpc_stub import RPCStub
+
+
+def test_batch_request_preserves_order_and_chunks():
+    async def scenario():
+        async with RPCStub() as stub:
+            hashes = ["0x%064x" % i for i in range(25)]
+            for i, tx_hash in enumerate(hashes):
+                if i % 5:
+                    stub.add_transaction(tx_hash, block_number=100 + i)
+            client = ChainClient(stub.url, timeout=2, batch_size=10)
+            try:
+                calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+                calls.append(("eth_unknownMethod", []))
+                results = await client.batch_request(calls)
+            finally:
+                await client.close()
+
+            assert stub.http_requests == 3
+            assert isinstance(results[-1], RPCError)
+            for i, receipt in enumerate(results[:-1]):
+                if i % 5:
+                    assert int(receipt["blockNumber"], 16) == 100 + i
+                else:
+                    assert receipt is None
+
+    asyncio.run(scenario())